@@ -11,6 +11,8 @@ bl_info = {
 import bpy
 
 from .nodes import DialogueNodeTree
+from .perf import RECENT_METRICS
+from . import uuid_index
 
 # Config for localisation xml file path (extracted with lslib or the multitool)
 class DialogueAddonPreferences(bpy.types.AddonPreferences):
@@ -22,10 +24,58 @@ class DialogueAddonPreferences(bpy.types.AddonPreferences):
         default="",
         subtype='FILE_PATH'
     )
+    use_localisation_index: bpy.props.BoolProperty(
+        name="Index Localisation File",
+        description=("Keep a persistent index of the localisation file in the user cache directory so imports "
+                     "only look up the handles they need. The index is rebuilt when the file changes"),
+        default=True
+    )
+    use_import_cache: bpy.props.BoolProperty(
+        name="Cache Imported Dialogs",
+        description=("Keep parsed dialogs in the user cache directory, keyed by the file contents, so reopening "
+                     "an unchanged dialog skips parsing and localisation lookups"),
+        default=True
+    )
+    import_cache_size: bpy.props.IntProperty(
+        name="Import Cache Size (MB)",
+        description="Least recently used dialogs are removed from the cache beyond this size",
+        default=256,
+        min=1
+    )
+    log_level: bpy.props.EnumProperty(
+        name="Log Level",
+        description="How much the import and export operators write to their log files",
+        items=[
+            ('OFF', "Off", "Do not write log files"),
+            ('SUMMARY', "Summary", "Log totals, warnings and errors only"),
+            ('DEBUG', "Debug", "Log every node, handle, flag and link (slow on big dialogs)"),
+        ],
+        default='SUMMARY'
+    )
+    metrics_path: bpy.props.StringProperty(
+        name="Metrics File",
+        description=("Append the phase timings of every import and export to this file as JSON lines, "
+                     "to track performance over time. Leave empty to only show them in the Performance panel"),
+        default="",
+        subtype='FILE_PATH'
+    )
+    track_memory: bpy.props.BoolProperty(
+        name="Track Memory Peaks",
+        description="Record the peak Python memory of every import and export phase. Slows imports and exports down",
+        default=False
+    )
 
     def draw(self, context):
         layout = self.layout
         layout.prop(self, "localisation_path")
+        layout.prop(self, "use_localisation_index")
+        layout.prop(self, "use_import_cache")
+        row = layout.row()
+        row.enabled = self.use_import_cache
+        row.prop(self, "import_cache_size")
+        layout.prop(self, "log_level")
+        layout.prop(self, "metrics_path")
+        layout.prop(self, "track_memory")
 
 # Panel in the node tree editor to interact with dialogue features and display global dialogue attributes e.g. timelineid
 class DialogueNodePanel(bpy.types.Panel):
@@ -83,6 +133,40 @@ class DialogueNodePanel(bpy.types.Panel):
         # Add an option to add a new speaker
         layout.operator("node.add_speaker", text="+ New Speaker")
 
+# Sub panel with the phase timings of the latest import, export and localisation export
+class DialoguePerformancePanel(bpy.types.Panel):
+    bl_label = "Performance"
+    bl_idname = "NODE_PT_dialogue_performance"
+    bl_space_type = 'NODE_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = "Dialogue"
+    bl_parent_id = DialogueNodePanel.bl_idname
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context):
+        return isinstance(context.space_data.edit_tree, DialogueNodeTree)
+
+    def draw(self, context):
+        layout = self.layout
+        if not RECENT_METRICS:
+            layout.label(text="No import or export yet")
+            return
+
+        for metrics in RECENT_METRICS.values():
+            box = layout.box()
+            state = "" if metrics["completed"] else " (not completed)"
+            box.label(text=f"{metrics['operation']}: {metrics['total_seconds']:.3f} s{state}")
+            if metrics["counts"]:
+                box.label(text=", ".join(f"{value} {name}" for name, value in metrics["counts"].items()))
+            # One row per phase: name, time and the memory peak when tracked
+            for phase in metrics["phases"]:
+                row = box.row()
+                row.label(text=phase["name"])
+                row.label(text=f"{phase['seconds']:.3f} s")
+                if phase["peak_bytes"] is not None:
+                    row.label(text=f"{phase['peak_bytes'] / (1 << 20):.1f} MB")
+
 
 # Operator to zoom/select and center into the node by UUID
 class ZoomToNodeOperator(bpy.types.Operator):
@@ -106,15 +190,15 @@ class ZoomToNodeOperator(bpy.types.Operator):
             return {'CANCELLED'}
 
         # Find the node with the specified UUID
-        target_node = None
-        for node in node_tree.nodes:
-            if getattr(node, "uuid", None) == uuid:
-                target_node = node
-                break
+        index = uuid_index.uuid_index(node_tree)
+        target_node = index.get(uuid)
 
         if not target_node:
             self.report({'ERROR'}, f"Node with UUID {uuid} not found")
             return {'CANCELLED'} # if the node with the specified UUID is not found in the nodetree
+        if uuid in index.duplicates:
+            self.report({'WARNING'},
+                        f"UUID {uuid} is used by {len(index.duplicates[uuid])} nodes, snapping to the first")
 
         # Deselect all nodes and select the target node
         for node in node_tree.nodes:
@@ -149,10 +233,12 @@ def register():
         default="")
     bpy.utils.register_class(DialogueAddonPreferences)
     bpy.utils.register_class(DialogueNodePanel)
+    bpy.utils.register_class(DialoguePerformancePanel)
     bpy.utils.register_class(ZoomToNodeOperator)
     import_operators.register()
     export_operators.register()
     nodes.register()
+    uuid_index.register()
 
 def unregister():
     from . import import_operators
@@ -160,11 +246,13 @@ def unregister():
     from . import export_operators
     del bpy.types.Scene.zoom_to_uuid
     bpy.utils.unregister_class(DialogueAddonPreferences)
+    bpy.utils.unregister_class(DialoguePerformancePanel)
     bpy.utils.unregister_class(DialogueNodePanel)
     bpy.utils.unregister_class(ZoomToNodeOperator)
     import_operators.unregister()
     export_operators.unregister()
     nodes.unregister()
+    uuid_index.unregister()
 
 if __name__ == '__main__':
     register()
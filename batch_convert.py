@@ -0,0 +1,202 @@
+# Headless batch conversion of DialogsBinary XML and LSF files to .blend files and back, without a Node Editor.
+#
+#   blender -b --python batch_convert.py -- import "Dialogs/**/*.lsx" --loca english.xml --out blends/
+#   blender -b --python batch_convert.py -- export blends/ --out Dialogs/
+#
+# Files are parsed to DialogModels in a process pool (fork, so only on Linux and macOS; elsewhere the files are
+# converted one after the other). Blender data is only touched in the main process.
+import argparse
+import glob
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+
+import bpy
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Function: import the addon package this script belongs to and register it if Blender has not done so already
+def load_addon():
+    parent_dir = os.path.dirname(ADDON_DIR)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    addon = importlib.import_module(os.path.basename(ADDON_DIR))
+    if not hasattr(bpy.types, "DialogueNodeTree"):
+        addon.register()
+    return addon
+
+
+# Function: expand directories and glob patterns to a sorted list of files
+def collect_files(inputs, extensions):
+    files = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for directory, _, names in os.walk(entry):
+                files.extend(os.path.join(directory, name) for name in names
+                             if os.path.splitext(name)[1].lower() in extensions)
+        else:
+            files.extend(path for path in glob.glob(entry, recursive=True) if os.path.isfile(path))
+    return sorted(set(files))
+
+
+# Function: parse one dialog file to a DialogModel (runs in the worker processes)
+def parse_file(filepath, localisation_path, use_index, log_level):
+    from . import dialog_log, dialog_parser, loca_index, lsf_reader
+
+    start = time.perf_counter()
+    log = dialog_log.DialogLog(log_level)
+    try:
+        if lsf_reader.is_lsf_file(filepath):
+            root = lsf_reader.read_lsf(filepath)
+            handles = dialog_parser.collect_tagtext_handles(root)
+            localisation_data = loca_index.load_localisation_texts(localisation_path, handles, use_index, log)
+            model = dialog_parser.parse_dialog_model(root, localisation_data, log)
+        else:
+            handles = dialog_parser.collect_tagtext_handles(filepath)
+            localisation_data = loca_index.load_localisation_texts(localisation_path, handles, use_index, log)
+            model = dialog_parser.parse_dialog_model_streamed(filepath, localisation_data, log)
+    except Exception as e:
+        return filepath, None, log, time.perf_counter() - start, str(e)
+    return filepath, model, log, time.perf_counter() - start, None
+
+
+# Function: run parse_file for all files, in a forked process pool when possible
+def parse_files(files, localisation_path, use_index, log_level, jobs):
+    arguments = [(filepath, localisation_path, use_index, log_level) for filepath in files]
+    if jobs > 1 and len(files) > 1 and "fork" in multiprocessing.get_all_start_methods():
+        with multiprocessing.get_context("fork").Pool(jobs) as pool:
+            yield from pool.imap(parse_file_star, arguments)
+    else:
+        for argument in arguments:
+            yield parse_file(*argument)
+
+
+def parse_file_star(arguments):
+    return parse_file(*arguments)
+
+
+# Function: write a per-file log when the log level asks for one
+def write_log(log, output_path):
+    log.write(os.path.splitext(output_path)[0] + ".log")
+
+
+def import_files(args):
+    from .dialog_log import LOG_LEVELS
+    from .import_operators import build_node_tree
+    from .import_utils import new_node_tree
+    from .loca_index import LocalisationIndex
+
+    files = collect_files(args.inputs, {".lsx", ".xml", ".lsf"})
+    log_level = LOG_LEVELS[args.log_level]
+    if args.loca and args.index:
+        # Build or refresh the index once, before the workers open it read-only
+        LocalisationIndex(args.loca).close()
+
+    report = []
+    for filepath, model, log, parse_time, error in parse_files(files, args.loca, args.index, log_level, args.jobs):
+        output_path = os.path.join(args.out, os.path.splitext(os.path.basename(filepath))[0] + ".blend")
+        if error is not None:
+            report.append((filepath, "FAILED: " + error, 0, parse_time, 0.0))
+            continue
+
+        start = time.perf_counter()
+        try:
+            node_tree = new_node_tree(os.path.splitext(os.path.basename(filepath))[0])
+            build_node_tree(model, node_tree, {}, {}, log)
+            bpy.data.libraries.write(output_path, {node_tree}, fake_user=True)
+            node_count = len(node_tree.nodes)
+            bpy.data.node_groups.remove(node_tree)
+        except Exception as e:
+            report.append((filepath, "FAILED: " + str(e), 0, parse_time, time.perf_counter() - start))
+            continue
+        write_log(log, output_path)
+        report.append((filepath, output_path, node_count, parse_time, time.perf_counter() - start))
+    return report
+
+
+def export_files(args):
+    from .dialog_log import DialogLog, LOG_LEVELS
+    from .export_operators import build_dialog_model, write_dialog_model
+
+    report = []
+    for filepath in collect_files(args.inputs, {".blend"}):
+        start = time.perf_counter()
+        try:
+            with bpy.data.libraries.load(filepath) as (data_from, data_to):
+                data_to.node_groups = list(data_from.node_groups)
+        except Exception as e:
+            report.append((filepath, "FAILED: " + str(e), 0, time.perf_counter() - start, 0.0))
+            continue
+        load_time = time.perf_counter() - start
+
+        node_trees = [tree for tree in data_to.node_groups if tree is not None and tree.bl_idname == "DialogueNodeTree"]
+        for node_tree in node_trees:
+            name = os.path.splitext(os.path.basename(filepath))[0]
+            if len(node_trees) > 1:
+                name = f"{name}_{bpy.path.clean_name(node_tree.name)}"
+            output_path = os.path.join(args.out, name + args.ext)
+            log = DialogLog(LOG_LEVELS[args.log_level])
+            start = time.perf_counter()
+            try:
+                model = build_dialog_model(node_tree, log)
+                write_dialog_model(model, output_path, log)
+            except Exception as e:
+                report.append((filepath, "FAILED: " + str(e), 0, load_time, time.perf_counter() - start))
+                continue
+            write_log(log, output_path)
+            report.append((filepath, output_path, len(model.nodes), load_time, time.perf_counter() - start))
+
+        for node_tree in data_to.node_groups:
+            if node_tree is not None:
+                bpy.data.node_groups.remove(node_tree)
+    return report
+
+
+def print_report(report, total_time, read_label, write_label):
+    print(f"{'file':<60} {'nodes':>7} {read_label:>9} {write_label:>9}  result")
+    for filepath, result, node_count, read_time, write_time in report:
+        print(f"{os.path.basename(filepath):<60} {node_count:>7} {read_time:>8.3f}s {write_time:>8.3f}s  {result}")
+    failed = sum(1 for entry in report if entry[1].startswith("FAILED"))
+    print(f"{len(report)} conversions, {failed} failed, {total_time:.2f}s total")
+    return failed
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog="blender -b --python batch_convert.py --",
+        description="Convert DialogsBinary XML or LSF files to .blend files (import) or .blend files to XML (export).")
+    parser.add_argument("mode", choices=("import", "export"))
+    parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--loca", default="", help="Localisation XML used to resolve the texts on import")
+    parser.add_argument("--no-index", dest="index", action="store_false",
+                        help="Stream the localisation file instead of using the persistent index")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parser processes for import")
+    parser.add_argument("--ext", default=".lsx", help="Extension of exported files, .lsf writes binary LSF")
+    parser.add_argument("--log-level", choices=("OFF", "SUMMARY", "DEBUG"), default="OFF",
+                        help="Write a log next to every output file")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_arguments(argv)
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    if args.mode == "import":
+        report = import_files(args)
+        failed = print_report(report, time.perf_counter() - start, "parse", "build")
+    else:
+        report = export_files(args)
+        failed = print_report(report, time.perf_counter() - start, "load", "write")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    # Run as a script by Blender: continue in the copy of this module inside the addon package, so the relative
+    # imports work and the pool workers can find parse_file. Blender passes the script arguments after "--"
+    batch_convert = importlib.import_module(load_addon().__name__ + ".batch_convert")
+    sys.exit(batch_convert.main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []))
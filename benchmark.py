@@ -0,0 +1,182 @@
+# Import and export benchmarks on synthetic dialogs, to see how the addon scales and catch regressions in numbers.
+#
+#   blender -b --python benchmark.py -- run --sizes 100 1000 10000 50000 --out bench/ --memory --metrics bench.jsonl
+#   blender -b --python benchmark.py -- generate --nodes 5000 --out dialog.lsx --loca english.xml
+#
+# Every size generates a dialog and its localisation file, then times parsing, building the node tree, exporting
+# LSX and LSF and exporting the localisation. The phases are the ones the operators report in the Performance panel.
+import argparse
+import importlib
+import os
+import sys
+import time
+
+import bpy
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+
+
+# Function: parse "TagAnswer=40,Jump=6" to a constructor mix
+def parse_mix(text):
+    mix = {}
+    for entry in text.split(","):
+        constructor, _, weight = entry.partition("=")
+        mix[constructor.strip()] = float(weight or 1)
+    return mix
+
+
+def generator_arguments(args):
+    return {
+        "seed": args.seed,
+        "branching": args.branching,
+        "flags_per_node": args.flags,
+        "handles_per_node": args.handles,
+        "mix": parse_mix(args.mix) if args.mix else None,
+        "root_count": args.roots,
+        "extra_handles": args.extra_handles,
+    }
+
+
+def generate_files(args):
+    from .dialog_generator import generate_dialog
+
+    start = time.perf_counter()
+    node_count, handle_count = generate_dialog(args.out, args.loca, args.nodes, **generator_arguments(args))
+    print(f"Generated {args.out} ({node_count} nodes) and {args.loca} ({handle_count} handles) "
+          f"in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+# Function: time one import and export round trip of a generated dialog, returns the metrics of the run
+def benchmark_dialog(args, size, dialog_path, localisation_path):
+    from .dialog_log import DialogLog, OFF
+    from .export_operators import build_dialog_model, write_dialog_model, collect_handles, write_localisation_file
+    from .import_operators import parse_dialog_source, build_node_tree
+    from .import_utils import new_node_tree
+    from .perf import OperationMetrics
+
+    output_path = os.path.join(args.out, f"export_{size}")
+    metrics = OperationMetrics(f"Benchmark {size}", dialog_path, args.memory, args.metrics)
+    log = DialogLog(OFF)
+    settings = {
+        'localisation_path': localisation_path,
+        'use_localisation_index': args.index,
+        'use_import_cache': False,
+        'import_cache_size': 0,
+    }
+    model, _ = parse_dialog_source(dialog_path, args.streaming, settings, log, metrics)
+
+    node_tree = new_node_tree(f"Benchmark {size}")
+    try:
+        build_node_tree(model, node_tree, {}, {}, log, metrics=metrics)
+        with metrics.phase("building model"):
+            export_model = build_dialog_model(node_tree, log)
+        with metrics.phase("writing lsx"):
+            write_dialog_model(export_model, output_path + ".lsx", log)
+        with metrics.phase("writing lsf"):
+            write_dialog_model(export_model, output_path + ".lsf", log)
+        with metrics.phase("collecting handles"):
+            handles = collect_handles(node_tree)
+        with metrics.phase("writing localisation"):
+            write_localisation_file(handles, output_path + "_localisation.xml")
+        metrics.count("nodes", len(node_tree.nodes))
+        metrics.count("links", len(node_tree.links))
+        metrics.count("handles", len(handles))
+    finally:
+        bpy.data.node_groups.remove(node_tree)
+    return metrics.finish(log)
+
+
+def run_benchmarks(args):
+    from .dialog_generator import generate_dialog
+
+    os.makedirs(args.out, exist_ok=True)
+    results = []
+    for size in args.sizes:
+        dialog_path = os.path.join(args.out, f"dialog_{size}.lsx")
+        localisation_path = os.path.join(args.out, f"localisation_{size}.xml")
+        start = time.perf_counter()
+        node_count, handle_count = generate_dialog(dialog_path, localisation_path, size, **generator_arguments(args))
+        print(f"Generated {node_count} nodes and {handle_count} handles in {time.perf_counter() - start:.2f}s")
+
+        runs = [benchmark_dialog(args, size, dialog_path, localisation_path) for _ in range(args.repeat)]
+        results.append((size, runs))
+    print_report(results, args.memory)
+    return 0
+
+
+# Function: print one row per phase and one column per size, with the best time of the repeats
+def print_report(results, memory):
+    phase_names = []
+    for _, runs in results:
+        for run in runs:
+            for phase in run["phases"]:
+                if phase["name"] not in phase_names:
+                    phase_names.append(phase["name"])
+
+    cell_width = 18 if memory else 10
+    print(f"{'phase':<24}" + "".join(f"{size:>{cell_width}}" for size, _ in results))
+    for name in phase_names + ["total"]:
+        cells = []
+        for _, runs in results:
+            if name == "total":
+                seconds = min(run["total_seconds"] for run in runs)
+                peak = None
+            else:
+                phases = [phase for run in runs for phase in run["phases"] if phase["name"] == name]
+                seconds = min(phase["seconds"] for phase in phases) if phases else 0.0
+                peaks = [phase["peak_bytes"] for phase in phases if phase["peak_bytes"] is not None]
+                peak = max(peaks) if peaks else None
+            cell = f"{seconds:.3f}s"
+            if peak is not None:
+                cell += f" {peak / (1 << 20):.1f}MB"
+            cells.append(f"{cell:>{cell_width}}")
+        print(f"{name:<24}" + "".join(cells))
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog="blender -b --python benchmark.py --",
+        description="Generate synthetic dialogs and benchmark importing and exporting them.")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+    run = subparsers.add_parser("run", help="Generate a dialog per size and time the import and export phases")
+    run.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Node counts of the dialogs")
+    run.add_argument("--out", required=True, help="Directory for the generated and exported files")
+    run.add_argument("--repeat", type=int, default=1, help="Runs per size, the report shows the best time")
+    run.add_argument("--memory", action="store_true", help="Record the memory peak of every phase (slower)")
+    run.add_argument("--metrics", default="", help="Append the metrics of every run to this JSON lines file")
+    run.add_argument("--streaming", action="store_true", help="Use the streaming parser")
+    run.add_argument("--no-index", dest="index", action="store_false",
+                     help="Stream the localisation file instead of using the persistent index")
+    generate = subparsers.add_parser("generate", help="Write one synthetic dialog and its localisation file")
+    generate.add_argument("--nodes", type=int, required=True, help="Number of dialog nodes")
+    generate.add_argument("--out", required=True, help="Path of the LSX file")
+    generate.add_argument("--loca", required=True, help="Path of the localisation XML")
+
+    for subparser in (run, generate):
+        subparser.add_argument("--seed", type=int, default=0, help="Seed, the same arguments give the same files")
+        subparser.add_argument("--branching", type=int, default=2, help="Average number of children of a node")
+        subparser.add_argument("--flags", type=int, default=2, help="Set and check flags per node")
+        subparser.add_argument("--handles", type=int, default=1, help="Texts per dialog line and roll node")
+        subparser.add_argument("--roots", type=int, default=1, help="Number of root greetings")
+        subparser.add_argument("--extra-handles", type=int, default=0,
+                               help="Unrelated entries in the localisation file, like the full game localisation")
+        subparser.add_argument("--mix", default="",
+                               help="Constructor frequencies like \"TagAnswer=40,ActiveRoll=5,Jump=6\"")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_arguments(argv)
+    if args.mode == "generate":
+        return generate_files(args)
+    return run_benchmarks(args)
+
+
+if __name__ == "__main__":
+    # Run as a script by Blender: continue in the copy of this module inside the addon package, like batch_convert
+    sys.path.insert(0, ADDON_DIR)
+    from batch_convert import load_addon
+    benchmark = importlib.import_module(load_addon().__name__ + ".benchmark")
+    sys.exit(benchmark.main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []))
@@ -0,0 +1,16 @@
+import os
+import sys
+
+CACHE_DIR_NAME = "bg3-dialogsbinary-node-editor"
+
+# Per-user cache directory for indexes and caches the addon can rebuild at any time
+def user_cache_dir():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    path = os.path.join(base, CACHE_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
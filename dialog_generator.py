@@ -0,0 +1,339 @@
+import random
+import uuid
+import xml.etree.ElementTree as ET
+from collections import deque
+from xml.sax.saxutils import escape
+
+from .lsx_writer import LSXWriter, INDENT
+from .options import skill_options, difficulty_class_options
+
+# Relative frequency of the drawn node constructors, roughly the mix of vanilla dialogs. Roots are TagGreetings
+# and RollResults are not drawn, every roll gets a success and a failure result
+DEFAULT_CONSTRUCTOR_MIX = {
+    "TagAnswer": 40,
+    "TagQuestion": 25,
+    "TagCinematic": 8,
+    "ActiveRoll": 4,
+    "PassiveRoll": 2,
+    "Jump": 6,
+    "Alias": 5,
+    "Visual State": 3,
+    "Nested Dialog": 2,
+    "Trade": 1,
+}
+DIALOG_LINE_CONSTRUCTORS = ("TagGreeting", "TagQuestion", "TagAnswer", "TagCinematic")
+ROLL_CONSTRUCTORS = ("ActiveRoll", "PassiveRoll")
+FLAG_TYPES = ("Global", "Object", "Local", "Tag", "User")
+SPEAKER_COUNT = 4
+ENGINE_VERSION = {"major": "4", "minor": "0", "revision": "9", "build": "331", "lslib_meta": "v1,bswap_guids"}
+WORDS = ("the", "a", "you", "we", "camp", "gold", "road", "night", "blade", "tadpole", "trust", "never",
+         "again", "tell", "me", "about", "what", "happened", "here", "shadow", "light", "friend", "ready")
+
+
+def generate_dialog(filepath, localisation_path, node_count, seed=0, branching=2, flags_per_node=2,
+                    handles_per_node=1, mix=None, root_count=1, extra_handles=0):
+    """
+    Write a synthetic DialogsBinary LSX file and the localisation XML with the texts of its handles.
+
+    The dialog is a tree grown breadth first from the root greetings. Every node gets 1 to 2 * branching - 1
+    children, rolls get a success and a failure RollResult, and Jumps and Aliases point to an earlier dialog
+    line. The same arguments always give the same files.
+
+    Args:
+        filepath (str): Path of the LSX file to write.
+        localisation_path (str): Path of the localisation XML to write.
+        node_count (int): Number of dialog nodes.
+        seed (int): Seed of the random generator.
+        branching (int): Average number of children of a node.
+        flags_per_node (int): Set and check flags of every node, split between the two.
+        handles_per_node (int): TaggedTexts of every dialog line and roll node.
+        mix (dict): Constructor -> relative frequency, DEFAULT_CONSTRUCTOR_MIX when None.
+        root_count (int): Number of root greetings.
+        extra_handles (int): Unrelated entries added to the localisation file, to look handles up in a
+            file of realistic size.
+
+    Returns:
+        tuple: (number of nodes, number of handles of the dialog).
+    """
+    rng = random.Random(seed)
+    nodes = plan_dialog_nodes(rng, node_count, max(1, branching), mix or DEFAULT_CONSTRUCTOR_MIX, root_count)
+
+    handles = []
+    with open(filepath, "w", encoding="utf-8") as target:
+        writer = LSXWriter(target.write)
+        writer.declaration()
+        writer.start("save")
+        writer.element(ET.Element("version", ENGINE_VERSION))
+        writer.start("region", {"id": "dialog"})
+        writer.start("node", {"id": "dialog"})
+        writer.element(ET.Element("attribute", {"id": "category", "type": "LSString", "value": "Generic NPC Dialog"}))
+        writer.element(ET.Element("attribute", {"id": "UUID", "type": "FixedString", "value": new_uuid(rng)}))
+        writer.element(ET.Element("attribute", {"id": "TimelineId", "type": "FixedString", "value": ""}))
+        writer.start("children")
+        writer.element(default_addressed_speakers_element())
+        writer.element(speaker_list_element(rng))
+        writer.start("node", {"id": "nodes"})
+        writer.start("children")
+        for node in nodes:
+            writer.element(dialog_node_element(rng, node, flags_per_node, handles_per_node, handles))
+        for node in nodes:
+            if node.root:
+                root_nodes = ET.Element("node", {"id": "RootNodes", "key": "RootNodes"})
+                ET.SubElement(root_nodes, "attribute", {"id": "RootNodes", "type": "FixedString", "value": node.uuid})
+                writer.element(root_nodes)
+        writer.end()  # children of nodes
+        writer.end()  # nodes
+        writer.end()  # children of dialog
+        writer.end()  # dialog
+        writer.end()  # region
+        writer.end()  # save
+
+    write_localisation(rng, localisation_path, handles, extra_handles)
+    return len(nodes), len(handles)
+
+
+class PlannedNode:
+    """Constructor, UUID and links of a node, decided before any XML is written."""
+
+    __slots__ = ("constructor", "uuid", "children", "capacity", "root", "target", "success")
+
+    def __init__(self, constructor, node_uuid, capacity=0, root=False):
+        self.constructor = constructor
+        self.uuid = node_uuid
+        self.children = []
+        # Children this node takes while the tree grows
+        self.capacity = capacity
+        self.root = root
+        # Jump target or Alias source node, an earlier dialog line
+        self.target = ""
+        self.success = False
+
+
+def new_uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def plan_dialog_nodes(rng, node_count, branching, mix, root_count):
+    """
+    Lay out the nodes of a synthetic dialog.
+
+    Args:
+        rng (random.Random): Random generator.
+        node_count (int): Number of nodes.
+        branching (int): Average number of children of a node.
+        mix (dict): Constructor -> relative frequency.
+        root_count (int): Number of root greetings.
+
+    Returns:
+        list: The PlannedNodes in document order.
+    """
+    constructors = list(mix)
+    weights = [mix[constructor] for constructor in constructors]
+    nodes = []
+    dialog_lines = []
+    # Nodes still taking children, the oldest first
+    open_parents = deque()
+
+    def add_node(constructor, parent, root=False):
+        takes_children = constructor not in ("Jump",) + ROLL_CONSTRUCTORS
+        node = PlannedNode(constructor, new_uuid(rng), rng.randint(1, 2 * branching - 1) if takes_children else 0,
+                           root)
+        if constructor in ("Jump", "Alias") and dialog_lines:
+            node.target = rng.choice(dialog_lines).uuid
+        if parent is not None:
+            parent.children.append(node.uuid)
+        nodes.append(node)
+        if constructor in DIALOG_LINE_CONSTRUCTORS:
+            dialog_lines.append(node)
+        if takes_children:
+            open_parents.append(node)
+        return node
+
+    while len(nodes) < node_count:
+        if len(nodes) < root_count or not open_parents:
+            # Start another branch from a new root when every node is full, like a dialog with several greetings
+            add_node("TagGreeting", None, root=True)
+            continue
+        parent = open_parents[0]
+        node = add_node(rng.choices(constructors, weights)[0], parent)
+        if len(parent.children) >= parent.capacity:
+            open_parents.popleft()
+        if node.constructor in ROLL_CONSTRUCTORS:
+            for success in (True, False):
+                if len(nodes) < node_count:
+                    add_node("RollResult", node).success = success
+    return nodes
+
+
+def attribute(parent, attribute_id, attribute_type, value):
+    ET.SubElement(parent, "attribute", {"id": attribute_id, "type": attribute_type, "value": str(value)})
+
+
+def default_addressed_speakers_element():
+    section = ET.Element("node", {"id": "DefaultAddressedSpeakers"})
+    children = ET.SubElement(section, "children")
+    for index in range(SPEAKER_COUNT):
+        speaker = ET.SubElement(children, "node", {"id": "Object", "key": "MapKey"})
+        attribute(speaker, "MapKey", "int32", index)
+        attribute(speaker, "MapValue", "int32", (index + 1) % SPEAKER_COUNT)
+    return section
+
+
+def speaker_list_element(rng):
+    section = ET.Element("node", {"id": "speakerlist"})
+    children = ET.SubElement(section, "children")
+    for index in range(SPEAKER_COUNT):
+        speaker = ET.SubElement(children, "node", {"id": "speaker", "key": "index"})
+        attribute(speaker, "index", "FixedString", index)
+        attribute(speaker, "list", "LSString", new_uuid(rng))
+        attribute(speaker, "SpeakerMappingId", "guid", new_uuid(rng))
+    return section
+
+
+def dialog_node_element(rng, node, flags_per_node, handles_per_node, handles):
+    """
+    Build the <node id="node"> element of a planned node, appending the handles of its TaggedTexts to handles.
+    """
+    element = ET.Element("node", {"id": "node", "key": "UUID"})
+    constructor = node.constructor
+    attribute(element, "constructor", "FixedString", constructor)
+    attribute(element, "UUID", "FixedString", node.uuid)
+    leaf = not node.children
+    if constructor == "Jump":
+        attribute(element, "jumptarget", "FixedString", node.target or node.uuid)
+        attribute(element, "jumptargetpoint", "uint8", rng.randint(1, 2))
+    elif constructor in DIALOG_LINE_CONSTRUCTORS:
+        if node.root:
+            attribute(element, "Root", "bool", "True")
+        attribute(element, "speaker", "int32", rng.randrange(SPEAKER_COUNT))
+        if rng.random() < 0.2:
+            attribute(element, "ShowOnce", "bool", "True")
+        if leaf:
+            attribute(element, "endnode", "bool", "True")
+        attribute(element, "ApprovalRatingID", "guid", new_uuid(rng))
+    elif constructor in ROLL_CONSTRUCTORS:
+        attribute(element, "transitionmode", "uint8", 2)
+        attribute(element, "speaker", "int32", rng.randrange(SPEAKER_COUNT))
+        attribute(element, "RollTargetSpeaker", "int32", rng.randrange(SPEAKER_COUNT))
+        attribute(element, "RollType", "string", "SkillCheck" if constructor == "ActiveRoll" else "RawAbility")
+        attribute(element, "Ability", "string", "Charisma")
+        attribute(element, "Skill", "string", rng.choice(skill_options)[0])
+        attribute(element, "Advantage", "uint8", rng.randint(0, 2))
+        attribute(element, "ExcludeCompanionsOptionalBonuses", "bool", "False")
+        attribute(element, "ExcludeSpeakerOptionalBonuses", "bool", "False")
+        attribute(element, "DifficultyClassID", "guid", rng.choice(difficulty_class_options)[0])
+        attribute(element, "ApprovalRatingID", "guid", new_uuid(rng))
+    elif constructor == "RollResult":
+        attribute(element, "Success", "bool", "True" if node.success else "False")
+    elif constructor == "Alias":
+        attribute(element, "speaker", "int32", rng.randrange(SPEAKER_COUNT))
+        attribute(element, "SourceNode", "FixedString", node.target)
+        if leaf:
+            attribute(element, "endnode", "bool", "True")
+    elif constructor == "Visual State":
+        attribute(element, "GroupID", "FixedString", new_uuid(rng))
+        attribute(element, "GroupIndex", "int32", 0)
+    elif constructor == "Nested Dialog":
+        attribute(element, "NestedDialogNodeUUID", "guid", new_uuid(rng))
+        if leaf:
+            attribute(element, "endnode", "bool", "True")
+    elif constructor == "Trade":
+        attribute(element, "speaker", "int32", rng.randrange(SPEAKER_COUNT))
+        attribute(element, "TradeMode", "uint8", rng.randint(1, 3))
+
+    sections = ET.SubElement(element, "children")
+    if node.children:
+        children = ET.SubElement(ET.SubElement(sections, "node", {"id": "children"}), "children")
+        for child_uuid in node.children:
+            attribute(ET.SubElement(children, "node", {"id": "child"}), "UUID", "FixedString", child_uuid)
+    else:
+        ET.SubElement(sections, "node", {"id": "children"})
+    if constructor == "Jump":
+        # Jumps carry empty sections only
+        for section_id in ("Tags", "setflags", "checkflags"):
+            ET.SubElement(sections, "node", {"id": section_id})
+        return element
+
+    game_data = ET.SubElement(ET.SubElement(sections, "node", {"id": "GameData"}), "children")
+    ET.SubElement(game_data, "node", {"id": "AiPersonalities", "key": "AiPersonality"})
+    ET.SubElement(game_data, "node", {"id": "MusicInstrumentSounds"})
+    ET.SubElement(game_data, "node", {"id": "OriginSound"})
+    ET.SubElement(sections, "node", {"id": "Tags"})
+    add_flags(rng, sections, "setflags", (flags_per_node + 1) // 2)
+    add_flags(rng, sections, "checkflags", flags_per_node // 2)
+    if constructor == "Nested Dialog":
+        speaker_linking = ET.SubElement(sections, "node", {"id": "SpeakerLinking"})
+        for key in range(2):
+            entry = ET.SubElement(speaker_linking, "node", {"id": "SpeakerLinkingEntry"})
+            attribute(entry, "Key", "int32", key)
+            attribute(entry, "Value", "int32", rng.randrange(SPEAKER_COUNT))
+    if constructor in DIALOG_LINE_CONSTRUCTORS or constructor in ROLL_CONSTRUCTORS:
+        add_tagged_texts(rng, sections, handles_per_node, handles)
+        if constructor == "TagCinematic":
+            editor_data = ET.SubElement(ET.SubElement(sections, "node", {"id": "editorData"}), "children")
+            data = ET.SubElement(editor_data, "node", {"id": "data", "key": "key"})
+            attribute(data, "key", "FixedString", "CinematicNodeContext")
+            attribute(data, "val", "LSString", " ".join(rng.choices(WORDS, k=4)))
+    validated_flags = ET.SubElement(sections, "node", {"id": "ValidatedFlags"})
+    attribute(validated_flags, "ValidatedHasValue", "bool", "False")
+    return element
+
+
+def add_flags(rng, sections, section_id, count):
+    section = ET.SubElement(sections, "node", {"id": section_id})
+    if not count:
+        return
+    groups = ET.SubElement(section, "children")
+    for _ in range(count):
+        flaggroup = ET.SubElement(groups, "node", {"id": "flaggroup", "key": "type"})
+        flag_type = rng.choice(FLAG_TYPES)
+        attribute(flaggroup, "type", "FixedString", flag_type)
+        flag = ET.SubElement(ET.SubElement(flaggroup, "children"), "node", {"id": "flag"})
+        attribute(flag, "UUID", "FixedString", new_uuid(rng))
+        attribute(flag, "value", "bool", rng.choice(("True", "False")))
+        if section_id == "checkflags" or flag_type != "Global":
+            attribute(flag, "paramval", "int32", rng.randint(0, 3))
+
+
+def add_tagged_texts(rng, sections, count, handles):
+    tagged_texts = ET.SubElement(ET.SubElement(sections, "node", {"id": "TaggedTexts"}), "children")
+    for _ in range(count):
+        handle = "h" + new_uuid(rng).replace("-", "g")
+        handles.append(handle)
+        tagged_text = ET.SubElement(tagged_texts, "node", {"id": "TaggedText"})
+        attribute(tagged_text, "HasTagRule", "bool", "False")
+        tagged_text_children = ET.SubElement(tagged_text, "children")
+        rule_group = ET.SubElement(tagged_text_children, "node", {"id": "RuleGroup"})
+        attribute(rule_group, "TagCombineOp", "uint8", 0)
+        ET.SubElement(ET.SubElement(rule_group, "children"), "node", {"id": "Rules"})
+        tag_texts = ET.SubElement(ET.SubElement(tagged_text_children, "node", {"id": "TagTexts"}), "children")
+        tag_text = ET.SubElement(tag_texts, "node", {"id": "TagText"})
+        ET.SubElement(tag_text, "attribute", {"id": "TagText", "type": "TranslatedString", "handle": handle,
+                                              "version": "1"})
+        attribute(tag_text, "LineId", "guid", new_uuid(rng))
+        attribute(tag_text, "stub", "bool", "True")
+
+
+def write_localisation(rng, filepath, handles, extra_handles=0):
+    """
+    Write a localisation XML with a text for every handle and extra_handles unrelated entries.
+
+    Args:
+        rng (random.Random): Random generator.
+        filepath (str): Path of the XML file to write.
+        handles (list): Handles of the dialog.
+        extra_handles (int): Entries for handles the dialog does not use, spread between the dialog handles.
+    """
+    with open(filepath, "w", encoding="utf-8") as target:
+        target.write("<?xml version=\"1.0\" encoding=\"utf-8\"?>\n<contentList>\n")
+        remaining = list(handles)
+        extra = extra_handles
+        while remaining or extra:
+            if extra and rng.random() < extra / (extra + len(remaining)):
+                handle = "h" + new_uuid(rng).replace("-", "g")
+                extra -= 1
+            else:
+                handle = remaining.pop()
+            text = " ".join(rng.choices(WORDS, k=rng.randint(3, 16))).capitalize() + "."
+            target.write(f"{INDENT}<content contentuid=\"{handle}\" version=\"1\">{escape(text)}</content>\n")
+        target.write("</contentList>\n")
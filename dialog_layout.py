@@ -0,0 +1,208 @@
+# Layered layout for dialog node trees. Columns run left to right from the RootNodes, nodes in a column are
+# ordered to reduce link crossings and stacked using their heights. Nothing in here depends on Blender.
+from collections import defaultdict
+
+COLUMN_GAP = 120
+ROW_GAP = 40
+# Barycenter passes, alternating left-to-right and right-to-left
+ORDERING_SWEEPS = 4
+
+# Height estimate for nodes that have not been drawn yet (node.dimensions is zero until then)
+ROW_HEIGHT = 22
+HEADER_HEIGHT = 60
+BASE_ROWS = {
+    'DialogueLineNode': 13,
+    'DialogueRollNode': 20,
+    'DialogueJumpNode': 3,
+    'DialogueRollResultNode': 6,
+    'DialogueAliasNode': 12,
+    'DialogueVisualStateNode': 10,
+    'NestedDialogNode': 12,
+    'TradeNode': 9,
+}
+ROWS_PER_HANDLE = 8
+
+
+#Function: height of a node in editor units, measured when it has been drawn, estimated from its content otherwise
+def estimate_node_height(node):
+    dimensions = getattr(node, 'dimensions', None)
+    if dimensions is not None and dimensions[1] > 0:
+        return dimensions[1]
+    rows = BASE_ROWS.get(getattr(node, 'bl_idname', ''), 6)
+    rows += ROWS_PER_HANDLE * len(getattr(node, 'handles_texts', ()))
+    rows += len(getattr(node, 'SetFlags', ())) + len(getattr(node, 'CheckFlags', ()))
+    rows += len(getattr(node, 'SpeakerLinkingEntry', ()))
+    return HEADER_HEIGHT + rows * ROW_HEIGHT
+
+
+#Function: place the nodes of an imported dialog, node_map is UUID -> node and parent_child_map UUID -> child UUIDs
+def arrange_nodes(node_map, parent_child_map, root_uuids, jump_uuids):
+    sizes = {uuid: (node.width, estimate_node_height(node)) for uuid, node in node_map.items()}
+    positions = layered_layout(list(node_map), parent_child_map, root_uuids, jump_uuids, sizes)
+    for uuid, location in positions.items():
+        node_map[uuid].location = location
+    return positions
+
+
+def layered_layout(node_ids, parent_child_map, root_ids, jump_ids, sizes):
+    """
+    Compute a layered left-to-right layout.
+
+    Links leaving Jump nodes and any other link that closes a cycle are treated as back-edges and ignored
+    for layering. Every other node is placed one column after its furthest parent, with the RootNodes in
+    column 0. Within a column the nodes are ordered by the barycenter of their neighbours and stacked
+    using their heights. Runs in O((V + E) log V).
+
+    Args:
+        node_ids (list): Node ids in document order.
+        parent_child_map (dict): id -> child ids.
+        root_ids (iterable): ids of the RootNodes.
+        jump_ids (set): ids of Jump nodes.
+        sizes (dict): id -> (width, height).
+
+    Returns:
+        dict: id -> (x, y) location of the top left corner.
+    """
+    known = set(node_ids)
+    children = {node_id: [] for node_id in node_ids}
+    for parent_id, child_ids in parent_child_map.items():
+        if parent_id not in known or parent_id in jump_ids:
+            continue
+        seen = set()
+        for child_id in child_ids:
+            if child_id in known and child_id != parent_id and child_id not in seen:
+                seen.add(child_id)
+                children[parent_id].append(child_id)
+
+    roots = [node_id for node_id in dict.fromkeys(root_ids) if node_id in known]
+    remove_back_edges(node_ids, children, roots)
+    layers = assign_layers(node_ids, children, roots)
+    columns = order_columns(node_ids, children, layers)
+    return assign_coordinates(columns, sizes)
+
+
+#Function: drop the links that close a cycle, found with an iterative depth first search from the roots
+def remove_back_edges(node_ids, children, roots):
+    state = {}  # 1 = on the current path, 2 = finished
+    for start in roots + node_ids:
+        if start in state:
+            continue
+        state[start] = 1
+        stack = [(start, iter(list(children[start])))]
+        while stack:
+            node_id, child_iter = stack[-1]
+            for child_id in child_iter:
+                child_state = state.get(child_id)
+                if child_state is None:
+                    state[child_id] = 1
+                    stack.append((child_id, iter(list(children[child_id]))))
+                    break
+                if child_state == 1:
+                    children[node_id].remove(child_id)
+            else:
+                state[node_id] = 2
+                stack.pop()
+
+
+#Function: longest path layering in topological order, roots and nodes without parents start in column 0
+def assign_layers(node_ids, children, roots):
+    indegree = dict.fromkeys(node_ids, 0)
+    for child_ids in children.values():
+        for child_id in child_ids:
+            indegree[child_id] += 1
+
+    layers = dict.fromkeys(node_ids, 0)
+    root_set = set(roots)
+    queue = [node_id for node_id in roots if indegree[node_id] == 0]
+    queue += [node_id for node_id in node_ids if indegree[node_id] == 0 and node_id not in root_set]
+    for node_id in queue:  # the queue grows while it is walked
+        for child_id in children[node_id]:
+            if layers[child_id] < layers[node_id] + 1:
+                layers[child_id] = layers[node_id] + 1
+            indegree[child_id] -= 1
+            if indegree[child_id] == 0:
+                queue.append(child_id)
+    return layers
+
+
+#Function: group the nodes into columns and order every column by the barycenter of its neighbours
+def order_columns(node_ids, children, layers):
+    parents = defaultdict(list)
+    for parent_id, child_ids in children.items():
+        for child_id in child_ids:
+            parents[child_id].append(parent_id)
+
+    columns = defaultdict(list)
+    for node_id in node_ids:
+        columns[layers[node_id]].append(node_id)
+    columns = [columns[layer] for layer in sorted(columns)]
+
+    position = {}
+    for column in columns:
+        for index, node_id in enumerate(column):
+            position[node_id] = index
+
+    for sweep in range(ORDERING_SWEEPS):
+        if sweep % 2 == 0:
+            sweep_columns, neighbours = columns[1:], parents
+        else:
+            sweep_columns, neighbours = reversed(columns[:-1]), children
+        for column in sweep_columns:
+            barycenters = {}
+            for node_id in column:
+                linked = neighbours[node_id]
+                if linked:
+                    barycenters[node_id] = sum(position[other] for other in linked) / len(linked)
+                else:
+                    barycenters[node_id] = position[node_id]
+            column.sort(key=lambda node_id: (barycenters[node_id], position[node_id]))
+            for index, node_id in enumerate(column):
+                position[node_id] = index
+    return columns
+
+
+#Function: turn the ordered columns into locations, column widths and row heights come from the node sizes
+def assign_coordinates(columns, sizes):
+    positions = {}
+    x = 0.0
+    for column in columns:
+        y = 0.0
+        column_width = 0.0
+        for node_id in column:
+            width, height = sizes[node_id]
+            positions[node_id] = (x, y)
+            y -= height + ROW_GAP
+            column_width = max(column_width, width)
+        x += column_width + COLUMN_GAP
+    return positions
+
+
+#Function: place nodes added to an arranged tree one column right of their first placed parent, siblings stacked
+# below each other. Nodes without a placed parent go below the tree
+def place_new_nodes(new_uuids, node_map, parent_child_map):
+    unplaced = set(new_uuids)
+    if not unplaced:
+        return
+    next_y = {}
+    queue = [uuid for uuid in parent_child_map if uuid in node_map and uuid not in unplaced]
+    for parent_uuid in queue:  # the queue grows while it is walked
+        parent = node_map[parent_uuid]
+        for child_uuid in parent_child_map.get(parent_uuid, ()):
+            if child_uuid not in unplaced or child_uuid not in node_map:
+                continue
+            unplaced.discard(child_uuid)
+            child = node_map[child_uuid]
+            y = next_y.get(parent_uuid, parent.location[1])
+            child.location = (parent.location[0] + parent.width + COLUMN_GAP, y)
+            next_y[parent_uuid] = y - estimate_node_height(child) - ROW_GAP
+            queue.append(child_uuid)
+
+    orphans = [uuid for uuid in new_uuids if uuid in unplaced and uuid in node_map]
+    if not orphans:
+        return
+    placed = [node for uuid, node in node_map.items() if uuid not in unplaced]
+    y = min((node.location[1] - estimate_node_height(node) for node in placed), default=0.0) - ROW_GAP
+    for uuid in orphans:
+        node = node_map[uuid]
+        node.location = (0.0, y)
+        y -= estimate_node_height(node) + ROW_GAP
@@ -0,0 +1,80 @@
+import collections
+
+# Log levels, matching the log_level addon preference
+OFF = 0
+SUMMARY = 1
+DEBUG = 2
+LOG_LEVELS = {'OFF': OFF, 'SUMMARY': SUMMARY, 'DEBUG': DEBUG}
+
+# Entries kept per operation; the oldest are dropped first once the cap is reached
+MAX_ENTRIES = 50000
+
+# Argument types stored as they are; anything else is converted with str() when the entry is added
+PRIMITIVE_TYPES = (str, int, float, bool, type(None))
+
+
+class DialogLog:
+    """
+    Levelled log shared by the import and export operators.
+
+    Messages use %-style placeholders and are only formatted when the log is written, so a disabled level
+    costs one comparison per call. Entries live in a bounded ring buffer so huge dialogs cannot grow
+    the log without limit.
+    """
+
+    def __init__(self, level=SUMMARY, max_entries=MAX_ENTRIES):
+        self.level = level
+        self.entries = collections.deque(maxlen=max_entries)
+        self.dropped = 0
+
+    @property
+    def debug_enabled(self):
+        return self.level >= DEBUG
+
+    def summary(self, message, *args):
+        if self.level >= SUMMARY:
+            self.add(message, args)
+
+    def debug(self, message, *args):
+        if self.level >= DEBUG:
+            self.add(message, args)
+
+    def add(self, message, args):
+        if len(self.entries) == self.entries.maxlen:
+            self.dropped += 1
+        # Exceptions and Blender objects would keep tracebacks or freed data alive in the buffer
+        args = tuple(arg if isinstance(arg, PRIMITIVE_TYPES) else str(arg) for arg in args)
+        self.entries.append((message, args))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lines(self):
+        if self.dropped:
+            yield f"... {self.dropped} earlier entries dropped (log is capped at {self.entries.maxlen} entries)"
+        for message, args in self.entries:
+            yield message % args if args else message
+
+    def write(self, path):
+        """
+        Write the formatted entries to a text file.
+
+        Args:
+            path (str): Destination of the log file.
+
+        Returns:
+            bool: True if a file was written, False if logging is off or nothing was logged.
+        """
+        if self.level == OFF or not self.entries:
+            return False
+        with open(path, "w", encoding="utf-8") as log_file:
+            for line in self.lines():
+                log_file.write(line)
+                log_file.write("\n")
+        return True
+
+
+# Function: Create a log with the level set in the addon preferences
+def create_log(context):
+    prefs = context.preferences.addons["BG3-DialogsBinary-Node-Editor-main"].preferences
+    return DialogLog(LOG_LEVELS.get(getattr(prefs, "log_level", 'SUMMARY'), SUMMARY))
@@ -0,0 +1,241 @@
+# Blender independent model of a dialog. The importer parses XML into a DialogModel and materialises it
+# as a DialogueNodeTree, the exporter captures the node tree as a DialogModel and writes it out.
+# Record fields use the same names as the properties of the matching Blender nodes and property groups.
+import hashlib
+
+
+class Record:
+    # (field name, default) pairs. A default of list creates a new empty list per record
+    FIELDS = ()
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name, default in self.FIELDS:
+            if name in values:
+                setattr(self, name, values[name])
+            else:
+                setattr(self, name, default() if default is list else default)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name, _ in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+    # Field values as a tuple, list fields become tuples of the item values. Used to compare records
+    def values(self):
+        return tuple(tuple(item.values() for item in getattr(self, name)) if default is list else getattr(self, name)
+                     for name, default in self.FIELDS)
+
+    # Inverse of values(): create a record from a field value tuple
+    @classmethod
+    def from_values(cls, values):
+        record = cls()
+        for (name, default), value in zip(cls.FIELDS, values):
+            if default is list:
+                item_type = cls.ITEM_TYPES[name]
+                value = [item_type.from_values(item) for item in value]
+            setattr(record, name, value)
+        return record
+
+    # Copy the fields from any object with matching attributes (a Blender node or property group)
+    @classmethod
+    def from_object(cls, source):
+        record = cls()
+        for name, default in cls.FIELDS:
+            if default is list:
+                item_type = cls.ITEM_TYPES[name]
+                setattr(record, name, [item_type.from_object(item) for item in getattr(source, name)])
+            else:
+                setattr(record, name, getattr(source, name))
+        return record
+
+
+# ###### TABLE RECORDS ######
+class FlagRecord(Record):
+    FIELDS = (('name', ""), ('is_true', False), ('flag_type', "Global"), ('has_paramval', False), ('paramval', 0))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class TaggedTextRecord(Record):
+    FIELDS = (('handle', ""), ('version', 1), ('text', ""), ('has_tag_rule', True), ('stub', True), ('lineid', ""))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class SpeakerLinkingRecord(Record):
+    FIELDS = (('key', 0), ('value', 0))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class AddressedSpeakerRecord(Record):
+    FIELDS = (('MapKey', 0), ('MapValue', -1))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class SpeakerRecord(Record):
+    FIELDS = (('index', ""), ('list', ""), ('SpeakerMappingId', ""))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# ###### NODE RECORDS ######
+# bl_idname is the Blender node type the record materialises as, width is set on the node when not None.
+# children holds the child UUIDs in document order and is not a node property.
+class NodeRecord(Record):
+    bl_idname = ""
+    width = None
+    ITEM_TYPES = {
+        'SetFlags': FlagRecord,
+        'CheckFlags': FlagRecord,
+        'handles_texts': TaggedTextRecord,
+        'SpeakerLinkingEntry': SpeakerLinkingRecord,
+    }
+    __slots__ = ('children',)
+
+    def __init__(self, **values):
+        self.children = values.pop('children', None) or []
+        super().__init__(**values)
+
+    # Content hash of the fields and the child UUIDs, the record's own children unless others are given
+    def digest(self, children=None):
+        content = repr((self.values(), self.children if children is None else children))
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+FLAG_FIELDS = (('SetFlags', list), ('CheckFlags', list))
+
+
+class JumpRecord(NodeRecord):
+    bl_idname = "DialogueJumpNode"
+    FIELDS = (('uuid', ""), ('jumptarget', ""), ('jumptargetpoint', 1))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class DialogueLineRecord(NodeRecord):
+    bl_idname = "DialogueLineNode"
+    width = 400
+    FIELDS = (
+        ('constructor', "TagGreeting"), ('uuid', ""), ('ShowOnce', False), ('groupid', ""), ('groupindex', 0),
+        ('root', False), ('endnode', False), ('speaker', 0), ('approvalratingid', ""),
+        ('cinematic_node_context', ""), ('handles_texts', list),
+    ) + FLAG_FIELDS
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class RollRecord(NodeRecord):
+    bl_idname = "DialogueRollNode"
+    FIELDS = (
+        ('constructor', "ActiveRoll"), ('uuid', ""), ('ShowOnce', False), ('transitionmode', 0), ('speaker', 0),
+        ('approvalratingid', ""), ('RollType', "SkillCheck"), ('Ability', "Wisdom"), ('Skill', "None"),
+        ('RollTargetSpeaker', 0), ('Advantage', 0), ('ExcludeCompanionsOptionalBonuses', False),
+        ('ExcludeSpeakerOptionalBonuses', False), ('DifficultyClassID', "31e92da6-bac9-46f7-af99-5f33d98fd4f0"),
+        ('handles_texts', list),
+    ) + FLAG_FIELDS
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class RollResultRecord(NodeRecord):
+    bl_idname = "DialogueRollResultNode"
+    FIELDS = (('constructor', "RollResult"), ('uuid', ""), ('Success', False)) + FLAG_FIELDS
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class AliasRecord(NodeRecord):
+    bl_idname = "DialogueAliasNode"
+    width = 400
+    FIELDS = (
+        ('constructor', "Alias"), ('uuid', ""), ('Greeting', False), ('root', False), ('endnode', False),
+        ('speaker', 0), ('sourcenode', ""),
+    ) + FLAG_FIELDS
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class VisualStateRecord(NodeRecord):
+    bl_idname = "DialogueVisualStateNode"
+    width = 400
+    FIELDS = (
+        ('constructor', "Visual State"), ('uuid', ""), ('groupid', ""), ('groupindex', 0),
+        ('cinematic_node_context', ""),
+    ) + FLAG_FIELDS
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class NestedDialogRecord(NodeRecord):
+    bl_idname = "NestedDialogNode"
+    width = 400
+    FIELDS = (
+        ('constructor', "Nested Dialog"), ('uuid', ""), ('root', False), ('endnode', False),
+        ('NestedDialogNodeUUID', ""), ('cinematic_node_context', ""), ('SpeakerLinkingEntry', list),
+    ) + FLAG_FIELDS
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class TradeRecord(NodeRecord):
+    bl_idname = "TradeNode"
+    width = 400
+    FIELDS = (('constructor', "Trade"), ('uuid', ""), ('speaker', 0), ('trademode', 1)) + FLAG_FIELDS
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# Blender node type -> record type
+NODE_RECORD_TYPES = {record_type.bl_idname: record_type for record_type in (
+    JumpRecord, DialogueLineRecord, RollRecord, RollResultRecord, AliasRecord, VisualStateRecord,
+    NestedDialogRecord, TradeRecord,
+)}
+
+
+class RecordCache:
+    """
+    Node records of one node tree, kept between exports and reused while their node has the same version.
+
+    Keys identify a node while it exists and versions change with every edit of the node, so a node is only
+    read again after it changed. The caller sets the children, they come from the links and not from the node.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.used = {}
+
+    def record(self, key, version, record_type, source):
+        """
+        Get the record of a node, reading it with record_type.from_object only if its version changed.
+
+        Args:
+            key: Identity of the node, like its pointer.
+            version (int): Version of the node.
+            record_type (type): NodeRecord subclass of the node.
+            source: The node.
+
+        Returns:
+            NodeRecord: The record, the same object as last time if the node did not change.
+        """
+        previous = self.records.get(key)
+        if previous is not None and previous[0] == version and type(previous[1]) is record_type:
+            record = previous[1]
+        else:
+            record = record_type.from_object(source)
+        self.used[key] = (version, record)
+        return record
+
+    def finish(self):
+        """Keep the records asked for since the last call, the others belong to deleted nodes."""
+        self.records = self.used
+        self.used = {}
+
+
+class DialogModel:
+    """
+    A whole dialog: the global attributes, the speaker tables, the node records in document order, the
+    UUIDs listed in RootNodes and the ValidatedFlags table (node UUID -> ValidatedHasValue).
+
+    Global attributes are None when the source did not define them.
+    """
+    __slots__ = ('category', 'UUID', 'TimelineId', 'DefaultAddressedSpeakers', 'Speakers', 'nodes',
+                 'RootNodes', 'validated_flags')
+
+    def __init__(self):
+        self.category = None
+        self.UUID = None
+        self.TimelineId = None
+        self.DefaultAddressedSpeakers = []
+        self.Speakers = []
+        self.nodes = []
+        self.RootNodes = []
+        self.validated_flags = {}
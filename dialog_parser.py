@@ -0,0 +1,543 @@
+import xml.etree.ElementTree as ET
+
+from .dialog_model import (DialogModel, AddressedSpeakerRecord, SpeakerRecord, FlagRecord, TaggedTextRecord,
+                           SpeakerLinkingRecord, JumpRecord, DialogueLineRecord, RollRecord, RollResultRecord,
+                           AliasRecord, VisualStateRecord, NestedDialogRecord, TradeRecord)
+from .xml_attr_utils import (get_attribute_map, get_boolean_attribute, get_int_attribute, get_string_attribute)
+from .options import skill_options, difficulty_class_options
+from .lsf_reader import is_lsf_file, read_lsf
+
+# Parse dialog XML into a DialogModel. Nothing in here depends on Blender.
+
+class ParseCancelled(Exception):
+    pass
+
+# Function: stop a parse once its cancel_event (a threading.Event set by another thread, may be None) is set
+def check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise ParseCancelled("Dialog import cancelled")
+
+#Function: parse a whole dialog document that has already been loaded with ElementTree
+def parse_dialog_model(root, localisation_data, log, cancel_event=None):
+    model = DialogModel()
+
+    # Extract global attributes
+    dialog_elem = root.find(".//node[@id='dialog']")
+    if dialog_elem is not None:
+        parse_global_attributes(model, dialog_elem)
+
+    # Parse Default Addressed Speakers and speakerlist
+    for speakers_elem in root.findall(".//node[@id='DefaultAddressedSpeakers']"):
+        parse_default_addressed_speakers(model, speakers_elem)
+    for speakers_elem in root.findall(".//node[@id='speakerlist']"):
+        parse_speakerlist(model, speakers_elem)
+
+    parse_dialog_nodes(root, model, localisation_data, log, cancel_event)
+    return model
+
+# Function: Load a dialog file as an element tree. LSF (DialogsBinary) files are converted to the LSX layout
+def load_dialog_document(filepath):
+    if is_lsf_file(filepath):
+        return read_lsf(filepath)
+    return ET.parse(filepath).getroot()
+
+#Function: parse a dialog document with iterparse, releasing every XML node as soon as its record is built
+def parse_dialog_model_streamed(filepath, localisation_data, log, cancel_event=None):
+    model = DialogModel()
+    for section, elem in iter_dialog_sections(filepath):
+        check_cancelled(cancel_event)
+        if section == 'node':
+            parse_dialog_node(elem, model, localisation_data, log)
+        elif section == 'dialog':
+            parse_global_attributes(model, elem)
+        elif section == 'DefaultAddressedSpeakers':
+            parse_default_addressed_speakers(model, elem)
+        elif section == 'speakerlist':
+            parse_speakerlist(model, elem)
+        elif section == 'RootNodes':
+            parse_root_nodes(model, elem)
+    return model
+
+# Function: Collect the handles of all TagText attributes of a dialog, from a parsed root element or a file path.
+# File paths are scanned with iterparse so the streaming import never holds the whole dialog.
+def collect_tagtext_handles(source, cancel_event=None):
+    handles = set()
+    if isinstance(source, str):
+        for _, elem in ET.iterparse(source, events=('end',)):
+            if elem.tag == 'attribute':
+                if elem.attrib.get('id') == 'TagText' and elem.attrib.get('handle'):
+                    handles.add(elem.attrib['handle'])
+            elif elem.tag == 'node':
+                elem.clear()
+                check_cancelled(cancel_event)
+    else:
+        for attribute in source.iter('attribute'):
+            if attribute.attrib.get('id') == 'TagText' and attribute.attrib.get('handle'):
+                handles.add(attribute.attrib['handle'])
+    return handles
+
+# Function: Read the global attributes of the <node id="dialog"> element
+def parse_global_attributes(model, dialog_elem):
+    attributes = get_attribute_map(dialog_elem)
+    model.category = get_string_attribute(attributes, 'category')
+    model.UUID = get_string_attribute(attributes, 'UUID')
+    model.TimelineId = get_string_attribute(attributes, 'TimelineId')
+
+# Function: Parse a <node id="DefaultAddressedSpeakers"> element
+def parse_default_addressed_speakers(model, speakers_elem):
+    for speaker in speakers_elem.findall("./children/node[@id='Object']"):
+        attributes = get_attribute_map(speaker)
+        model.DefaultAddressedSpeakers.append(AddressedSpeakerRecord(
+            MapKey=get_int_attribute(attributes, 'MapKey', default=0),
+            MapValue=get_int_attribute(attributes, 'MapValue', default=-1),
+        ))
+
+# Function: Parse a <node id="speakerlist"> element
+def parse_speakerlist(model, speakers_elem):
+    for speaker in speakers_elem.findall("./children/node[@id='speaker']"):
+        attributes = get_attribute_map(speaker)
+        model.Speakers.append(SpeakerRecord(
+            index=get_string_attribute(attributes, 'index'),
+            list=get_string_attribute(attributes, 'list'),
+            SpeakerMappingId=get_string_attribute(attributes, 'SpeakerMappingId'),
+        ))
+
+#Function: Stream a dialog file with iterparse instead of loading the whole document.
+# Yields (section, element) pairs: ('dialog', <node id="dialog">) once its attributes have been read,
+# ('DefaultAddressedSpeakers', ...) and ('speakerlist', ...) for the speaker sections, ('node', ...)
+# for every dialog node as soon as its end tag arrives and ('RootNodes', ...) for the list of root nodes. Each yielded element is cleared and detached from
+# its parent when the caller asks for the next one, so only one dialog node is held in memory at a time.
+def iter_dialog_sections(filepath):
+    stack = []
+    dialog_elem = None
+    dialog_done = False
+    for event, elem in ET.iterparse(filepath, events=('start', 'end')):
+        if event == 'start':
+            if dialog_elem is None and elem.tag == 'node' and elem.attrib.get('id') == 'dialog':
+                dialog_elem = elem
+            elif not dialog_done and elem.tag == 'children' and stack and stack[-1] is dialog_elem:
+                # The dialog attributes are complete once its children section opens
+                dialog_done = True
+                yield 'dialog', dialog_elem
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if elem.tag != 'node':
+            continue
+        section = elem.attrib.get('id')
+        if section == 'dialog':
+            if not dialog_done:
+                dialog_done = True
+                yield 'dialog', elem
+            continue
+        if section in ('node', 'RootNodes'):
+            # Only the direct children of <node id="nodes"><children> are dialog nodes
+            if len(stack) < 2 or stack[-2].attrib.get('id') != 'nodes':
+                continue
+        elif section not in ('DefaultAddressedSpeakers', 'speakerlist'):
+            continue
+
+        yield section, elem
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+
+# Function: Read the UUIDs listed in the <node id="RootNodes"> section
+def parse_root_nodes(model, root_nodes_elem):
+    for attribute in root_nodes_elem.findall("./attribute[@id='RootNodes']"):
+        if attribute.attrib.get('value'):
+            model.RootNodes.append(attribute.attrib['value'])
+
+#Helper function to get children of nodes for connections, in document order without duplicates
+CHILD_PATH = "./children/node[@id='children']/children/node[@id='child']"
+
+def extract_children(node, log):
+    children_uuids = []
+    seen = set()
+
+    # Only the direct child list of this node: <children><node id="children"><children><node id="child">
+    for child in node.iterfind(CHILD_PATH):
+        child_attributes = get_attribute_map(child)
+        if 'UUID' in child_attributes:
+            child_uuid = get_string_attribute(child_attributes, 'UUID')
+            if not child_uuid:
+                log.summary("Child node missing UUID.")
+                if log.debug_enabled:
+                    log.debug("Child node XML: %s", ET.tostring(child, encoding='unicode'))
+            elif child_uuid in seen:
+                log.debug("Skipped duplicate child UUID: %s", child_uuid)
+            else:
+                seen.add(child_uuid)
+                children_uuids.append(child_uuid)
+                log.debug("Extracted child UUID: %s", child_uuid)
+        else:
+            log.summary("Malformed child node without UUID attribute.")
+            if log.debug_enabled:
+                log.debug("Child node XML: %s", ET.tostring(child, encoding='unicode'))
+
+    return children_uuids
+
+# ###### CONSTRUCTOR DISPATCH TABLE ######
+# Maps a node constructor to the function that builds its record. Every parse function takes
+# (xml_node, attributes, uuid, constructor, localisation_data, log), where attributes
+# is the attribute map of xml_node, and returns the node record, or None if the node has to be skipped.
+NODE_PARSERS = {}
+
+def register_node_parser(*constructors):
+    # Decorator to register a parse function for one or more constructors
+    def decorator(parse_function):
+        for constructor in constructors:
+            NODE_PARSERS[constructor] = parse_function
+        return parse_function
+    return decorator
+
+#Function: walk the nodes section once and dispatch each node to the parser of its constructor
+def parse_dialog_nodes(root, model, localisation_data, log, cancel_event=None):
+    nodes_section = root.find(".//node[@id='nodes']/children")
+    if nodes_section is None:
+        log.summary("No nodes section found in the dialogue XML.")
+        return
+
+    for xml_node in nodes_section:
+        if xml_node.tag != 'node':
+            continue
+        check_cancelled(cancel_event)
+        if xml_node.attrib.get('id') == 'node':
+            parse_dialog_node(xml_node, model, localisation_data, log)
+        elif xml_node.attrib.get('id') == 'RootNodes':
+            parse_root_nodes(model, xml_node)
+
+def parse_dialog_node(xml_node, model, localisation_data, log):
+    # Index the attributes once and extract UUID and constructor
+    attributes = get_attribute_map(xml_node)
+    if 'UUID' not in attributes:
+        log.summary("Skipping node due to missing UUID.")
+        if log.debug_enabled:
+            log.debug("Skipped node XML: %s", ET.tostring(xml_node, encoding='unicode'))
+        return
+    uuid = get_string_attribute(attributes, 'UUID')
+
+    # ValidatedFlags are read for every node with a UUID, before the constructor decides whether it gets a record
+    validated_has_value = parse_validated_flags(xml_node, uuid, log)
+    if validated_has_value is not None:
+        model.validated_flags[uuid] = validated_has_value
+
+    if 'constructor' not in attributes:
+        log.summary("Skipping node %s due to missing constructor.", uuid)
+        if log.debug_enabled:
+            log.debug("Skipped node XML: %s", ET.tostring(xml_node, encoding='unicode'))
+        return
+    constructor = get_string_attribute(attributes, 'constructor')
+
+    parse_function = NODE_PARSERS.get(constructor)
+    if parse_function is None:
+        log.summary("Skipping node %s with unsupported constructor '%s'.", uuid, constructor)
+        return
+
+    try:
+        record = parse_function(xml_node, attributes, uuid, constructor, localisation_data, log)
+    except Exception as e:
+        log.summary("Error processing %s node %s: %s", constructor, uuid, e)
+        return
+
+    if record is not None:
+        model.nodes.append(record)
+
+#Function: parse jump nodes
+@register_node_parser('Jump')
+def parse_jump_node(xml_node, attributes, uuid, constructor, localisation_data, log):
+    jumptarget_uuid = get_string_attribute(attributes, 'jumptarget')
+
+    if not jumptarget_uuid:
+        log.summary("Jump node %s missing jumptarget.", uuid)
+        return None
+
+    # Extract jumptargetpoint attribute
+    jump_record = JumpRecord(
+        uuid=uuid,
+        jumptarget=jumptarget_uuid,
+        jumptargetpoint=get_int_attribute(attributes, 'jumptargetpoint', default=1),
+        children=[jumptarget_uuid],
+    )
+    log.debug("Created Jump node: %s with jumptarget %s", uuid, jumptarget_uuid)
+    return jump_record
+
+# Function: parse Dialogue Nodes (Greeting, Question, Answer, Cinematic)
+@register_node_parser('TagGreeting', 'TagQuestion', 'TagAnswer', 'TagCinematic')
+def parse_dialogue_line_node(xml_node, attributes, uuid, constructor, localisation_data, log):
+    log.debug("Inspecting Dialogue Line node: UUID=%s, Constructor=%s", uuid, constructor)
+    dialogue_record = DialogueLineRecord(
+        constructor=constructor,
+        uuid=uuid,
+        ShowOnce=get_boolean_attribute(attributes, 'ShowOnce', default=False),
+        groupid=get_string_attribute(attributes, 'GroupID', default=""),
+        groupindex=get_int_attribute(attributes, 'GroupIndex', default=0),
+        root=get_boolean_attribute(attributes, 'Root', default=False),
+        endnode=get_boolean_attribute(attributes, 'endnode', default=False),
+        speaker=get_int_attribute(attributes, 'speaker', default=0),
+        approvalratingid=get_string_attribute(attributes, 'ApprovalRatingID', default=""),
+    )
+
+    # Parse editorData for Cinematic Node Context
+    process_editor_data(xml_node, dialogue_record, log)
+
+    # Populate handles, lineids and texts
+    populate_handles_texts(xml_node, dialogue_record, localisation_data, log)
+
+    # Populate setflags and checkflags
+    populate_flags(xml_node, dialogue_record, log)
+
+    dialogue_record.children = extract_children(xml_node, log)
+    log.debug("Processed Dialogue Line node: UUID=%s", uuid)
+    return dialogue_record
+
+# Function: parse Roll nodes
+@register_node_parser('ActiveRoll', 'PassiveRoll')
+def parse_roll_node(xml_node, attributes, uuid, constructor, localisation_data, log):
+    log.debug("Processing Roll node: UUID=%s, Constructor=%s", uuid, constructor)
+
+    # Create and populate the Roll record
+    roll_record = RollRecord(constructor=constructor)
+    roll_record.approvalratingid = get_string_attribute(attributes, 'ApprovalRatingID', default="")
+    populate_roll_node(attributes, roll_record, uuid, log)
+    # Parse editorData for Cinematic Node Context
+    process_editor_data(xml_node, roll_record, log)
+    # Populate handles, lineids and texts + flags
+    populate_handles_texts(xml_node, roll_record, localisation_data, log)
+    populate_flags(xml_node, roll_record, log)
+
+    roll_record.children = extract_children(xml_node, log)
+    log.debug("Processed Roll node: UUID=%s, Constructor=%s", uuid, constructor)
+    return roll_record
+
+# Function: parse RollResult nodes
+@register_node_parser('RollResult')
+def parse_rollresult_node(xml_node, attributes, uuid, constructor, localisation_data, log):
+    log.debug("Processing RollResult node: UUID=%s, Constructor=%s", uuid, constructor)
+    rollresult_record = RollResultRecord(
+        constructor=constructor,
+        uuid=uuid,
+        Success=get_boolean_attribute(attributes, 'Success', default=False),
+    )
+    populate_flags(xml_node, rollresult_record, log)
+    rollresult_record.children = extract_children(xml_node, log)
+    log.debug("Processed Rollresult node: UUID=%s, Constructor=%s", uuid, constructor)
+    return rollresult_record
+
+# Function: parse Alias Nodes
+@register_node_parser('Alias')
+def parse_alias_node(xml_node, attributes, uuid, constructor, localisation_data, log):
+    alias_record = AliasRecord(
+        constructor=constructor,
+        uuid=uuid,
+        root=get_boolean_attribute(attributes, 'Root', default=False),
+        Greeting=get_boolean_attribute(attributes, 'Greeting', default=False),
+        endnode=get_boolean_attribute(attributes, 'endnode', default=False),
+        speaker=get_int_attribute(attributes, 'speaker', default=0),
+        sourcenode=get_string_attribute(attributes, 'SourceNode', default=""),
+    )
+    # Parse editorData for Cinematic Node Context
+    process_editor_data(xml_node, alias_record, log)
+    # Populate setflags and checkflags
+    populate_flags(xml_node, alias_record, log)
+    alias_record.children = extract_children(xml_node, log)
+    log.debug("Processed Alias node: UUID=%s, Constructor=%s", uuid, constructor)
+    return alias_record
+
+# Function: parse Visual State nodes
+@register_node_parser('Visual State')
+def parse_visualstate_node(xml_node, attributes, uuid, constructor, localisation_data, log):
+    visualstate_record = VisualStateRecord(
+        constructor=constructor,
+        uuid=uuid,
+        groupid=get_string_attribute(attributes, 'GroupID', default=""),
+        groupindex=get_int_attribute(attributes, 'GroupIndex', default=0),
+    )
+    # Parse editorData for Cinematic Node Context
+    process_editor_data(xml_node, visualstate_record, log)
+    # Populate setflags and checkflags
+    populate_flags(xml_node, visualstate_record, log)
+    visualstate_record.children = extract_children(xml_node, log)
+    log.debug("Processed VisualState node: UUID=%s, Constructor=%s", uuid, constructor)
+    return visualstate_record
+
+# Function: parse Nested Dialog nodes
+@register_node_parser('Nested Dialog')
+def parse_nesteddialog_node(xml_node, attributes, uuid, constructor, localisation_data, log):
+    nesteddialog_record = NestedDialogRecord(
+        constructor=constructor,
+        uuid=uuid,
+        NestedDialogNodeUUID=get_string_attribute(attributes, 'NestedDialogNodeUUID', default=""),
+        root=get_boolean_attribute(attributes, 'root', default=False),
+        endnode=get_boolean_attribute(attributes, 'endnode', default=False),
+    )
+
+    # Parse Speaker Linking Entries
+    speaker_linking_node = xml_node.find(".//node[@id='SpeakerLinking']")
+    if speaker_linking_node is not None:
+        for entry_node in speaker_linking_node.findall(".//node[@id='SpeakerLinkingEntry']"):
+            entry_attributes = get_attribute_map(entry_node)
+            nesteddialog_record.SpeakerLinkingEntry.append(SpeakerLinkingRecord(
+                key=get_int_attribute(entry_attributes, 'Key'),
+                value=get_int_attribute(entry_attributes, 'Value'),
+            ))
+    # Populate setflags and checkflags
+    populate_flags(xml_node, nesteddialog_record, log)
+    # Parse editorData for Cinematic Node Context
+    process_editor_data(xml_node, nesteddialog_record, log)
+
+    nesteddialog_record.children = extract_children(xml_node, log)
+    log.debug("Processed NestedDialog node: UUID=%s, Constructor=%s", uuid, constructor)
+    return nesteddialog_record
+
+# Function: parse Trade nodes
+@register_node_parser('Trade')
+def parse_trade_node(xml_node, attributes, uuid, constructor, localisation_data, log):
+    trade_record = TradeRecord(
+        constructor=constructor,
+        uuid=uuid,
+        speaker=get_int_attribute(attributes, 'speaker', default=0),
+        trademode=get_int_attribute(attributes, 'TradeMode', default=1),
+    )
+    # Populate setflags and checkflags
+    populate_flags(xml_node, trade_record, log)
+    trade_record.children = extract_children(xml_node, log)
+    log.debug("Processed Trade node: UUID=%s, Constructor=%s", uuid, constructor)
+    return trade_record
+
+#Function: read the ValidatedFlags section of a node, returns ValidatedHasValue or None if there is none
+def parse_validated_flags(xml_node, uuid, log):
+    validated_flags_node = xml_node.find("./children/node[@id='ValidatedFlags']")
+    if validated_flags_node is None:
+        # Log that no ValidatedFlags were found for this node
+        log.debug("No ValidatedFlags found for node %s.", uuid)
+        return None
+
+    attributes = get_attribute_map(validated_flags_node)
+    if 'ValidatedHasValue' not in attributes:
+        # If ValidatedFlags exists but ValidatedHasValue is missing
+        log.summary("Node %s has ValidatedFlags, but no ValidatedHasValue attribute was found.", uuid)
+        return None
+
+    validated_has_value = get_string_attribute(attributes, 'ValidatedHasValue') == 'True'
+    log.debug("Node %s has ValidatedFlags with ValidatedHasValue=%s.", uuid, validated_has_value)
+    return validated_has_value
+
+# Function: Populate handles_texts with all available handles, lineids and texts
+def populate_handles_texts(xml_node, record, localisation_data, log):
+    tagged_text_nodes = xml_node.findall(".//node[@id='TaggedText']")
+    for tagged_text_node in tagged_text_nodes:
+        has_tag_rule_value = get_string_attribute(get_attribute_map(tagged_text_node), 'HasTagRule') == 'True'
+
+        # Process TagText nodes
+        tag_text_nodes = tagged_text_node.findall(".//node[@id='TagText']")
+        for tag_text_node in tag_text_nodes:
+            attributes = get_attribute_map(tag_text_node)
+            tag_text_attr = attributes.get('TagText')
+            if tag_text_attr is not None:
+                handle = tag_text_attr.handle or ''
+                version = int(tag_text_attr.version or 1)
+            else:
+                handle = ''
+                version = 1
+
+            text = localisation_data.get(handle, '')
+
+            lineid = get_string_attribute(attributes, 'LineId')
+            stub_value = get_string_attribute(attributes, 'stub') == 'True'
+
+            # Add data to handles_texts
+            record.handles_texts.append(TaggedTextRecord(
+                handle=handle,
+                version=version,
+                text=text,
+                has_tag_rule=has_tag_rule_value,
+                stub=stub_value,
+                lineid=lineid,
+            ))
+
+            # Log the added handle-text pair
+            log.debug(
+                "Added Handle-Text pair: handle=%s, text=%s, version=%s, has_tag_rule=%s, stub=%s",
+                handle, text, version, has_tag_rule_value, stub_value
+            )
+
+# Function: Read the flags of one <node id="setflags"> or <node id="checkflags"> section
+def parse_flag_section(flags_node, paramval_default, label, log):
+    flags = []
+    for flaggroup_node in flags_node.findall(".//node[@id='flaggroup']"):
+        flag_type = get_string_attribute(get_attribute_map(flaggroup_node), 'type', default="Global")
+        for flag_node in flaggroup_node.findall(".//node[@id='flag']"):
+            attributes = get_attribute_map(flag_node)
+            flag = FlagRecord(
+                name=get_string_attribute(attributes, 'UUID', default=""),
+                is_true=get_boolean_attribute(attributes, 'value', default=False),
+                flag_type=flag_type,
+            )
+            paramval = get_int_attribute(attributes, 'paramval', default=paramval_default)
+            if paramval is not None:
+                flag.has_paramval = True
+                flag.paramval = paramval
+            flags.append(flag)
+            log.debug("Added %s: %s, Type: %s, is_true: %s", label, flag.name, flag_type, flag.is_true)
+    return flags
+
+# Function: Populate set and checked flags
+def populate_flags(xml_node, record, log):
+    # Populate SetFlags
+    setflags_node = xml_node.find(".//node[@id='setflags']")
+    record.SetFlags = parse_flag_section(setflags_node, None, "SetFlag", log) if setflags_node is not None else []
+
+    # Populate CheckFlags (paramval defaults to 0, so every CheckFlag has one)
+    checkflags_node = xml_node.find(".//node[@id='checkflags']")
+    record.CheckFlags = parse_flag_section(checkflags_node, 0, "CheckFlag", log) if checkflags_node is not None else []
+
+# Function: Parse editor data (notes in CinematicNodeContext), for records that have a cinematic_node_context
+def process_editor_data(xml_node, record, log):
+    editor_data_node = xml_node.find(".//node[@id='editorData']")
+    if editor_data_node is not None and hasattr(record, 'cinematic_node_context'):
+        for data_node in editor_data_node.findall(".//node[@id='data']"):
+            attributes = get_attribute_map(data_node)
+            key = get_string_attribute(attributes, 'key', default="")
+            if key == "CinematicNodeContext":
+                record.cinematic_node_context = get_string_attribute(attributes, 'val', default="")
+                log.debug("Set Cinematic Node Context: %s", record.cinematic_node_context)
+
+def populate_roll_node(attributes, roll_record, uuid, log):
+    roll_record.uuid = get_string_attribute(attributes, 'UUID')
+
+    roll_record.ShowOnce = get_boolean_attribute(attributes, 'ShowOnce', default=False)
+    roll_record.transitionmode = get_int_attribute(attributes, 'transitionmode', default=0)
+    roll_record.speaker = get_int_attribute(attributes, 'speaker', default=0)
+    roll_record.RollTargetSpeaker = get_int_attribute(attributes, 'RollTargetSpeaker', default=0)
+    roll_record.RollType = get_string_attribute(attributes, 'RollType', default="")
+    roll_record.Ability = get_string_attribute(attributes, 'Ability', default="Wisdom")
+    # Extract Skill
+    skill = get_string_attribute(attributes, 'Skill', default='None')
+
+    # Validate the skill against the allowed options - change this to a list that updates based on Ability
+    if skill not in [item[0] for item in skill_options]:
+        log.summary("Invalid skill '%s' for Roll node %s. Defaulting to 'None'.", skill, uuid)
+        skill = 'None'
+
+    roll_record.Skill = skill
+    roll_record.Advantage = get_int_attribute(attributes, 'Advantage', default=0)
+    roll_record.ExcludeCompanionsOptionalBonuses = get_boolean_attribute(
+        attributes, 'ExcludeCompanionsOptionalBonuses', default=False
+    )
+    roll_record.ExcludeSpeakerOptionalBonuses = get_boolean_attribute(
+        attributes, 'ExcludeSpeakerOptionalBonuses', default=False
+    )
+
+    # Validate DifficultyClassID based on available options
+    difficulty_class_id = get_string_attribute(attributes, 'DifficultyClassID', default="")
+    valid_dcs = [item[0] for item in difficulty_class_options]
+    if difficulty_class_id in valid_dcs:
+        roll_record.DifficultyClassID = difficulty_class_id
+    else:
+        roll_record.DifficultyClassID = valid_dcs[0] if valid_dcs else ""
+        log.summary(
+            "Warning: Invalid DifficultyClassID '%s' for Roll node %s. Set to default '%s'.",
+            difficulty_class_id, uuid, roll_record.DifficultyClassID
+        )
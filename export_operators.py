@@ -3,42 +3,20 @@ import xml.etree.ElementTree as ET
 
 import bpy
 
-from .nodes import (DialogueNodeTree, DialogueJumpNode,
-                    NestedDialogNode, DialogueLineNode, DialogueRollNode, DialogueRollResultNode,
-                    DialogueAliasNode, DialogueVisualStateNode, TradeNode)
+from .nodes import DialogueNodeTree
+from .dialog_model import (DialogModel, AddressedSpeakerRecord, SpeakerRecord, NODE_RECORD_TYPES, JumpRecord,
+                           DialogueLineRecord, RollRecord, RollResultRecord, AliasRecord, VisualStateRecord,
+                           NestedDialogRecord, TradeRecord, RecordCache)
+from .loca_index import LocalisationIndex, INDEX_ERRORS
+from .lsf_writer import write_lsf
+from .lsx_writer import LSXWriter, TreeWriter
+from .lsx_source import SourceNodes
+from .import_utils import source_node_spans, stamp_source_spans, DIGEST_KEY, SOURCE_SPAN_KEY, SOURCE_HASH_KEY, SOURCE_FILE_KEY
+from .dialog_log import create_log
+from .perf import create_metrics
+from .uuid_index import node_version
 
 
-def indent_tree(elem, level=0):
-   # Properly indent the exported xml for readability
-    i = "\n" + "    " * level  # Current level indentation
-
-    # Indent the element's text for its first child
-    if len(elem):
-        if not elem.text or not elem.text.strip():
-            elem.text = i + "    "
-        for child in elem:
-            indent_tree(child, level + 1)
-        # Align the closing tag of the current element
-        if not elem.tail or not elem.tail.strip():
-            elem.tail = i
-    else:
-        # Align closing tag for elements without children
-        if not elem.text or not elem.text.strip():
-            elem.text = None
-        if not elem.tail or not elem.tail.strip():
-            elem.tail = i
-
-    # Ensure correct indentation for attributes or direct siblings
-    prev = None
-    for subelem in list(elem):
-        if prev is not None and (not prev.tail or not prev.tail.strip()):
-            prev.tail = i + "    "
-        prev = subelem
-
-    # Align the closing tag of the parent element
-    if level > 0 and (not elem.tail or not elem.tail.strip()):
-        elem.tail = "\n" + "    " * (level - 1)
-
 # HELPER FUNCTIONS FOR WRITING TO XML
 def add_attribute(xml_node, attr_id, attr_type, attr_value):
     ET.SubElement(xml_node, "attribute", {"id": attr_id, "type": attr_type, "value": str(attr_value)})
@@ -50,16 +28,17 @@ def add_child_node(xml_node, child_id, child_key=None):
     return ET.SubElement(xml_node, "node", attributes)
 
 
-def process_editor_data(xml_parent, dialogue_node):
+def process_editor_data(children_section, dialogue_node):
     if hasattr(dialogue_node, "cinematic_node_context") and dialogue_node.cinematic_node_context:
-        # Create the editorData node
-        editor_data_node = ET.SubElement(xml_parent, "node", {"id": "editorData"})
+        # Create the editorData node in the children of the dialogue node
+        editor_data_node = ET.SubElement(children_section, "node", {"id": "editorData"})
+        editor_data_children = ET.SubElement(editor_data_node, "children")
 
         # Add data node for CinematicNodeContext
-        data_node = ET.SubElement(editor_data_node, "node", {"id": "data"})
+        data_node = ET.SubElement(editor_data_children, "node", {"id": "data", "key": "key"})
         ET.SubElement(data_node, "attribute", {"id": "key", "type": "FixedString", "value": "CinematicNodeContext"})
         ET.SubElement(data_node, "attribute",
-                      {"id": "val", "type": "FixedString", "value": dialogue_node.cinematic_node_context})
+                      {"id": "val", "type": "LSString", "value": dialogue_node.cinematic_node_context})
 
 
 def export_flags(xml_node, flags, flag_type):
@@ -129,37 +108,54 @@ def export_handles_and_texts(children_section, dialogue_node):
         ET.SubElement(rule_group_children, "node", {"id": "Rules"})
 
 #Helper functions to get child nodes from Blender nodetree connections
-def get_child_nodes(node):
-    child_nodes = []
-    for output in node.outputs:
-        for link in output.links:
-            connected_node = link.to_node
-            # Skip reroute nodes if there are any and go to the next connected node
-            while connected_node and connected_node.bl_idname == 'NodeReroute':
-                # Follow the output of the reroute node
-                if connected_node.outputs and connected_node.outputs[0].links:
-                    connected_node = connected_node.outputs[0].links[0].to_node
-                else:
-                    connected_node = None
-            if connected_node and connected_node not in child_nodes:
-                child_nodes.append(connected_node)
+#Function: map every node to the nodes its outputs link to, in one pass over the links of the tree
+def build_child_map(node_tree):
+    linked_nodes = {}
+    for link in node_tree.links:
+        linked_nodes.setdefault(link.from_node, []).append(link.to_node)
+
+    # Skip reroute nodes and go to the nodes behind them, a reroute can fan out to several nodes
+    collapsed_reroutes = {}
+    child_map = {}
+    for node, targets in linked_nodes.items():
+        if node.bl_idname == 'NodeReroute':
+            continue
+        # Dict as an ordered set of the child nodes
+        child_nodes = {}
+        for target in targets:
+            for child_node in collapse_reroute(target, linked_nodes, collapsed_reroutes):
+                child_nodes[child_node] = None
+        child_map[node] = list(child_nodes)
+    return child_map
+
+#Function: the non-reroute nodes reached from a node, memoised per reroute in collapsed_reroutes
+def collapse_reroute(node, linked_nodes, collapsed_reroutes):
+    if node.bl_idname != 'NodeReroute':
+        return (node,)
+    child_nodes = collapsed_reroutes.get(node)
+    if child_nodes is None:
+        collapsed_reroutes[node] = ()  # Stops at reroute loops
+        child_nodes = {}
+        for target in linked_nodes.get(node, ()):
+            for child_node in collapse_reroute(target, linked_nodes, collapsed_reroutes):
+                child_nodes[child_node] = None
+        child_nodes = collapsed_reroutes[node] = tuple(child_nodes)
     return child_nodes
 
-def export_child_connections(xml_node, node_tree, parent_node):
-    child_nodes = get_child_nodes(parent_node)
-    if child_nodes:
+def export_child_connections(xml_node, record):
+    if record.children:
         child_nodes_section = ET.SubElement(xml_node, "node", {"id": "children"})
         child_nodes_children = ET.SubElement(child_nodes_section, "children")
-        for connected_node in child_nodes:
+        for child_uuid in record.children:
             child_node = add_child_node(child_nodes_children, "child")
-            add_attribute(child_node, "UUID", "FixedString", connected_node.uuid)
+            add_attribute(child_node, "UUID", "FixedString", child_uuid)
     else:
         # Add an empty <node id="children" /> tag if no child nodes exist
         ET.SubElement(xml_node, "node", {"id": "children"})
 
 
 # ######FUNCTIONS FOR EACH NODE CONSTRUCTOR TYPE EXPORT######
-def add_jump_node(xml_parent, jump_node, node_tree):
+def add_jump_node(xml_parent, jump_node, model):
     node = ET.SubElement(xml_parent, "node", {"id": "node", "key": "UUID"})
     ET.SubElement(node, "attribute", {"id": "constructor", "type": "FixedString", "value": "Jump"})
     ET.SubElement(node, "attribute", {"id": "UUID", "type": "FixedString", "value": jump_node.uuid})
@@ -177,7 +173,7 @@ def add_jump_node(xml_parent, jump_node, node_tree):
     ET.SubElement(children_section, "node", {"id": "setflags"})
     ET.SubElement(children_section, "node", {"id": "checkflags"})
 
-def add_dialogue_line_node(xml_parent, dialogue_node, node_tree):
+def add_dialogue_line_node(xml_parent, dialogue_node, model):
     node = add_child_node(xml_parent, "node", "UUID")
     add_attribute(node, "constructor", "FixedString", dialogue_node.constructor)
     add_attribute(node, "UUID", "FixedString", dialogue_node.uuid)
@@ -188,6 +184,8 @@ def add_dialogue_line_node(xml_parent, dialogue_node, node_tree):
     if dialogue_node.root:
         add_attribute(node, "Root", "bool", dialogue_node.root)
     add_attribute(node, "speaker", "int32", dialogue_node.speaker)
+    if dialogue_node.approvalratingid:
+        add_attribute(node, "ApprovalRatingID", "guid", dialogue_node.approvalratingid)
     if dialogue_node.ShowOnce:
         add_attribute(node, "ShowOnce", "bool", dialogue_node.ShowOnce)
     if dialogue_node.endnode:
@@ -195,7 +193,7 @@ def add_dialogue_line_node(xml_parent, dialogue_node, node_tree):
 
     # Add children
     children_section = ET.SubElement(node, "children")
-    export_child_connections(children_section, node_tree, dialogue_node)
+    export_child_connections(children_section, dialogue_node)
     # Add GameData section and CinematicNodeContext
     game_data_node = ET.SubElement(children_section, "node", {"id": "GameData"})
     game_data_children = ET.SubElement(game_data_node, "children")
@@ -203,7 +201,7 @@ def add_dialogue_line_node(xml_parent, dialogue_node, node_tree):
     ET.SubElement(game_data_children, "node", {"id": "MusicInstrumentSounds"})
     ET.SubElement(game_data_children, "node", {"id": "OriginSound"})
     ET.SubElement(children_section, "node", {"id": "Tags"})
-    process_editor_data(xml_parent, dialogue_node)
+    process_editor_data(children_section, dialogue_node)
 
     # Add flags and handles/texts
     export_flags(children_section, dialogue_node.SetFlags, "setflags")
@@ -211,14 +209,18 @@ def add_dialogue_line_node(xml_parent, dialogue_node, node_tree):
     export_handles_and_texts(children_section, dialogue_node)
 
     # Add ValidatedFlags section if applicable (whatever that does)
-    export_validated_flags(children_section, dialogue_node)
+    export_validated_flags(children_section, dialogue_node, model)
 
-def export_validated_flags(xml_parent, dialogue_node):
-    if any(entry.uuid == dialogue_node.uuid for entry in dialogue_node.id_data.validated_flags):
+def export_validated_flags(xml_parent, dialogue_node, model):
+    # model.validated_flags is the UUID -> ValidatedHasValue map read from the node tree once per export
+    validated_has_value = model.validated_flags.get(dialogue_node.uuid)
+    if validated_has_value is not None:
         validated_flags_node = ET.SubElement(xml_parent, "node", {"id": "ValidatedFlags"})
-        ET.SubElement(validated_flags_node, "attribute", {"id": "ValidatedHasValue", "type": "bool", "value": "False"})
+        ET.SubElement(validated_flags_node, "attribute", {
+            "id": "ValidatedHasValue", "type": "bool", "value": "True" if validated_has_value else "False"
+        })
 
-def add_roll_node(xml_parent, roll_node, node_tree):
+def add_roll_node(xml_parent, roll_node, model):
     node = add_child_node(xml_parent, "node", "UUID")
     add_attribute(node, "constructor", "FixedString", roll_node.constructor)
     add_attribute(node, "UUID", "FixedString", roll_node.uuid)
@@ -227,7 +229,8 @@ def add_roll_node(xml_parent, roll_node, node_tree):
         add_attribute(node, "GroupID", "bool", roll_node.ShowOnce)
     add_attribute(node, "transitionmode", "uint8", roll_node.transitionmode)
     add_attribute(node, "speaker", "int32", roll_node.speaker)
-    add_attribute(node, "approvalratingid", "guid", roll_node.approvalratingid)
+    if roll_node.approvalratingid:
+        add_attribute(node, "ApprovalRatingID", "guid", roll_node.approvalratingid)
     add_attribute(node, "RollType", "string", roll_node.RollType)
     add_attribute(node, "Ability", "string", roll_node.Ability)
     add_attribute(node, "Skill", "string", roll_node.Skill)
@@ -239,7 +242,7 @@ def add_roll_node(xml_parent, roll_node, node_tree):
 
     # Add children
     children_section = ET.SubElement(node, "children")
-    export_child_connections(children_section, node_tree, roll_node)
+    export_child_connections(children_section, roll_node)
     # Add GameData section and CinematicNodeContext
     game_data_node = ET.SubElement(children_section, "node", {"id": "GameData"})
     game_data_children = ET.SubElement(game_data_node, "children")
@@ -247,7 +250,7 @@ def add_roll_node(xml_parent, roll_node, node_tree):
     ET.SubElement(game_data_children, "node", {"id": "MusicInstrumentSounds"})
     ET.SubElement(game_data_children, "node", {"id": "OriginSound"})
     ET.SubElement(children_section, "node", {"id": "Tags"})
-    process_editor_data(xml_parent, roll_node)
+    process_editor_data(children_section, roll_node)
 
     # Add flags and handles/texts
     export_flags(children_section, roll_node.SetFlags, "setflags")
@@ -255,25 +258,25 @@ def add_roll_node(xml_parent, roll_node, node_tree):
     export_handles_and_texts(children_section, roll_node)
 
     # Add ValidatedFlags section
-    export_validated_flags(children_section, roll_node)
+    export_validated_flags(children_section, roll_node, model)
 
-def add_rollresult_node(xml_parent, rollresult_node, node_tree):
+def add_rollresult_node(xml_parent, rollresult_node, model):
     node = add_child_node(xml_parent, "node", "UUID")
     add_attribute(node, "constructor", "FixedString", rollresult_node.constructor)
     add_attribute(node, "UUID", "FixedString", rollresult_node.uuid)
     add_attribute(node, "Success", "bool", rollresult_node.Success)
     # Add children
     children_section = ET.SubElement(node, "children")
-    export_child_connections(children_section, node_tree, rollresult_node)
+    export_child_connections(children_section, rollresult_node)
 
     ET.SubElement(children_section, "node", {"id": "Tags"})
     # Add flags
     export_flags(children_section, rollresult_node.SetFlags, "setflags")
     export_flags(children_section, rollresult_node.CheckFlags, "checkflags")
     # Add ValidatedFlags section
-    export_validated_flags(children_section, rollresult_node)
+    export_validated_flags(children_section, rollresult_node, model)
 
-def add_alias_node(xml_parent, alias_node, node_tree):
+def add_alias_node(xml_parent, alias_node, model):
     node = add_child_node(xml_parent, "node", "UUID")
     add_attribute(node, "constructor", "FixedString", alias_node.constructor)
     add_attribute(node, "UUID", "FixedString", alias_node.uuid)
@@ -283,12 +286,14 @@ def add_alias_node(xml_parent, alias_node, node_tree):
     if alias_node.root:
         add_attribute(node, "Root", "bool", alias_node.root)
     add_attribute(node, "speaker", "int32", alias_node.speaker)
+    if alias_node.sourcenode:
+        add_attribute(node, "SourceNode", "FixedString", alias_node.sourcenode)
     if alias_node.endnode:
         add_attribute(node, "endnode", "bool", alias_node.endnode)
 
     # Add children
     children_section = ET.SubElement(node, "children")
-    export_child_connections(children_section, node_tree, alias_node)
+    export_child_connections(children_section, alias_node)
     # Add GameData section and CinematicNodeContext
     game_data_node = ET.SubElement(children_section, "node", {"id": "GameData"})
     game_data_children = ET.SubElement(game_data_node, "children")
@@ -296,16 +301,16 @@ def add_alias_node(xml_parent, alias_node, node_tree):
     ET.SubElement(game_data_children, "node", {"id": "MusicInstrumentSounds"})
     ET.SubElement(game_data_children, "node", {"id": "OriginSound"})
     ET.SubElement(children_section, "node", {"id": "Tags"})
-    process_editor_data(xml_parent, alias_node)
+    process_editor_data(children_section, alias_node)
 
     # Add flags and handles/texts
     export_flags(children_section, alias_node.SetFlags, "setflags")
     export_flags(children_section, alias_node.CheckFlags, "checkflags")
 
     # Add ValidatedFlags section
-    export_validated_flags(children_section, alias_node)
+    export_validated_flags(children_section, alias_node, model)
 
-def add_visualstate_node(xml_parent, visualstate_node, node_tree):
+def add_visualstate_node(xml_parent, visualstate_node, model):
     node = add_child_node(xml_parent, "node", "UUID")
     add_attribute(node, "constructor", "FixedString", visualstate_node.constructor)
     add_attribute(node, "UUID", "FixedString", visualstate_node.uuid)
@@ -315,7 +320,7 @@ def add_visualstate_node(xml_parent, visualstate_node, node_tree):
         add_attribute(node, "GroupIndex", "int32", visualstate_node.groupindex)
     # Add children
     children_section = ET.SubElement(node, "children")
-    export_child_connections(children_section, node_tree, visualstate_node)
+    export_child_connections(children_section, visualstate_node)
     # Add GameData section
     game_data_node = ET.SubElement(children_section, "node", {"id": "GameData"})
     game_data_children = ET.SubElement(game_data_node, "children")
@@ -327,9 +332,9 @@ def add_visualstate_node(xml_parent, visualstate_node, node_tree):
     export_flags(children_section, visualstate_node.SetFlags, "setflags")
     export_flags(children_section, visualstate_node.CheckFlags, "checkflags")
     # Add ValidatedFlags section
-    export_validated_flags(children_section, visualstate_node)
+    export_validated_flags(children_section, visualstate_node, model)
 
-def add_nesteddialog_node(xml_parent, nesteddialog_node, node_tree):
+def add_nesteddialog_node(xml_parent, nesteddialog_node, model):
     node = add_child_node(xml_parent, "node", "UUID")
     add_attribute(node, "constructor", "FixedString", nesteddialog_node.constructor)
     add_attribute(node, "UUID", "FixedString", nesteddialog_node.uuid)
@@ -342,24 +347,24 @@ def add_nesteddialog_node(xml_parent, nesteddialog_node, node_tree):
 
     # Add children
     children_section = ET.SubElement(node, "children")
-    export_child_connections(children_section, node_tree, nesteddialog_node)
+    export_child_connections(children_section, nesteddialog_node)
     ET.SubElement(children_section, "node", {"id": "Tags"})
     # Add flags and speaker linking entries for the related nested dialogue
     export_flags(children_section, nesteddialog_node.SetFlags, "setflags")
     export_flags(children_section, nesteddialog_node.CheckFlags, "checkflags")
     export_speaker_linking_entries(children_section, nesteddialog_node.SpeakerLinkingEntry)
     # Add ValidatedFlags section
-    export_validated_flags(children_section, nesteddialog_node)
+    export_validated_flags(children_section, nesteddialog_node, model)
 
-def add_trade_node(xml_parent, trade_node, node_tree):
+def add_trade_node(xml_parent, trade_node, model):
     node = add_child_node(xml_parent, "node", "UUID")
     add_attribute(node, "constructor", "FixedString", trade_node.constructor)
     add_attribute(node, "UUID", "FixedString", trade_node.uuid)
     add_attribute(node, "speaker", "int32", trade_node.speaker)
-    add_attribute(node, "trademode", "uint8", trade_node.trademode)
+    add_attribute(node, "TradeMode", "uint8", trade_node.trademode)
     # Add children
     children_section = ET.SubElement(node, "children")
-    export_child_connections(children_section, node_tree, trade_node)
+    export_child_connections(children_section, trade_node)
     # Add GameData section
     game_data_node = ET.SubElement(children_section, "node", {"id": "GameData"})
     game_data_children = ET.SubElement(game_data_node, "children")
@@ -367,20 +372,225 @@ def add_trade_node(xml_parent, trade_node, node_tree):
     ET.SubElement(game_data_children, "node", {"id": "MusicInstrumentSounds"})
     ET.SubElement(game_data_children, "node", {"id": "OriginSound"})
     ET.SubElement(children_section, "node", {"id": "Tags"})
-    process_editor_data(xml_parent, trade_node)
+    process_editor_data(children_section, trade_node)
     # Add flags and handles/texts
     export_flags(children_section, trade_node.SetFlags, "setflags")
     export_flags(children_section, trade_node.CheckFlags, "checkflags")
     # Add ValidatedFlags section
-    export_validated_flags(children_section, trade_node)
+    export_validated_flags(children_section, trade_node, model)
+
+# Node tree session_uid -> {fragment key: serialised LSX of a node record}, kept between exports of the same tree.
+# Cleared on undo, redo and file load, and trees that were deleted are dropped on the next export
+EXPORT_FRAGMENT_CACHES = {}
+# Node tree session_uid -> RecordCache with the node records of the last export, kept like the fragment caches
+EXPORT_RECORD_CACHES = {}
+
+#Function: the cache of a node tree in caches, created with factory, forgetting the caches of trees that no longer exist
+def tree_cache(caches, node_tree, factory):
+    live_trees = {tree.session_uid for tree in bpy.data.node_groups}
+    for session_uid in caches.keys() - live_trees:
+        del caches[session_uid]
+    cache = caches.get(node_tree.session_uid)
+    if cache is None:
+        cache = caches[node_tree.session_uid] = factory()
+    return cache
+
+#Function: the fragment cache of a node tree
+def export_fragment_cache(node_tree):
+    return tree_cache(EXPORT_FRAGMENT_CACHES, node_tree, dict)
+
+# Function: forget every fragment and record cache, after undo, redo and loading a file
+@bpy.app.handlers.persistent
+def clear_export_fragment_caches(*args):
+    EXPORT_FRAGMENT_CACHES.clear()
+    EXPORT_RECORD_CACHES.clear()
+
+CLEAR_HANDLERS = (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post)
+
+#Function: add the XML of a node record to xml_parent
+def add_record_node(xml_parent, record, model):
+    match record:
+        case DialogueLineRecord():
+            add_dialogue_line_node(xml_parent, record, model)
+        case JumpRecord():
+            add_jump_node(xml_parent, record, model)
+        case RollRecord():
+            add_roll_node(xml_parent, record, model)
+        case RollResultRecord():
+            add_rollresult_node(xml_parent, record, model)
+        case AliasRecord():
+            add_alias_node(xml_parent, record, model)
+        case VisualStateRecord():
+            add_visualstate_node(xml_parent, record, model)
+        case NestedDialogRecord():
+            add_nesteddialog_node(xml_parent, record, model)
+        case TradeRecord():
+            add_trade_node(xml_parent, record, model)
+
+#Function: key of the exported XML of a record, everything the add_*_node functions read goes into it
+def fragment_key(record, model):
+    return record.bl_idname, record.digest(), model.validated_flags.get(record.uuid)
+
+#Function: write a DialogModel as DialogsBinary XML, or as LSF when the file name ends in .lsf
+# fragment_cache (a dict kept by the caller) lets the XML export reuse the text of unchanged records,
+# source_nodes (an open SourceNodes) supplies the original XML of records unchanged since import
+def write_dialog_model(model, filepath, log, compress=True, fragment_cache=None, source_nodes=None):
+    # A bare file name is written to the working directory, which already exists
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if filepath.lower().endswith(".lsf"):
+        # Binary DialogsBinary file, no LSLib round trip needed
+        writer = TreeWriter()
+        write_dialog_document(model, writer, log, source_nodes=source_nodes)
+        write_lsf(writer.root, filepath, compress=compress)
+    else:
+        # Stream the XML node by node, indented so that it can be deciphered later
+        with open(filepath, "w", encoding="utf-8", errors="xmlcharrefreplace") as target:
+            write_dialog_document(model, LSXWriter(target.write), log, fragment_cache, source_nodes)
+    log.summary("Exported %s nodes to %s", len(model.nodes), filepath)
+
+#Function: send the DialogsBinary document of a DialogModel to an LSXWriter (or TreeWriter), one record at a time
+def write_dialog_document(model, writer, log, fragment_cache=None, source_nodes=None):
+    writer.declaration()
+    writer.start("save")
+    writer.start("region", {"id": "dialog"})
+    writer.start("node", {"id": "dialog"})
+
+    # Global attributes
+    writer.element(ET.Element("attribute", {"id": "category", "type": "LSString", "value": model.category}))
+    writer.element(ET.Element("attribute", {"id": "UUID", "type": "FixedString", "value": model.UUID}))
+    writer.element(ET.Element("attribute", {"id": "TimelineId", "type": "FixedString", "value": model.TimelineId}))
+
+    # Nodes section
+    writer.start("children")
+
+    # DefaultAddressedSpeakers
+    default_speakers_node = ET.Element("node", {"id": "DefaultAddressedSpeakers"})
+    default_speakers_children = ET.SubElement(default_speakers_node, "children")
+    for speaker in model.DefaultAddressedSpeakers:
+        speaker_node = ET.SubElement(default_speakers_children, "node", {"id": "Object", "key": "MapKey"})
+        ET.SubElement(speaker_node, "attribute", {"id": "MapKey", "type": "int32", "value": str(speaker.MapKey)})
+        ET.SubElement(speaker_node, "attribute",
+                      {"id": "MapValue", "type": "int32", "value": str(speaker.MapValue)})
+    writer.element(default_speakers_node)
+
+    # Speakers
+    speaker_list_node = ET.Element("node", {"id": "speakerlist"})
+    speaker_list_children = ET.SubElement(speaker_list_node, "children")
+    for speaker in model.Speakers:
+        speaker_node = ET.SubElement(speaker_list_children, "node", {"id": "speaker", "key": "index"})
+        ET.SubElement(speaker_node, "attribute", {"id": "index", "type": "FixedString", "value": speaker.index})
+        ET.SubElement(speaker_node, "attribute", {"id": "list", "type": "LSString", "value": speaker.list})
+        ET.SubElement(speaker_node, "attribute",
+                      {"id": "SpeakerMappingId", "type": "guid", "value": speaker.SpeakerMappingId})
+    writer.element(speaker_list_node)
+
+    writer.start("node", {"id": "nodes"})
+    writer.start("children")
+
+    # Generate the XML for each node record and write it out straight away
+    used_fragments = {}
+    for record in model.nodes:
+        source = source_nodes.text(record.uuid) if source_nodes is not None else None
+        if source is not None:
+            # Unchanged since import: copy the node from the source file, with everything the editor does not read
+            writer.write_verbatim(source)
+            log.debug("Copied %s node %s from the source file", record.bl_idname, record.uuid)
+        elif fragment_cache is None:
+            nodes_children = ET.Element("children")
+            add_record_node(nodes_children, record, model)
+            for element in nodes_children:
+                writer.element(element)
+            log.debug("Exported %s node %s", record.bl_idname, record.uuid)
+        else:
+            # Only records whose content changed since the last export are serialised again
+            key = fragment_key(record, model)
+            fragment = fragment_cache.get(key)
+            if fragment is None:
+                nodes_children = ET.Element("children")
+                add_record_node(nodes_children, record, model)
+                fragment = writer.fragment(nodes_children)
+                log.debug("Exported %s node %s", record.bl_idname, record.uuid)
+            else:
+                log.debug("Reused the XML of unchanged %s node %s", record.bl_idname, record.uuid)
+            used_fragments[key] = fragment
+            writer.write_fragment(fragment)
+    if fragment_cache is not None:
+        # Drop the fragments of deleted and changed records
+        fragment_cache.clear()
+        fragment_cache.update(used_fragments)
+
+    # RootNodes section at the end
+    root_nodes_section = ET.Element("node", {"id": "RootNodes"})
+    for record in model.nodes:
+        if getattr(record, 'root', False):
+            ET.SubElement(root_nodes_section, "attribute", {
+                "id": "RootNodes",
+                "type": "FixedString",
+                "value": record.uuid
+            })
+    writer.element(root_nodes_section)
+
+    writer.end()  # children of nodes
+    writer.end()  # nodes
+    writer.end()  # children of dialog
+    writer.end()  # dialog
+    writer.end()  # region
+    writer.end()  # save
+
+#Function: the source spans of the nodes whose record did not change since import, by UUID
+def unchanged_source_spans(node_tree, model):
+    records = {record.uuid: record for record in model.nodes}
+    spans = {}
+    for node in node_tree.nodes:
+        span = node.get(SOURCE_SPAN_KEY)
+        record = records.get(getattr(node, 'uuid', None))
+        if span is not None and record is not None and node.get(DIGEST_KEY) == record.digest():
+            spans[record.uuid] = (span[0], span[1], node.get(SOURCE_HASH_KEY))
+    return spans
+
+#Function: capture a DialogueNodeTree as a DialogModel, following the node links for the children of each record
+def build_dialog_model(node_tree, log):
+    model = DialogModel()
+    model.category = node_tree.category
+    model.UUID = node_tree.UUID
+    model.TimelineId = node_tree.TimelineId
+    model.DefaultAddressedSpeakers = [AddressedSpeakerRecord.from_object(speaker)
+                                      for speaker in node_tree.DefaultAddressedSpeakers]
+    model.Speakers = [SpeakerRecord.from_object(speaker) for speaker in node_tree.Speakers]
+    model.validated_flags = {entry.uuid: entry.has_value for entry in node_tree.validated_flags}
+
+    # Only nodes edited since the last export are read again. The children are always taken from the links,
+    # the tree update that would tell about link changes runs deferred
+    records = tree_cache(EXPORT_RECORD_CACHES, node_tree, RecordCache)
+    child_map = build_child_map(node_tree)
+    for node in node_tree.nodes:
+        record_type = NODE_RECORD_TYPES.get(node.bl_idname)
+        if record_type is None:
+            # Not yet known or unsupported node types
+            log.summary("Skipped node %s of unknown type %s", node.name, type(node).__name__)
+            continue
+        record = records.record(node.as_pointer(), node_version(node), record_type, node)
+        record.children = [child_node.uuid for child_node in child_map.get(node, ())]
+        model.nodes.append(record)
+    records.finish()
+    return model
 
 class ExportDialogueXML(bpy.types.Operator):
     bl_idname = "node.export_dialogue_xml"
     bl_label = "Export Dialogue XML"
-    bl_description = "Export dialogue nodes to an XML file"
+    bl_description = ("Export dialogue nodes to an XML/LSX file, or to a binary LSF file (version 7, the BG3 layout) "
+                      "when the name ends in .lsf")
     filename_ext = ".xml"
 
     filepath: bpy.props.StringProperty(subtype='FILE_PATH')
+    filter_glob: bpy.props.StringProperty(default="*.xml;*.lsx;*.lsf", options={'HIDDEN'})
+    compress: bpy.props.BoolProperty(
+        name="Compress LSF",
+        description="LZ4 compress the sections of .lsf exports",
+        default=True
+    )
 
     def execute(self, context):
         node_tree = context.space_data.node_tree
@@ -388,10 +598,20 @@ class ExportDialogueXML(bpy.types.Operator):
             self.report({'ERROR'}, "No active DialogueNodeTree found. You should be in a DialogueNodeTree.")
             return {'CANCELLED'}
 
+        log = create_log(context)
+        metrics = create_metrics(context, "Export", self.filepath)
         try:
-            self.add_global_root(node_tree, self.filepath)
+            self.add_global_root(node_tree, self.filepath, log, metrics, self.compress)
             self.report({'INFO'}, f"Dialogue XML exported to {self.filepath}")
+            metrics.count("nodes", len(node_tree.nodes))
+            metrics.count("links", len(node_tree.links))
+            metrics.finish(log)
+
+            # Save logs next to the import log in the blend file directory
+            blend_dir = os.path.dirname(bpy.data.filepath) if bpy.data.filepath else os.getcwd()
+            log.write(os.path.join(blend_dir, "dialogue_export_log.txt"))
         except Exception as e:
+            metrics.finish(log, completed=False)
             self.report({'ERROR'}, f"Failed to export XML: {str(e)}")
             return {'CANCELLED'}
 
@@ -402,80 +622,36 @@ class ExportDialogueXML(bpy.types.Operator):
         return {'RUNNING_MODAL'}
 
     #Global attributes for every DialogsBinary
-    def add_global_root(self, node_tree, filepath):
-        root = ET.Element("save")
-        region = ET.SubElement(root, "region", {"id": "dialog"})
-        dialog_node = ET.SubElement(region, "node", {"id": "dialog"})
-
-        # Global attributes
-        ET.SubElement(dialog_node, "attribute", {"id": "category", "type": "LSString", "value": node_tree.category})
-        ET.SubElement(dialog_node, "attribute", {"id": "UUID", "type": "FixedString", "value": node_tree.UUID})
-        ET.SubElement(dialog_node, "attribute",
-                      {"id": "TimelineId", "type": "FixedString", "value": node_tree.TimelineId})
-
-        # Nodes section
-        children = ET.SubElement(dialog_node, "children")
-
-        # DefaultAddressedSpeakers
-        default_speakers_node = ET.SubElement(children, "node", {"id": "DefaultAddressedSpeakers"})
-        default_speakers_children = ET.SubElement(default_speakers_node, "children")
-        for speaker in node_tree.DefaultAddressedSpeakers:
-            speaker_node = ET.SubElement(default_speakers_children, "node", {"id": "Object", "key": "MapKey"})
-            ET.SubElement(speaker_node, "attribute", {"id": "MapKey", "type": "int32", "value": str(speaker.MapKey)})
-            ET.SubElement(speaker_node, "attribute",
-                          {"id": "MapValue", "type": "int32", "value": str(speaker.MapValue)})
-
-        # Speakers
-        speaker_list_node = ET.SubElement(children, "node", {"id": "speakerlist"})
-        speaker_list_children = ET.SubElement(speaker_list_node, "children")
-        for speaker in node_tree.Speakers:
-            speaker_node = ET.SubElement(speaker_list_children, "node", {"id": "speaker", "key": "index"})
-            ET.SubElement(speaker_node, "attribute", {"id": "index", "type": "FixedString", "value": speaker.index})
-            ET.SubElement(speaker_node, "attribute", {"id": "list", "type": "LSString", "value": speaker.list})
-            ET.SubElement(speaker_node, "attribute",
-                          {"id": "SpeakerMappingId", "type": "guid", "value": speaker.SpeakerMappingId})
-
-        nodes_section = ET.SubElement(children, "node", {"id": "nodes"})
-        nodes_children = ET.SubElement(nodes_section, "children")
-
-        # Generate the XML for each node in the tree
-        for node in node_tree.nodes:
-            match node:
-                case DialogueLineNode():
-                    add_dialogue_line_node(nodes_children, node, node_tree)
-                case DialogueJumpNode():
-                    add_jump_node(nodes_children, node, node_tree)
-                case DialogueRollNode():
-                    add_roll_node(nodes_children, node, node_tree)
-                case DialogueRollResultNode():
-                    add_rollresult_node(nodes_children, node, node_tree)
-                case DialogueAliasNode():
-                    add_alias_node(nodes_children, node, node_tree)
-                case DialogueVisualStateNode():
-                    add_visualstate_node(nodes_children, node, node_tree)
-                case NestedDialogNode():
-                    add_nesteddialog_node(nodes_children, node, node_tree)
-                case TradeNode():
-                    add_trade_node(nodes_children, node, node_tree)
-                case _:
-                    # Not yet known or unsupported node types
-                    print(f"Unknown node type: {type(node).__name__}")
-
-        # RootNodes section at the end
-        root_nodes_section = ET.SubElement(nodes_children, "node", {"id": "RootNodes"})
-        for node in node_tree.nodes:
-            if hasattr(node, 'root') and node.root:
-                ET.SubElement(root_nodes_section, "attribute", {
-                    "id": "RootNodes",
-                    "type": "FixedString",
-                    "value": node.uuid
-                })
-
-        # Save XML with actual indentation so that it can be deciphered later
-        indent_tree(root)
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        tree = ET.ElementTree(root)
-        tree.write(filepath, encoding="utf-8", xml_declaration=True)
+    def add_global_root(self, node_tree, filepath, log, metrics, compress=True):
+        fragment_cache = export_fragment_cache(node_tree)
+        with metrics.phase("building model"):
+            model = build_dialog_model(node_tree, log)
+
+        # Nodes unchanged since import are copied from the source file. When the export replaces that file
+        # it is written next to it first, the source must stay readable until the export is complete
+        source_path = node_tree.get(SOURCE_FILE_KEY)
+        replace_source = bool(source_path) and os.path.normcase(os.path.abspath(filepath)) == os.path.normcase(source_path)
+        target_path = filepath + ".tmp" if replace_source else filepath
+        try:
+            unchanged_spans = unchanged_source_spans(node_tree, model)
+            with metrics.phase("writing"), SourceNodes(source_path, unchanged_spans) as source_nodes:
+                write_dialog_model(model, target_path, log, compress, fragment_cache, source_nodes)
+            if replace_source:
+                os.replace(target_path, filepath)
+        finally:
+            if replace_source and os.path.exists(target_path):
+                os.remove(target_path)
+
+        if replace_source:
+            # The nodes now match the exported file, index it as their new source
+            with metrics.phase("indexing source spans"):
+                digests = {record.uuid: record.digest() for record in model.nodes}
+                for node in node_tree.nodes:
+                    digest = digests.get(getattr(node, 'uuid', None))
+                    if digest is not None:
+                        node[DIGEST_KEY] = digest
+                stamp_source_spans(node_tree, filepath, source_node_spans(filepath), log)
+
 
 class ExportLocalisationOperator(bpy.types.Operator):
     bl_idname = "node.export_localisation"
@@ -498,24 +674,39 @@ class ExportLocalisationOperator(bpy.types.Operator):
             self.report({'ERROR'}, "Localisation file path in addon preferences not found or not set.")
             return {'CANCELLED'}
 
+        metrics = create_metrics(context, "Localisation Export", localisation_file)
         try:
             if is_modification:
-                # Load existing handles from the vanilla loca
-                existing_handles = self.load_existing_handles(localisation_file)
+                # Load existing handles from the vanilla loca, or look the handles of the tree up in its persistent index
+                with metrics.phase("loading localisation"):
+                    existing_handles = None
+                    if getattr(prefs, "use_localisation_index", False):
+                        existing_handles = self.lookup_existing_handles(localisation_file, node_tree)
+                    if existing_handles is None:
+                        existing_handles = self.load_existing_handles(localisation_file)
                 # Compare and get new handles
-                new_handles = self.get_new_handles(node_tree, existing_handles)
+                with metrics.phase("collecting handles"):
+                    new_handles = collect_handles(node_tree, existing_handles)
             else:
                 # Get all handles if it's an entirely new dialogue
-                new_handles = self.get_all_handles(node_tree)
+                with metrics.phase("collecting handles"):
+                    new_handles = collect_handles(node_tree)
 
             if new_handles:
-                self.write_localisation_file(new_handles)
+                # Write localisation file into the directory of the blend file
+                blend_dir = os.path.dirname(bpy.data.filepath) if bpy.data.filepath else os.getcwd()
+                with metrics.phase("writing"):
+                    write_localisation_file(new_handles, os.path.join(blend_dir, "new_localisation.xml"))
                 self.report({'INFO'}, f"Localisation exported with {len(new_handles)} handles.")
             else:
                 self.report({'WARNING'}, "No new handles to export.")
+            metrics.count("nodes", len(node_tree.nodes))
+            metrics.count("handles", len(new_handles))
+            metrics.finish()
             return {'FINISHED'}
 
         except Exception as e:
+            metrics.finish(completed=False)
             self.report({'ERROR'}, f"Failed to export localisation: {str(e)}")
             return {'CANCELLED'}
 
@@ -536,62 +727,69 @@ class ExportLocalisationOperator(bpy.types.Operator):
             self.report({'ERROR'}, f"Failed to parse localisation file: {str(e)}")
         return existing_handles
 
-    def get_new_handles(self, node_tree, existing_handles):
-        new_handles = {}
-        for node in node_tree.nodes:
-            if hasattr(node, "handles_texts"):
-                for handle_text in node.handles_texts:
-                    if handle_text.handle not in existing_handles:
-                        new_handles[handle_text.handle] = handle_text.text
-        return new_handles
-
-    def get_all_handles(self, node_tree):
-        handles = {}
-        for node in node_tree.nodes:
-            if hasattr(node, "handles_texts"):
-                for handle_text in node.handles_texts:
+    #Function: the handles of the tree found in the persistent index of the loca, None if the index can't be used
+    def lookup_existing_handles(self, filepath, node_tree):
+        try:
+            with LocalisationIndex(filepath) as index:
+                return index.lookup(collect_handles(node_tree))
+        except INDEX_ERRORS as e:
+            self.report({'WARNING'}, f"Localisation index unavailable ({e}), reading the file instead.")
+            return None
+
+
+#Function: the handle -> text pairs of all nodes of a tree, leaving out the handles in existing_handles when given
+def collect_handles(node_tree, existing_handles=None):
+    handles = {}
+    for node in node_tree.nodes:
+        if hasattr(node, "handles_texts"):
+            for handle_text in node.handles_texts:
+                if existing_handles is None or handle_text.handle not in existing_handles:
                     handles[handle_text.handle] = handle_text.text
-        return handles
-
-    # Write localisation file into the directory of the blend file
-    def write_localisation_file(self, handles):
-        blend_dir = os.path.dirname(bpy.data.filepath) if bpy.data.filepath else os.getcwd()
-        loc_file = os.path.join(blend_dir, "new_localisation.xml")
-
-        root = ET.Element("contentList")
-        for handle, text in handles.items():
-            content = ET.SubElement(root, "content", {"contentuid": handle, "version": "1"})
-            content.text = text
-
-        # Indent the loca XML
-        self.indent_loca_xml(root)
-
-        # Write the XML file
-        tree = ET.ElementTree(root)
-        with open(loc_file, "wb") as file:
-            tree.write(file, encoding="utf-8", xml_declaration=True)
-
-    def indent_loca_xml(self, elem, level=0):
-        i = "\n" + "    " * level
-        if len(elem):
-            if not elem.text or not elem.text.strip():
-                elem.text = i + "    "
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-            for child in elem:
-                self.indent_loca_xml(child, level + 1)
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-        else:
-            if level and (not elem.tail or not elem.tail.strip()):
-                elem.tail = i
+    return handles
+
+#Function: write handle -> text pairs as a localisation XML
+def write_localisation_file(handles, loc_file):
+    root = ET.Element("contentList")
+    for handle, text in handles.items():
+        content = ET.SubElement(root, "content", {"contentuid": handle, "version": "1"})
+        content.text = text
+
+    # Indent the loca XML
+    indent_loca_xml(root)
+
+    # Write the XML file
+    tree = ET.ElementTree(root)
+    with open(loc_file, "wb") as file:
+        tree.write(file, encoding="utf-8", xml_declaration=True)
+
+def indent_loca_xml(elem, level=0):
+    i = "\n" + "    " * level
+    if len(elem):
+        if not elem.text or not elem.text.strip():
+            elem.text = i + "    "
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+        for child in elem:
+            indent_loca_xml(child, level + 1)
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+    else:
+        if level and (not elem.tail or not elem.tail.strip()):
+            elem.tail = i
 
 
 # Register operators
 def register():
     bpy.utils.register_class(ExportDialogueXML)
     bpy.utils.register_class(ExportLocalisationOperator)
+    for handlers in CLEAR_HANDLERS:
+        if clear_export_fragment_caches not in handlers:
+            handlers.append(clear_export_fragment_caches)
 
 def unregister():
     bpy.utils.unregister_class(ExportLocalisationOperator)
     bpy.utils.unregister_class(ExportDialogueXML)
+    for handlers in CLEAR_HANDLERS:
+        if clear_export_fragment_caches in handlers:
+            handlers.remove(clear_export_fragment_caches)
+    clear_export_fragment_caches()
@@ -0,0 +1,197 @@
+import hashlib
+import marshal
+import os
+import zlib
+
+from .cache_utils import user_cache_dir
+from .dialog_model import DialogModel, AddressedSpeakerRecord, SpeakerRecord, NODE_RECORD_TYPES
+from .loca_index import source_signature
+
+# Bump when DialogModel, the records or the entry layout change so older entries are ignored
+SCHEMA_VERSION = 1
+CACHE_SUBDIR = "imports"
+ENTRY_SUFFIX = ".dialog"
+DEFAULT_MAX_CACHE_SIZE = 256 << 20
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(filepath):
+    """SHA-256 of the contents of a file, as a hex string."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def import_cache_key(filepath, localisation_path=""):
+    """
+    Compute the cache key of an import.
+
+    The key covers the contents of the dialog file, the schema version and the localisation file the
+    texts were resolved from, so a changed dialog, addon or localisation file never hits an old entry.
+
+    Args:
+        filepath (str): Path to the dialog file.
+        localisation_path (str): Path to the localisation XML, may be empty.
+
+    Returns:
+        str: Hex key.
+    """
+    localisation = ""
+    if localisation_path and os.path.exists(localisation_path):
+        localisation = source_signature(localisation_path)
+    content = f"{SCHEMA_VERSION}\n{file_sha256(filepath)}\n{localisation}"
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def import_cache_dir():
+    path = os.path.join(user_cache_dir(), CACHE_SUBDIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def encode_import(model, spans):
+    """
+    Serialise a parsed dialog: the model with its resolved texts and child UUIDs, and the source spans.
+
+    Args:
+        model (DialogModel): The parsed dialog.
+        spans (dict): Node UUID -> (start, end, fingerprint) from lsx_source.index_node_spans.
+
+    Returns:
+        bytes: zlib compressed marshal data.
+    """
+    content = (
+        SCHEMA_VERSION,
+        model.category,
+        model.UUID,
+        model.TimelineId,
+        tuple(speaker.values() for speaker in model.DefaultAddressedSpeakers),
+        tuple(speaker.values() for speaker in model.Speakers),
+        tuple((record.bl_idname, record.values(), tuple(record.children)) for record in model.nodes),
+        tuple(model.RootNodes),
+        model.validated_flags,
+        spans,
+    )
+    return zlib.compress(marshal.dumps(content))
+
+
+def decode_import(data):
+    """
+    Inverse of encode_import.
+
+    Args:
+        data (bytes): An encoded entry.
+
+    Returns:
+        tuple: (DialogModel, spans).
+
+    Raises:
+        ValueError: If the data is corrupt or from another schema version.
+    """
+    try:
+        content = marshal.loads(zlib.decompress(data))
+    except (zlib.error, EOFError, TypeError) as e:
+        raise ValueError(f"Corrupt import cache entry: {e}") from e
+    if not isinstance(content, tuple) or not content or content[0] != SCHEMA_VERSION:
+        raise ValueError("Import cache entry has another schema version")
+
+    (_, category, uuid, timeline_id, default_speakers, speakers, nodes, root_nodes,
+     validated_flags, spans) = content
+    model = DialogModel()
+    model.category = category
+    model.UUID = uuid
+    model.TimelineId = timeline_id
+    model.DefaultAddressedSpeakers = [AddressedSpeakerRecord.from_values(values) for values in default_speakers]
+    model.Speakers = [SpeakerRecord.from_values(values) for values in speakers]
+    for bl_idname, values, children in nodes:
+        record = NODE_RECORD_TYPES[bl_idname].from_values(values)
+        record.children = list(children)
+        model.nodes.append(record)
+    model.RootNodes = list(root_nodes)
+    model.validated_flags = validated_flags
+    return model, spans
+
+
+def load_cached_import(key):
+    """
+    Load an import from the cache and mark it as recently used.
+
+    Args:
+        key (str): Key from import_cache_key.
+
+    Returns:
+        tuple: (DialogModel, spans), or None on a miss. Unreadable entries are removed and count as a miss.
+    """
+    path = os.path.join(import_cache_dir(), key + ENTRY_SUFFIX)
+    try:
+        with open(path, "rb") as source:
+            data = source.read()
+    except OSError:
+        return None
+    try:
+        cached = decode_import(data)
+    except (ValueError, KeyError):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    # The modification time orders the entries for eviction. Another Blender may have evicted the entry meanwhile
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return cached
+
+
+def store_cached_import(key, model, spans, max_size=DEFAULT_MAX_CACHE_SIZE):
+    """
+    Store an import in the cache, then evict the least recently used entries beyond max_size.
+
+    Args:
+        key (str): Key from import_cache_key.
+        model (DialogModel): The parsed dialog.
+        spans (dict): Node UUID -> (start, end, fingerprint).
+        max_size (int): Total size of the cache in bytes.
+    """
+    directory = import_cache_dir()
+    path = os.path.join(directory, key + ENTRY_SUFFIX)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as target:
+        target.write(encode_import(model, spans))
+    os.replace(temp_path, path)
+    evict_import_cache(max_size, directory)
+
+
+def evict_import_cache(max_size, directory=None):
+    """
+    Remove the least recently used entries until the cache fits in max_size bytes.
+
+    Args:
+        max_size (int): Total size of the cache in bytes.
+        directory (str): Cache directory, import_cache_dir() when None.
+
+    Returns:
+        int: Number of removed entries.
+    """
+    directory = directory or import_cache_dir()
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(ENTRY_SUFFIX):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    entries.sort(reverse=True)
+
+    removed = 0
+    total = 0
+    for _, size, path in entries:
+        total += size
+        if total > max_size:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+    return removed
@@ -1,15 +1,27 @@
 import os
+import threading
+import time
 import uuid
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import bpy
 from bpy.types import Operator
 from bpy_extras.io_utils import ImportHelper
 
-from .import_utils import (initialize_node_tree, process_editor_data,
-                           populate_handles_texts, populate_flags, populate_roll_node)
-from .nodes import DialogueNodeTree, NestedDialogNode
-from .xml_attr_utils import (get_boolean_attribute, get_int_attribute, get_string_attribute)
+from .import_utils import (import_settings, load_localisation_data, create_node_tree, new_node_tree,
+                           materialise_dialog_model_steps, materialise_node, update_node, merge_table,
+                           source_node_spans, stamp_source_spans, DIGEST_KEY)
+from .import_cache import import_cache_key, load_cached_import, store_cached_import
+from .dialog_parser import (collect_tagtext_handles, load_dialog_document, parse_dialog_model,
+                            parse_dialog_model_streamed, check_cancelled)
+from .lsf_reader import is_lsf_file
+from .dialog_layout import arrange_nodes, place_new_nodes
+from .dialog_model import JumpRecord, AddressedSpeakerRecord, SpeakerRecord
+from .nodes import DialogueNodeTree, NestedDialogNode, BULK_LINKING_TREES
+from .uuid_index import uuid_index, store_uuid_index, tree_changed, node_changed
+from .dialog_log import create_log
+from .perf import create_metrics
 
 
 class AddSpeakerLinkingEntryOperator(bpy.types.Operator):
@@ -24,6 +36,7 @@ class AddSpeakerLinkingEntryOperator(bpy.types.Operator):
             max_value = max([entry.value for entry in node.SpeakerLinkingEntry], default=-1)
             new_entry.key = max_key + 1
             new_entry.value = max_value + 1
+            node_changed(node)
         return {'FINISHED'}
 
 
@@ -37,6 +50,7 @@ class RemoveSpeakerLinkingEntryOperator(bpy.types.Operator):
         node = context.active_node
         if isinstance(node, NestedDialogNode):
             node.SpeakerLinkingEntry.remove(self.index)
+            node_changed(node)
         return {'FINISHED'}
 
 class AddDefaultSpeakerOperator(bpy.types.Operator):
@@ -262,6 +276,7 @@ class AddHandleTextOperator(bpy.types.Operator):
             item = node.handles_texts.add()
             item.handle = ""
             item.text = ""
+            node_changed(node)
             self.report({'INFO'}, f"Added new Handle-Text pair to node: {node.name}")
         else:
             self.report({'ERROR'}, "Node constructor type does not support handles and texts.")
@@ -293,6 +308,7 @@ class RemoveHandleTextOperator(bpy.types.Operator):
 
         if hasattr(node, "handles_texts") and 0 <= self.index < len(node.handles_texts):
             node.handles_texts.remove(self.index)
+            node_changed(node)
             self.report({'INFO'}, f"Removed Handle-Text pair at index {self.index}.")
         else:
             self.report({'ERROR'}, f"Invalid index or node does not support handles and texts")
@@ -337,6 +353,7 @@ class AddSetFlagOperator(bpy.types.Operator):
             new_flag = node.SetFlags.add()
             new_flag.name = f""
             new_flag.is_true = False
+            node_changed(node)
         return {'FINISHED'}
 
 class RemoveSetFlagOperator(bpy.types.Operator):
@@ -350,6 +367,7 @@ class RemoveSetFlagOperator(bpy.types.Operator):
         node = context.space_data.node_tree.nodes.get(self.node_name)
         if node and hasattr(node, "SetFlags"):
             node.SetFlags.remove(self.index)
+            node_changed(node)
         return {'FINISHED'}
 
 
@@ -365,6 +383,7 @@ class AddCheckFlagOperator(bpy.types.Operator):
             new_flag = node.CheckFlags.add()
             new_flag.name = f""
             new_flag.is_true = False
+            node_changed(node)
         return {'FINISHED'}
 
 class RemoveCheckFlagOperator(bpy.types.Operator):
@@ -378,510 +397,534 @@ class RemoveCheckFlagOperator(bpy.types.Operator):
         node = context.space_data.node_tree.nodes.get(self.node_name)
         if node and hasattr(node, "CheckFlags"):
             node.CheckFlags.remove(self.index)
+            node_changed(node)
         return {'FINISHED'}
 
 
 class ImportDialogueXML(Operator, ImportHelper):
     bl_idname = "node.import_dialogue_xml"
     bl_label = "Import Dialogue XML"
-    bl_description = "Import dialogue nodes from an XML file and generate a node tree"
+    bl_description = "Import dialogue nodes from an XML (LSX) or DialogsBinary LSF file and generate a node tree"
     filename_ext = ".xml"
-    
+    filter_glob: bpy.props.StringProperty(default="*.xml;*.lsx;*.lsf", options={'HIDDEN'})
+
+    streaming: bpy.props.BoolProperty(
+        name="Streaming Import",
+        description="Read the file node by node and release each node as soon as it is imported. "
+                    "Keeps memory use flat on very large dialogs",
+        default=False
+    )
+    arrange: bpy.props.BoolProperty(
+        name="Arrange Nodes",
+        description="Lay the imported nodes out in columns starting from the root nodes",
+        default=True
+    )
+    merge: bpy.props.BoolProperty(
+        name="Merge Into Current Tree",
+        description="Update the dialogue tree open in the editor, matching nodes by UUID. Only nodes and links "
+                    "that differ from the file are touched, including edits made in Blender, and existing nodes "
+                    "keep their location",
+        default=False
+    )
+
+    # Set by invoke: imports started from the file browser run modal, scripts calling execute block
+    use_modal: bpy.props.BoolProperty(default=False, options={'HIDDEN', 'SKIP_SAVE'})
+
     def __init__(self):
         # Initiliase maps as instance variables
         self.node_map = {}
         self.parent_child_map = {}
 
+    def invoke(self, context, event):
+        self.use_modal = not bpy.app.background
+        return ImportHelper.invoke(self, context, event)
+
     def execute(self, context):
-        log_entries = []
-        try:
-            # Parse the XML file
-            tree = ET.parse(self.filepath)
-            root = tree.getroot()
-
-            # Initiliase node tree
-            node_tree, localisation_data = initialize_node_tree(context, root, log_entries)
-
-            # Log the global attributes assignment
-            self.report(
-                {'INFO'},
-                f"Imported Dialogue Tree with UUID: {node_tree.UUID}, Category: {node_tree.category}, Timeline ID: {node_tree.TimelineId}"
-            )
-            
-            # Handle Jump nodes
-            parse_jump_nodes(root, node_tree, self.node_map, self.parent_child_map, log_entries)
-            
-            # Handle Roll nodes
-            parse_roll_nodes(root, node_tree, localisation_data, self.node_map, self.parent_child_map, log_entries)
-
-            # Handle Roll Result nodes
-            parse_rollresult_nodes(root, node_tree, self.node_map, self.parent_child_map, log_entries)
-
-            # Handle Alias nodes
-            parse_alias_nodes(root, node_tree, self.node_map, self.parent_child_map, log_entries)
-
-            # Handle Visual State nodes
-            parse_visualstate_nodes(root, node_tree, self.node_map, self.parent_child_map, log_entries)
-
-            #Handle Nested Dialog nodes
-            parse_nesteddialog_nodes(root, node_tree, self.node_map, self.parent_child_map, log_entries)
-
-            #Handle Trade nodes
-            parse_trade_nodes(root, node_tree, self.node_map, self.parent_child_map, log_entries)
-
-            # Handle Dialogue Line nodes
-            parse_dialogue_line_nodes(root, node_tree, localisation_data, self.node_map, self.parent_child_map, log_entries)
-
-            # Process ValidatedFlags (what do they do?)
-            process_validated_flags(node_tree, self.filepath, log_entries)
-            
-            # Link and connect nodes
-            link_nodes(node_tree, self.node_map, self.parent_child_map, log_entries)
-            
-            # Save logs to the blend file directory
-            blend_dir = os.path.dirname(bpy.data.filepath) if bpy.data.filepath else os.getcwd()
-            log_path = os.path.join(blend_dir, "dialogue_import_log.txt")
-            with open(log_path, "w", encoding="utf-8") as log_file:
-                log_file.write("\n".join(log_entries))
+        if self.use_modal:
+            return self.start_modal(context)
 
-            self.report({'INFO'}, f"Dialogue imported successfully! Log saved to: {log_path}")
+        log = create_log(context)
+        metrics = create_metrics(context, "Import", self.filepath)
+        try:
+            # Parse the XML into a DialogModel, then create the Blender nodes from it
+            model, spans = parse_dialog_source(self.filepath, self.streaming, import_settings(context), log, metrics)
+            node_tree = self.merge_target(context.space_data)
+            if node_tree is not None:
+                self.merge_into(node_tree, model, log, metrics)
+            else:
+                node_tree = create_node_tree(context)
+                build_node_tree(model, node_tree, self.node_map, self.parent_child_map, log, arrange=self.arrange,
+                                metrics=metrics)
+                self.report_imported(node_tree)
+            self.finish_import(node_tree, spans, log, metrics)
             return {'FINISHED'}
 
         except Exception as e:
+            metrics.finish(log, completed=False)
             self.report({'ERROR'}, f"Failed to import dialogue XML: {str(e)}")
             return {'CANCELLED'}
 
-# ###### IMPORT FUNCTIONS FOR THE IMPORT OPERATOR ######
-#Helper function to get children of nodes for connections
-def extract_children(node, log_entries):
-    children_uuids = []
-
-    # Directly handle <node id="child">
-    for child in node.findall(".//node[@id='child']"):
-        child_uuid_element = child.find("./attribute[@id='UUID']")
-        if child_uuid_element is not None:
-            child_uuid = child_uuid_element.attrib.get('value', '')
-            if child_uuid:
-                children_uuids.append(child_uuid)
-                log_entries.append(f"Extracted child UUID: {child_uuid}")
-            else:
-                log_entries.append(f"Child node missing UUID: {ET.tostring(child, encoding='unicode')}")
+    # The open dialogue tree when merging into it, else None
+    def merge_target(self, space):
+        node_tree = space.node_tree if self.merge else None
+        if node_tree is not None and node_tree.bl_idname == "DialogueNodeTree":
+            return node_tree
+        return None
+
+    def merge_into(self, node_tree, model, log, metrics):
+        with metrics.phase("merging nodes"):
+            updated, added, removed = merge_node_tree(model, node_tree, log)
+        self.report(
+            {'INFO'},
+            f"Merged into Dialogue Tree with UUID: {node_tree.UUID}: {updated} nodes updated, {added} added, {removed} removed"
+        )
+
+    def report_imported(self, node_tree):
+        # Log the global attributes assignment
+        self.report(
+            {'INFO'},
+            f"Imported Dialogue Tree with UUID: {node_tree.UUID}, Category: {node_tree.category}, Timeline ID: {node_tree.TimelineId}"
+        )
+
+    def finish_import(self, node_tree, spans, log, metrics):
+        with metrics.phase("stamping source spans"):
+            stamp_source_spans(node_tree, self.filepath, spans, log)
+        metrics.count("nodes", len(node_tree.nodes))
+        metrics.count("links", len(node_tree.links))
+        metrics.finish(log)
+
+        # Save logs to the blend file directory
+        blend_dir = os.path.dirname(bpy.data.filepath) if bpy.data.filepath else os.getcwd()
+        log_path = os.path.join(blend_dir, "dialogue_import_log.txt")
+        if log.write(log_path):
+            self.report({'INFO'}, f"Dialogue imported successfully! Log saved to: {log_path}")
         else:
-            log_entries.append(f"Malformed child node: {ET.tostring(child, encoding='unicode')}")
-
-    # Handle additional layers of <node id='children'>
-    for nested_children in node.findall(".//node[@id='children']/children"):
-        nested_uuids = extract_children(nested_children, log_entries)
-        children_uuids.extend(nested_uuids)
-
-    return children_uuids
-
-#Function: parse jump nodes
-def parse_jump_nodes(root, node_tree, node_map, parent_child_map, log_entries):
-
-    for xml_node in root.findall(".//node[@id='node']"):
-        try:
-            # Extract UUID and constructor attributes
-            uuid_elem = xml_node.find("./attribute[@id='UUID']")
-            constructor_elem = xml_node.find("./attribute[@id='constructor']")
-
-            if uuid_elem is None or constructor_elem is None:
-                log_entries.append(
-                    f"Skipping node due to missing UUID or constructor. XML: {ET.tostring(xml_node, encoding='unicode')}")
-                continue
-
-            uuid = uuid_elem.attrib.get('value', '')
-            constructor = constructor_elem.attrib.get('value', '')
-
-            if constructor == 'Jump':
-                # Handle Jump nodes specifically
-                jumptarget_elem = xml_node.find("./attribute[@id='jumptarget']")
-                jumptarget_uuid = jumptarget_elem.attrib.get('value', '') if jumptarget_elem is not None else None
-
-                if not jumptarget_uuid:
-                    log_entries.append(f"Jump node {uuid} missing jumptarget.")
-                    continue
-
-                # Extract jumptargetpoint attribute
-                jumptargetpoint_elem = xml_node.find("./attribute[@id='jumptargetpoint']")
-                jumptargetpoint = int(
-                    jumptargetpoint_elem.attrib.get('value', '1')) if jumptargetpoint_elem is not None else 1
-
-                jump_node = node_tree.nodes.new("DialogueJumpNode")
-                jump_node.uuid = uuid
-                jump_node.jumptarget = jumptarget_uuid
-                jump_node.jumptargetpoint = jumptargetpoint
-                jump_node.location = (0, 0)
-
-                # Track node in the node map
-                node_map[uuid] = jump_node
-                parent_child_map[uuid] = [jumptarget_uuid]
-                log_entries.append(f"Created Jump node: {uuid} with jumptarget {jumptarget_uuid}")
-
-        except Exception as e:
-            log_entries.append(f"Error processing Jump node: {str(e)}")
-
-# Function: parse Dialogue Nodes (Greeting, Question, Answer, Cinematic)
-def parse_dialogue_line_nodes(root, node_tree, localisation_data, node_map, parent_child_map, log_entries):
-    for xml_node in root.findall(".//node[@id='node']"):
-        try:
-            # Extract UUID and constructor attributes
-            uuid_elem = xml_node.find("./attribute[@id='UUID']")
-            constructor_elem = xml_node.find("./attribute[@id='constructor']")
-            if uuid_elem is None or constructor_elem is None:
-                log_entries.append(
-                    f"Skipping node due to missing UUID or constructor. XML: {ET.tostring(xml_node, encoding='unicode')}")
-                continue
-
-            uuid = uuid_elem.attrib.get('value', '')
-            constructor = constructor_elem.attrib.get('value', '')
-            log_entries.append(f"Inspecting Dialogue Line node: UUID={uuid}, Constructor={constructor}")
-
-            # Check if the node is a Dialogue Line node
-            if constructor in ('TagGreeting', 'TagQuestion', 'TagAnswer', 'TagCinematic',):
-                try:
-                    # Create Dialogue Line Node
-                    dialogue_node = node_tree.nodes.new("DialogueLineNode")
-                    dialogue_node.width = 400
-                    dialogue_node.location = (0, 0)
-                    dialogue_node.constructor = constructor
-                    dialogue_node.uuid = uuid
-                    dialogue_node.ShowOnce = get_boolean_attribute(xml_node, 'ShowOnce', default=False)
-                    dialogue_node.groupid = get_string_attribute(xml_node, 'GroupID', default="")
-                    dialogue_node.groupindex = get_int_attribute(xml_node, 'GroupIndex', default=0)
-                    dialogue_node.root = get_boolean_attribute(xml_node, 'Root', default=False)
-                    dialogue_node.endnode = get_boolean_attribute(xml_node, 'endnode', default=False)
-                    dialogue_node.speaker = get_int_attribute(xml_node, 'speaker', default=0)
-                    dialogue_node.approvalratingid = get_string_attribute(xml_node, 'ApprovalRatingID', default="")
-
-                    # Parse editorData for Cinematic Node Context
-                    process_editor_data(xml_node, dialogue_node, log_entries)
-
-                    # Populate handles, lineids and texts
-                    populate_handles_texts(xml_node, dialogue_node, localisation_data, log_entries)
-
-                    # Populate setflags and checkflags
-                    populate_flags(xml_node, dialogue_node, log_entries)
-
-                    # Track node relationships
-                    node_map[uuid] = dialogue_node
-                    parent_child_map[uuid] = extract_children(xml_node, log_entries)
-                    log_entries.append(f"Processed Dialogue Line node: UUID={uuid}")
-
-                except Exception as e:
-                    log_entries.append(f"Error processing node: {str(e)}")
-        except Exception as e:
-            log_entries.append(f"Error processing Dialogue Line node: {str(e)}")
-
-
-# Function: parse Roll nodes
-def parse_roll_nodes(root, node_tree, localisation_data, node_map, parent_child_map, log_entries):
-    for xml_node in root.findall(".//node[@id='node']"):
-        try:
-            # Extract UUID and constructor
-            uuid_elem = xml_node.find("./attribute[@id='UUID']")
-            constructor_elem = xml_node.find("./attribute[@id='constructor']")
-
-            if uuid_elem is None or constructor_elem is None:
-                log_entries.append(
-                    f"Skipping node due to missing UUID or constructor. XML: {ET.tostring(xml_node, encoding='unicode')}")
-                continue
-
-            uuid = uuid_elem.attrib.get('value', '').strip()
-            constructor = constructor_elem.attrib.get('value', '').strip()
-
-            # Handle Roll nodes
-            if constructor in ('ActiveRoll', 'PassiveRoll'):
-                log_entries.append(f"Processing Roll node: UUID={uuid}, Constructor={constructor}")
-
-                # Create and populate the Roll node
-                roll_node = node_tree.nodes.new("DialogueRollNode")
-                approvalratingid = get_string_attribute(xml_node, 'ApprovalRatingID', default="")
-                roll_node.approvalratingid = approvalratingid
-                populate_roll_node(xml_node, roll_node, uuid, log_entries)
-                # Parse editorData for Cinematic Node Context
-                process_editor_data(xml_node, roll_node, log_entries)
-                # Populate handles, lineids and texts + flags
-                populate_handles_texts(xml_node, roll_node, localisation_data, log_entries)
-                populate_flags(xml_node, roll_node, log_entries)
-
-                # Track node relationships
-                node_map[uuid] = roll_node
-                parent_child_map[uuid] = extract_children(xml_node, log_entries)
-                log_entries.append(f"Processed Roll node: UUID={uuid}, Constructor={constructor_elem}")
-
-        except Exception as e:
-            log_entries.append(f"Error processing Roll node: {str(e)}")
-
-# Function: parse RollResult nodes
-def parse_rollresult_nodes(root, node_tree, node_map, parent_child_map, log_entries):
-    for xml_node in root.findall(".//node[@id='node']"):
-        try:
-            # Extract UUID and constructor attributes
-            uuid_elem = xml_node.find("./attribute[@id='UUID']")
-            constructor_elem = xml_node.find("./attribute[@id='constructor']")
-
-            if uuid_elem is None or constructor_elem is None:
-                log_entries.append(
-                    f"Skipping node due to missing UUID or constructor. XML: {ET.tostring(xml_node, encoding='unicode')}")
-                continue
-
-            uuid = uuid_elem.attrib.get('value', '')
-            constructor = constructor_elem.attrib.get('value', '')
-            if constructor == 'RollResult':
-                log_entries.append(f"Processing RollResult node: UUID={uuid}, Constructor={constructor}")
-                # Create and populate the RollResult node
-                rollresult_node = node_tree.nodes.new("DialogueRollResultNode")
-                rollresult_node.Success = get_boolean_attribute(xml_node, 'Success', default=False)
-                populate_flags(xml_node, rollresult_node, log_entries)
-                # Track node relationships
-                node_map[uuid] = rollresult_node
-                parent_child_map[uuid] = extract_children(xml_node, log_entries)
-                log_entries.append(f"Processed Rollresult node: UUID={uuid}, Constructor={constructor_elem}")
-
-        except Exception as e:
-            log_entries.append(f"Error processing RollResult node: {str(e)}")
+            self.report({'INFO'}, "Dialogue imported successfully!")
+
+    # ###### MODAL IMPORT ######
+    # The file is parsed on a worker thread, then the nodes are created, linked and arranged in time slices on
+    # timer events. The UI stays responsive, shows the progress and Esc cancels, removing the half built tree
+    def start_modal(self, context):
+        self.log = create_log(context)
+        self.metrics = create_metrics(context, "Import", self.filepath)
+        self.space = context.space_data
+        self.previous_tree = self.space.node_tree
+        self.node_tree = None
+        self.steps = None
+        self.spans = None
+        # Set on cancel, the worker stops parsing at the next node instead of finishing the file
+        self.cancel_event = threading.Event()
+        IMPORT_CANCEL_EVENTS.add(self.cancel_event)
+        self.parse_future = import_executor().submit(
+            parse_dialog_source, self.filepath, self.streaming, import_settings(context), self.log, self.metrics,
+            self.cancel_event)
+
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(MODAL_TIMER_INTERVAL, window=context.window)
+        window_manager.modal_handler_add(self)
+        context.workspace.status_text_set("Importing dialog: parsing the file (Esc to cancel)")
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.cancel(context)
+            self.report({'INFO'}, "Dialogue import cancelled")
+            return {'CANCELLED'}
+        if event.type != 'TIMER' or event.timer is not self.timer:
+            return {'PASS_THROUGH'}
 
-# Function: parse Alias Nodes
-def parse_alias_nodes(root, node_tree, node_map, parent_child_map, log_entries):
-    for xml_node in root.findall(".//node[@id='node']"):
         try:
-            # Extract UUID and constructor attributes
-            uuid_elem = xml_node.find("./attribute[@id='UUID']")
-            constructor_elem = xml_node.find("./attribute[@id='constructor']")
-            if uuid_elem is None or constructor_elem is None:
-                log_entries.append(
-                    f"Skipping node due to missing UUID or constructor. XML: {ET.tostring(xml_node, encoding='unicode')}")
-                continue
-            uuid = uuid_elem.attrib.get('value', '')
-            constructor = constructor_elem.attrib.get('value', '')
-            # Check if the node is an Alias node
-            if constructor == 'Alias':
-                # Create Alias Node
-                alias_node = node_tree.nodes.new("DialogueAliasNode")
-                alias_node.width = 400
-                alias_node.location = (0, 0)
-                alias_node.constructor = constructor
-                alias_node.uuid = uuid
-                alias_node.root = get_boolean_attribute(xml_node, 'Root', default=False)
-                alias_node.greeting = get_boolean_attribute(xml_node, 'Greeting', default=False)
-                alias_node.endnode = get_boolean_attribute(xml_node, 'endnode', default=False)
-                alias_node.speaker = get_int_attribute(xml_node, 'speaker', default=0)
-                alias_node.sourcenode = get_string_attribute(xml_node, 'SourceNode', default="")
-                # Parse editorData for Cinematic Node Context
-                process_editor_data(xml_node, alias_node, log_entries)
-                # Populate setflags and checkflags
-                populate_flags(xml_node, alias_node, log_entries)
-                # Track node relationships
-                node_map[uuid] = alias_node
-                parent_child_map[uuid] = extract_children(xml_node, log_entries)
-                log_entries.append(f"Processed Alias node: UUID={uuid}, Constructor={constructor_elem}")
+            if self.steps is None:
+                if not self.parse_future.done():
+                    return {'PASS_THROUGH'}
+                model, self.spans = self.parse_future.result()
+                node_tree = self.merge_target(self.space)
+                if node_tree is not None:
+                    # A merge only touches the changed nodes and is applied in one go, nothing is left half done
+                    self.merge_into(node_tree, model, self.log, self.metrics)
+                    self.finish_import(node_tree, self.spans, self.log, self.metrics)
+                    self.end_modal(context)
+                    return {'FINISHED'}
+                self.node_tree = new_node_tree()
+                self.space.node_tree = self.node_tree
+                self.steps = self.metrics.timed_steps(build_node_tree_steps(
+                    model, self.node_tree, self.node_map, self.parent_child_map, self.log, arrange=self.arrange))
+                self.stage = None
+
+            deadline = time.perf_counter() + MODAL_TIME_SLICE
+            for stage, done, total in self.steps:
+                if stage != self.stage:
+                    self.stage = stage
+                    context.window_manager.progress_end()
+                    context.window_manager.progress_begin(0, max(total, 1))
+                if time.perf_counter() >= deadline:
+                    context.window_manager.progress_update(done)
+                    context.workspace.status_text_set(f"Importing dialog: {stage} {done}/{total} (Esc to cancel)")
+                    return {'RUNNING_MODAL'}
+
+            self.steps = None
+            self.report_imported(self.node_tree)
+            self.finish_import(self.node_tree, self.spans, self.log, self.metrics)
+            self.end_modal(context)
+            return {'FINISHED'}
 
         except Exception as e:
-            log_entries.append(f"Error processing Dialogue Line node: {str(e)}")
+            self.cancel(context)
+            self.report({'ERROR'}, f"Failed to import dialogue XML: {str(e)}")
+            return {'CANCELLED'}
 
-# Function: parse Visual State nodes
-def parse_visualstate_nodes(root, node_tree, node_map, parent_child_map, log_entries):
-    for xml_node in root.findall(".//node[@id='node']"):
+    # Roll back: stop the work, remove the tree being built and show the tree the editor showed before
+    def cancel(self, context):
+        self.cancel_event.set()
+        self.parse_future.cancel()
+        self.metrics.finish(self.log, completed=False)
+        if self.steps is not None:
+            self.steps.close()
+            self.steps = None
+        if self.node_tree is not None:
+            self.space.node_tree = self.previous_tree
+            bpy.data.node_groups.remove(self.node_tree)
+            self.node_tree = None
+        self.end_modal(context)
+
+    def end_modal(self, context):
+        IMPORT_CANCEL_EVENTS.discard(self.cancel_event)
+        context.window_manager.event_timer_remove(self.timer)
+        context.window_manager.progress_end()
+        context.workspace.status_text_set(None)
+
+# Worker thread of the modal import, parsing never touches bpy. Started on the first modal import and shut down
+# on unregister, so the thread does not outlive the addon
+IMPORT_EXECUTOR = None
+# Cancel events of the modal imports in progress, all set on unregister
+IMPORT_CANCEL_EVENTS = set()
+# Seconds between modal import timer events and seconds of node building per event
+MODAL_TIMER_INTERVAL = 0.001
+MODAL_TIME_SLICE = 0.05
+
+#Function: the executor of the modal import worker thread, created when first needed
+def import_executor():
+    global IMPORT_EXECUTOR
+    if IMPORT_EXECUTOR is None:
+        IMPORT_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dialogue-import")
+    return IMPORT_EXECUTOR
+
+#Function: parse a dialog file into a DialogModel and the source spans of its nodes. Files opened before come from
+# the import cache, keyed by their contents, without parsing or localisation lookups.
+# settings come from import_settings, nothing here touches bpy so it can run on a worker thread.
+# Setting cancel_event (a threading.Event, may be None) raises ParseCancelled at the next node, nothing gets cached
+def parse_dialog_source(filepath, streaming, settings, log, metrics, cancel_event=None):
+    use_cache = settings['use_import_cache']
+    if use_cache:
+        with metrics.phase("import cache lookup"):
+            key = import_cache_key(filepath, settings['localisation_path'])
+            cached = load_cached_import(key)
+        if cached is not None:
+            log.summary("Loaded %s from the import cache.", filepath)
+            return cached
+
+    # LSF files are binary and always read whole
+    if streaming and not is_lsf_file(filepath):
+        # Stream the document and build each record when the end tag of its XML node is read.
+        # Only the records outlive an XML node, so memory stays flat regardless of file size.
+        with metrics.phase("loading localisation"):
+            handles = collect_tagtext_handles(filepath, cancel_event)
+            localisation_data = load_localisation_data(settings, handles, log, cancel_event)
+        check_cancelled(cancel_event)
+        with metrics.phase("parsing"):
+            model = parse_dialog_model_streamed(filepath, localisation_data, log, cancel_event)
+    else:
+        # Load the whole document and parse it in a single pass over the nodes section
+        with metrics.phase("parsing"):
+            root = load_dialog_document(filepath)
+        check_cancelled(cancel_event)
+        with metrics.phase("loading localisation"):
+            localisation_data = load_localisation_data(settings, collect_tagtext_handles(root), log, cancel_event)
+        check_cancelled(cancel_event)
+        with metrics.phase("parsing"):
+            model = parse_dialog_model(root, localisation_data, log, cancel_event)
+    with metrics.phase("indexing source spans"):
+        spans = source_node_spans(filepath)
+    check_cancelled(cancel_event)
+
+    if use_cache:
         try:
-            # Extract UUID and constructor attributes
-            uuid_elem = xml_node.find("./attribute[@id='UUID']")
-            constructor_elem = xml_node.find("./attribute[@id='constructor']")
-            if uuid_elem is None or constructor_elem is None:
-                log_entries.append(
-                    f"Skipping node due to missing UUID or constructor. XML: {ET.tostring(xml_node, encoding='unicode')}")
-                continue
-            uuid = uuid_elem.attrib.get('value', '')
-            constructor = constructor_elem.attrib.get('value', '')
-            # Check if the node is a Visual State node
-            if constructor == 'Visual State':
-                # Create Visual State Node
-                visualstate_node = node_tree.nodes.new("DialogueVisualStateNode")
-                visualstate_node.width = 400
-                visualstate_node.location = (0, 0)
-                visualstate_node.constructor = constructor
-                visualstate_node.uuid = uuid
-                visualstate_node.groupid = get_string_attribute(xml_node, 'GroupID', default="")
-                visualstate_node.groupindex = get_int_attribute(xml_node, 'GroupIndex', default=0)
-                # Parse editorData for Cinematic Node Context
-                process_editor_data(xml_node, visualstate_node, log_entries)
-                # Populate setflags and checkflags
-                populate_flags(xml_node, visualstate_node, log_entries)
-                # Track node relationships
-                node_map[uuid] = visualstate_node
-                parent_child_map[uuid] = extract_children(xml_node, log_entries)
-                log_entries.append(f"Processed VisualState node: UUID={uuid}, Constructor={constructor_elem}")
-        except Exception as e:
-            log_entries.append(f"Error processing Visual State node: {str(e)}")
+            with metrics.phase("import cache store"):
+                store_cached_import(key, model, spans, settings['import_cache_size'] << 20)
+        except OSError as e:
+            log.summary("Could not store %s in the import cache: %s", filepath, e)
+    return model, spans
 
-# Function: parse Nested Dialog nodes
-def parse_nesteddialog_nodes(root, node_tree, node_map, parent_child_map, log_entries):
-    for xml_node in root.findall(".//node[@id='node']"):
-        try:
-            # Extract UUID and constructor attributes
-            uuid_elem = xml_node.find("./attribute[@id='UUID']")
-            constructor_elem = xml_node.find("./attribute[@id='constructor']")
-            if uuid_elem is None or constructor_elem is None:
-                log_entries.append(
-                    f"Skipping node due to missing UUID or constructor. XML: {ET.tostring(xml_node, encoding='unicode')}")
-                continue
-            uuid = uuid_elem.attrib.get('value', '')
-            constructor = constructor_elem.attrib.get('value', '')
-            # Check if the node is a Nested Dialog node
-            if constructor == 'Nested Dialog':
-                # Create Nested Dialog Node
-                nesteddialog_node = node_tree.nodes.new("NestedDialogNode")
-                nesteddialog_node.width = 400
-                nesteddialog_node.location = (0, 0)
-                nesteddialog_node.constructor = constructor
-                nesteddialog_node.uuid = uuid
-                nesteddialog_node.NestedDialogNodeUUID = get_string_attribute(xml_node, 'NestedDialogNodeUUID',
-                                                                              default="")
-                nesteddialog_node.root = get_boolean_attribute(xml_node, 'root', default=False)
-                nesteddialog_node.endnode = get_boolean_attribute(xml_node, 'endnode', default=False)
-
-                # Parse Speaker Linking Entries
-                speaker_linking_node = xml_node.find(".//node[@id='SpeakerLinking']")
-                if speaker_linking_node:
-                    for entry_node in speaker_linking_node.findall(".//node[@id='SpeakerLinkingEntry']"):
-                        entry = nesteddialog_node.SpeakerLinkingEntry.add()
-                        entry.key = get_int_attribute(entry_node, 'Key')
-                        entry.value = get_int_attribute(entry_node, 'Value')
-                # Populate setflags and checkflags
-                populate_flags(xml_node, nesteddialog_node, log_entries)
-                # Parse editorData for Cinematic Node Context
-                process_editor_data(xml_node, nesteddialog_node, log_entries)
-
-                # Track node relationships
-                node_map[uuid] = nesteddialog_node
-                parent_child_map[uuid] = extract_children(xml_node, log_entries)
-                log_entries.append(f"Processed NestedDialog node: UUID={uuid}, Constructor={constructor_elem}")
-        except Exception as e:
-            log_entries.append(f"Error processing Nested Dialog node: {str(e)}")
+# ###### IMPORT FUNCTIONS FOR THE IMPORT OPERATOR ######
+#Function: fill a node tree from a DialogModel: create the nodes, store ValidatedFlags, link and arrange the nodes.
+# metrics (an OperationMetrics) gets the time of every stage
+def build_node_tree(model, node_tree, node_map, parent_child_map, log, arrange=True, metrics=None):
+    steps = build_node_tree_steps(model, node_tree, node_map, parent_child_map, log, arrange)
+    if metrics is not None:
+        steps = metrics.timed_steps(steps)
+    for _ in steps:
+        pass
+
+#Function: build_node_tree one step at a time, yields (stage, done, total) after every node and link
+def build_node_tree_steps(model, node_tree, node_map, parent_child_map, log, arrange=True):
+    total = len(model.nodes)
+    for done in materialise_dialog_model_steps(model, node_tree, node_map, parent_child_map, log):
+        yield "creating nodes", done, total
+
+    # Store ValidatedFlags collected during the node walk (what do they do?)
+    process_validated_flags(node_tree, model.validated_flags, log)
+
+    # Link and connect nodes, the GroupID chains are linked along with the children
+    children_map = linked_children(model.nodes)
+    for done, total in link_nodes_steps(node_tree, node_map, children_map, log):
+        yield "linking nodes", done, total
+
+    # Lay the nodes out in columns starting from the RootNodes, links from Jump nodes go backwards
+    if arrange:
+        yield "arranging nodes", 0, 1
+        root_uuids = model.RootNodes or [record.uuid for record in model.nodes if getattr(record, 'root', False)]
+        jump_uuids = {record.uuid for record in model.nodes if isinstance(record, JumpRecord)}
+        arrange_nodes(node_map, children_map, root_uuids, jump_uuids)
+        log.summary("Arranged %s nodes.", len(node_map))
+
+    # Remember what every node was imported from, so an export can copy the nodes that did not change verbatim
+    stamp_digests(model, node_map, children_map)
+    # node_map already is the UUID index of the new tree
+    store_uuid_index(node_tree, node_map)
+
+#Function: merge a DialogModel into an existing node tree by node UUID. Every node is compared with its current state,
+# so edits made in Blender since the last import are reverted to the file too. Changed nodes only get the differing
+# properties set, nodes and links are added and removed as needed and existing nodes keep their location. Extra nodes
+# sharing a UUID with an earlier node are removed. Returns (updated, added, removed) counts
+def merge_node_tree(model, node_tree, log):
+    for name in ('category', 'UUID', 'TimelineId'):
+        value = getattr(model, name)
+        if value is not None and getattr(node_tree, name) != value:
+            setattr(node_tree, name, value)
+    merge_table(node_tree.DefaultAddressedSpeakers, model.DefaultAddressedSpeakers, AddressedSpeakerRecord)
+    merge_table(node_tree.Speakers, model.Speakers, SpeakerRecord)
+
+    # Nodes left in existing after the walk are not in the model any more
+    index = uuid_index(node_tree)
+    existing = dict(index.nodes)
+    duplicates = [(node_uuid, node) for node_uuid, nodes in index.duplicates.items() for node in nodes[1:]]
+
+    children_map = linked_children(model.nodes)
+    node_map = {}
+    updated_uuids = set()
+    created_uuids = set()
+    added_uuids = []
+    for record in model.nodes:
+        digest = record.digest(children_map[record.uuid])
+        blender_node = existing.pop(record.uuid, None)
+        if blender_node is not None and blender_node.bl_idname == record.bl_idname:
+            node_map[record.uuid] = blender_node
+            changed_fields = update_node(record, blender_node)
+            if changed_fields:
+                updated_uuids.add(record.uuid)
+                log.debug("Updated node %s: %s", record.uuid, ", ".join(changed_fields))
+            blender_node[DIGEST_KEY] = digest
+            continue
 
-# Function: parse Trade nodes
-def parse_trade_nodes(root, node_tree, node_map, parent_child_map, log_entries):
-    for xml_node in root.findall(".//node[@id='node']"):
+        location = None
+        if blender_node is not None:
+            # The node type changed: replace the node but keep its place
+            location = tuple(blender_node.location)
+            node_tree.nodes.remove(blender_node)
+            # The tree update runs later, a removal and a creation leave the node count of the index unchanged
+            tree_changed(node_tree)
         try:
-            # Extract UUID and constructor attributes
-            uuid_elem = xml_node.find("./attribute[@id='UUID']")
-            constructor_elem = xml_node.find("./attribute[@id='constructor']")
-            if uuid_elem is None or constructor_elem is None:
-                log_entries.append(
-                    f"Skipping node due to missing UUID or constructor. XML: {ET.tostring(xml_node, encoding='unicode')}")
-                continue
-            uuid = uuid_elem.attrib.get('value', '')
-            constructor = constructor_elem.attrib.get('value', '')
-            # Check if the node is a Trade node
-            if constructor == 'Trade':
-                # Create Trade Node
-                trade_node = node_tree.nodes.new("TradeNode")
-                trade_node.width = 400
-                trade_node.location = (0, 0)
-                trade_node.constructor = constructor
-                trade_node.uuid = uuid
-                trade_node.speaker = get_int_attribute(xml_node, 'speaker', default=0)
-                trade_node.trademode = get_int_attribute(xml_node, 'TradeMode', default=1)
-                # Populate setflags and checkflags
-                populate_flags(xml_node, trade_node, log_entries)
-                # Track node relationships
-                node_map[uuid] = trade_node
-                parent_child_map[uuid] = extract_children(xml_node, log_entries)
-                log_entries.append(f"Processed Trade node: UUID={uuid}, Constructor={constructor_elem}")
+            blender_node = materialise_node(record, node_tree)
         except Exception as e:
-            log_entries.append(f"Error processing Trade node: {str(e)}")
-
-#Function: process ValidatedFlags sections
-def process_validated_flags(node_tree, filepath, log_entries):
-    tree = ET.parse(filepath)
-    root = tree.getroot()
-    for xml_node in root.findall(".//node[@id='node']"):
-        uuid_elem = xml_node.find("./attribute[@id='UUID']")
-        if uuid_elem is None:
-            log_entries.append("Skipping node without UUID.")
+            log.summary("Error creating %s %s: %s", record.bl_idname, record.uuid, e)
             continue
-
-        uuid = uuid_elem.attrib.get('value', '').strip()
-
-        # Look for ValidatedFlags subnode
-        validated_flags_node = xml_node.find("./children/node[@id='ValidatedFlags']")
-        if validated_flags_node is not None:
-            validated_has_value_elem = validated_flags_node.find("./attribute[@id='ValidatedHasValue']")
-            if validated_has_value_elem is not None:
-                validated_has_value = validated_has_value_elem.attrib.get('value', 'False') == 'True'
-                # Add the UUID to validated_flags collection, regardless of True/False
-                validated_entry = node_tree.validated_flags.add()
-                validated_entry.uuid = uuid
-                validated_entry.has_value = validated_has_value
-                log_entries.append(
-                    f"Node {uuid} has ValidatedFlags with ValidatedHasValue={validated_has_value}."
-                )
-            else:
-                # If ValidatedFlags exists but ValidatedHasValue is missing
-                log_entries.append(
-                    f"Node {uuid} has ValidatedFlags, but no ValidatedHasValue attribute was found."
-                )
+        finally:
+            tree_changed(node_tree)
+        blender_node[DIGEST_KEY] = digest
+        node_map[record.uuid] = blender_node
+        created_uuids.add(record.uuid)
+        if location is None:
+            added_uuids.append(record.uuid)
         else:
-            # Log that no ValidatedFlags were found for this node
-            log_entries.append(f"No ValidatedFlags found for node {uuid}.")
-
-#Function: connect and link nodes
-def link_nodes(node_tree, node_map, parent_child_map, log_entries):
-    missing_uuids = []
-
-    for parent_uuid, children_uuids in parent_child_map.items():
+            blender_node.location = location
+        log.debug("Added node %s", record.uuid)
+
+    # Nodes left over are gone from the file, their links go with them
+    for node_uuid, blender_node in existing.items():
+        node_tree.nodes.remove(blender_node)
+        tree_changed(node_tree)
+        log.debug("Removed node %s", node_uuid)
+    # Only the first node of a UUID is merged, the file has one node per UUID
+    for node_uuid, blender_node in duplicates:
+        log.summary("Removed node %s, another node has the same UUID %s", blender_node.name, node_uuid)
+        node_tree.nodes.remove(blender_node)
+        tree_changed(node_tree)
+    removed = len(existing) + len(duplicates)
+
+    # The links of unchanged nodes may have been edited in Blender, so every parent is synced
+    updated_uuids |= sync_links(node_tree, node_map, children_map, list(node_map), log)
+    merge_validated_flags(node_tree, model.validated_flags, log)
+    place_new_nodes(added_uuids, node_map, children_map)
+    updated = len(updated_uuids - created_uuids)
+    added = len(created_uuids)
+    log.summary("Merged %s nodes: %s updated, %s added, %s removed.", len(node_map), updated, added, removed)
+    return updated, added, removed
+
+#Function: map every node UUID to the next node in its group (GroupID ordered by GroupIndex)
+def group_successors(records):
+    groups = {}
+    for record in records:
+        group_id = getattr(record, 'groupid', None)
+        if group_id and group_id.strip():
+            groups.setdefault(group_id, []).append(record)
+
+    successors = {}
+    for group in groups.values():
+        group.sort(key=lambda record: record.groupindex)
+        for current, following in zip(group, group[1:]):
+            successors[current.uuid] = following.uuid
+    return successors
+
+#Function: map every node UUID to the child UUIDs it is linked to on import, its group successor comes last
+def linked_children(records):
+    successors = group_successors(records)
+    children_map = {}
+    for record in records:
+        if record.uuid in successors:
+            children_map[record.uuid] = record.children + [successors[record.uuid]]
+        else:
+            children_map[record.uuid] = record.children
+    return children_map
+
+#Function: store the digest of every record on its node
+def stamp_digests(model, node_map, children_map):
+    for record in model.nodes:
+        blender_node = node_map.get(record.uuid)
+        if blender_node is not None:
+            blender_node[DIGEST_KEY] = record.digest(children_map[record.uuid])
+
+#Function: make the links leaving the given nodes match their child UUIDs. Links through reroutes are kept
+# as long as they reach one of the wanted children. Returns the UUIDs of the nodes whose links changed
+def sync_links(node_tree, node_map, children_map, parent_uuids, log):
+    relinked = set()
+    with bulk_linking(node_tree):
+        for parent_uuid in parent_uuids:
+            parent_node = node_map[parent_uuid]
+            wanted = []
+            for child_uuid in dict.fromkeys(children_map[parent_uuid]):
+                if child_uuid in node_map:
+                    wanted.append(child_uuid)
+                else:
+                    log.summary("Missing child node for UUID: %s", child_uuid)
+            wanted_set = set(wanted)
+
+            reached = set()
+            for link in list(parent_node.outputs[0].links):
+                targets = linked_uuids(link.to_node)
+                if targets & wanted_set:
+                    reached |= targets
+                else:
+                    node_tree.links.remove(link)
+                    relinked.add(parent_uuid)
+                    log.debug("Unlinked node: %s -> %s", parent_uuid, ", ".join(sorted(targets)) or link.to_node.name)
+
+            for child_uuid in wanted:
+                if child_uuid not in reached:
+                    node_tree.links.new(parent_node.outputs[0], node_map[child_uuid].inputs[0])
+                    relinked.add(parent_uuid)
+                    log.debug("Linked node: %s -> %s", parent_uuid, child_uuid)
+    return relinked
+
+#Function: UUIDs of the dialogue nodes a node stands for, following reroutes
+def linked_uuids(node):
+    found = set()
+    visited = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.name in visited:
+            continue
+        visited.add(node.name)
+        node_uuid = getattr(node, 'uuid', None)
+        if node_uuid:
+            found.add(node_uuid)
+        elif node.type == 'REROUTE':
+            stack.extend(link.to_node for link in node.outputs[0].links)
+    return found
+
+#Function: store the UUID -> ValidatedHasValue mapping on the node tree
+def process_validated_flags(node_tree, validated_flags, log):
+    for uuid, validated_has_value in validated_flags.items():
+        # Add the UUID to validated_flags collection, regardless of True/False
+        validated_entry = node_tree.validated_flags.add()
+        validated_entry.uuid = uuid
+        validated_entry.has_value = validated_has_value
+    log.summary("Stored ValidatedFlags for %s nodes.", len(validated_flags))
+
+#Function: update the stored UUID -> ValidatedHasValue mapping in place
+def merge_validated_flags(node_tree, validated_flags, log):
+    entries = node_tree.validated_flags
+    for index in reversed(range(len(entries))):
+        if entries[index].uuid not in validated_flags:
+            entries.remove(index)
+
+    stored = {entry.uuid: entry for entry in entries}
+    for uuid, validated_has_value in validated_flags.items():
+        entry = stored.get(uuid)
+        if entry is None:
+            entry = entries.add()
+            entry.uuid = uuid
+            entry.has_value = validated_has_value
+        elif entry.has_value != validated_has_value:
+            entry.has_value = validated_has_value
+    log.summary("Merged ValidatedFlags for %s nodes.", len(validated_flags))
+
+#Function: hold back node update callbacks while the with block links nodes in bulk, then tag the tree for one update
+@contextmanager
+def bulk_linking(node_tree):
+    tree_pointer = node_tree.as_pointer()
+    BULK_LINKING_TREES.add(tree_pointer)
+    try:
+        yield
+    finally:
+        BULK_LINKING_TREES.discard(tree_pointer)
+        node_tree.update_tag()
+
+#Function: connect and link nodes, one link per unique (parent, child) pair.
+# children_map holds the child UUIDs of every node including its GroupID successor (see linked_children).
+# Yields (done, total) link counts after every link
+def link_nodes_steps(node_tree, node_map, children_map, log):
+    pairs = []
+    seen_pairs = set()
+    missing_uuids = set()
+
+    for parent_uuid, children_uuids in children_map.items():
         if parent_uuid not in node_map:
-            log_entries.append(f"Parent node missing in node_map: {parent_uuid}")
+            log.summary("Parent node missing in node_map: %s", parent_uuid)
+            missing_uuids.add(parent_uuid)
+            continue
         for child_uuid in children_uuids:
             if child_uuid not in node_map:
-                log_entries.append(f"Child node missing in node_map: {child_uuid}")
+                log.summary("Child node missing in node_map: %s", child_uuid)
+                missing_uuids.add(child_uuid)
+            elif (parent_uuid, child_uuid) not in seen_pairs:
+                seen_pairs.add((parent_uuid, child_uuid))
+                pairs.append((parent_uuid, child_uuid))
 
     if missing_uuids:
-        log_entries.append(f"Total missing nodes: {len(set(missing_uuids))}")
+        log.summary("Total missing nodes: %s", len(missing_uuids))
 
     # Link nodes
-    for parent_uuid, children_uuids in parent_child_map.items():
-        parent_node = node_map.get(parent_uuid)
-        if not parent_node:
-            log_entries.append(f"Missing parent node for UUID: {parent_uuid}")
-            continue
-
-        for child_uuid in children_uuids:
-            child_node = node_map.get(child_uuid)
-            if not child_node:
-                log_entries.append(f"Missing child node for UUID: {child_uuid}")
-                continue
-
+    with bulk_linking(node_tree):
+        for done, (parent_uuid, child_uuid) in enumerate(pairs, 1):
             try:
                 # Create a connection from the parent's output to the child's input
-                node_tree.links.new(parent_node.outputs[0], child_node.inputs[0])
-                log_entries.append(f"Linked node: {parent_uuid} -> {child_uuid}")
+                node_tree.links.new(node_map[parent_uuid].outputs[0], node_map[child_uuid].inputs[0])
+                log.debug("Linked node: %s -> %s", parent_uuid, child_uuid)
             except Exception as e:
-                log_entries.append(f"Error linking nodes {parent_uuid} -> {child_uuid}: {e}")
-
-    # Backup linking using GroupID and GroupIndex
-    log_entries.append("Starting backup linking using GroupID and GroupIndex.")
-    group_map = {}
-
-    # Group nodes by GroupID if it is valid (not empty)
-    for node in node_tree.nodes:
-        group_id = getattr(node, 'groupid', None)
-        group_index = getattr(node, 'groupindex', None)
-        if group_id and group_id.strip():  # Ensure GroupID is not None or empty
-            group_map.setdefault(group_id, []).append((group_index, node))
-
-    # Link nodes in each group based on GroupIndex
-    for group_id, nodes in group_map.items():
-        nodes.sort(key=lambda x: x[0])  # Sort by GroupIndex
-        for i in range(len(nodes) - 1):
-            current_node = nodes[i][1]
-            next_node = nodes[i + 1][1]
-            try:
-                node_tree.links.new(current_node.outputs[0], next_node.inputs[0])
-                log_entries.append(f"Backup linked group nodes: {current_node.name} -> {next_node.name}")
-            except AttributeError as e:
-                log_entries.append(
-                    f"Error backup linking group nodes: {current_node.name} -> {next_node.name}: {str(e)}")
+                log.summary("Error linking nodes %s -> %s: %s", parent_uuid, child_uuid, e)
+            yield done, len(pairs)
+    log.summary("Linked %s node pairs.", len(pairs))
 
 #Function: generate handle
 from uuid import uuid4
@@ -957,3 +1000,12 @@ def unregister():
     bpy.utils.unregister_class(RemoveCheckFlagOperator)
     bpy.utils.unregister_class(ImportDialogueXML)
     bpy.utils.unregister_class(EditLongText)
+
+    # Stop a parse still running on the worker thread and the thread itself
+    global IMPORT_EXECUTOR
+    for cancel_event in IMPORT_CANCEL_EVENTS:
+        cancel_event.set()
+    IMPORT_CANCEL_EVENTS.clear()
+    if IMPORT_EXECUTOR is not None:
+        IMPORT_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        IMPORT_EXECUTOR = None
@@ -0,0 +1,259 @@
+import hashlib
+import os
+import sqlite3
+import xml.etree.ElementTree as ET
+
+from .cache_utils import user_cache_dir
+
+# Bump when the table layout changes so existing indexes get rebuilt
+INDEX_VERSION = 1
+# Bytes hashed from the start and the end of the localisation file for the signature
+SIGNATURE_SAMPLE_SIZE = 1 << 20
+# Rows per executemany while building and handles per SELECT while looking up
+BATCH_SIZE = 5000
+LOOKUP_BATCH_SIZE = 500
+# Errors of building or reading an index, callers fall back to reading the localisation file
+INDEX_ERRORS = (OSError, sqlite3.Error, ET.ParseError)
+
+
+def source_signature(source_path):
+    """
+    Compute the signature used to invalidate the index of a localisation file.
+
+    The english.xml files are hundreds of MB, so the hash covers the first and last
+    SIGNATURE_SAMPLE_SIZE bytes together with the exact size and mtime instead of the whole file.
+
+    Args:
+        source_path (str): Path to the localisation XML.
+
+    Returns:
+        str: "<size>:<mtime_ns>:<sha256 of the sampled bytes>"
+    """
+    stat = os.stat(source_path)
+    digest = hashlib.sha256()
+    with open(source_path, "rb") as source:
+        digest.update(source.read(SIGNATURE_SAMPLE_SIZE))
+        if stat.st_size > SIGNATURE_SAMPLE_SIZE:
+            source.seek(max(SIGNATURE_SAMPLE_SIZE, stat.st_size - SIGNATURE_SAMPLE_SIZE))
+            digest.update(source.read(SIGNATURE_SAMPLE_SIZE))
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}"
+
+
+def index_path_for(source_path):
+    """
+    Get the path of the SQLite index for a localisation file, inside the user cache directory.
+
+    Args:
+        source_path (str): Path to the localisation XML.
+
+    Returns:
+        str: Path to the index file.
+    """
+    key = hashlib.sha1(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:16]
+    name = f"loca_{os.path.splitext(os.path.basename(source_path))[0]}_{key}.sqlite"
+    return os.path.join(user_cache_dir(), name)
+
+
+def build_index(source_path, index_path, signature):
+    """
+    Stream a localisation XML into a new SQLite index keyed by contentuid.
+
+    The index is written to a temporary file and moved into place when complete, so an interrupted
+    build never leaves a half-filled index behind.
+
+    Args:
+        source_path (str): Path to the localisation XML.
+        index_path (str): Path of the index to create.
+        signature (str): Signature of the source, see source_signature.
+
+    Returns:
+        int: Number of indexed entries.
+    """
+    temp_path = index_path + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    connection = sqlite3.connect(temp_path)
+    count = 0
+    try:
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        connection.execute(
+            "CREATE TABLE content (contentuid TEXT PRIMARY KEY, version INTEGER, text TEXT) WITHOUT ROWID")
+
+        rows = []
+        for _, elem in ET.iterparse(source_path, events=("end",)):
+            if elem.tag != "content":
+                continue
+            contentuid = elem.attrib.get("contentuid", "")
+            if contentuid:
+                rows.append((contentuid, int(elem.attrib.get("version", 1) or 1), elem.text or ""))
+            elem.clear()
+            if len(rows) >= BATCH_SIZE:
+                connection.executemany("INSERT OR REPLACE INTO content VALUES (?, ?, ?)", rows)
+                count += len(rows)
+                rows.clear()
+        if rows:
+            connection.executemany("INSERT OR REPLACE INTO content VALUES (?, ?, ?)", rows)
+            count += len(rows)
+
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("index_version", str(INDEX_VERSION)),
+            ("signature", signature),
+            ("source_path", os.path.abspath(source_path)),
+        ])
+        connection.commit()
+    finally:
+        connection.close()
+
+    os.replace(temp_path, index_path)
+    return count
+
+
+class LocalisationIndex:
+    """
+    Read access to the persistent contentuid index of a localisation file.
+
+    Supports get(handle, default) like the dictionary the importer used before, plus lookup(handles)
+    to resolve many handles at once. The index is (re)built on open when it is missing or when the
+    signature of the source file changed. Use it in a with statement, or call close, to release the
+    connection.
+    """
+
+    def __init__(self, source_path, index_path=None):
+        self.source_path = source_path
+        self.index_path = index_path or index_path_for(source_path)
+        self.rebuilt_entries = None
+        self.connection = self.open()
+
+    def open(self):
+        signature = source_signature(self.source_path)
+        if not self.is_current(signature):
+            self.rebuilt_entries = build_index(self.source_path, self.index_path, signature)
+        return sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def is_current(self, signature):
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            connection = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True)
+            try:
+                meta = dict(connection.execute("SELECT key, value FROM meta"))
+            finally:
+                connection.close()
+        except sqlite3.DatabaseError:
+            return False
+        return meta.get("index_version") == str(INDEX_VERSION) and meta.get("signature") == signature
+
+    def get(self, handle, default=None):
+        row = self.connection.execute("SELECT text FROM content WHERE contentuid = ?", (handle,)).fetchone()
+        return row[0] if row is not None else default
+
+    def __contains__(self, handle):
+        return self.connection.execute(
+            "SELECT 1 FROM content WHERE contentuid = ?", (handle,)).fetchone() is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM content").fetchone()[0]
+
+    def lookup(self, handles):
+        """
+        Resolve a collection of handles.
+
+        Args:
+            handles (iterable): contentuids to look up.
+
+        Returns:
+            dict: contentuid -> text for the handles found in the index.
+        """
+        handles = [handle for handle in set(handles) if handle]
+        found = {}
+        for start in range(0, len(handles), LOOKUP_BATCH_SIZE):
+            batch = handles[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            found.update(self.connection.execute(
+                f"SELECT contentuid, text FROM content WHERE contentuid IN ({placeholders})", batch))
+        return found
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_localisation_texts(localisation_path, handles, use_index, log, cancel_event=None):
+    """
+    Resolve the texts of a set of handles from a localisation file.
+
+    Args:
+        localisation_path (str): Path to the localisation XML, may be empty.
+        handles (set): contentuids referenced by the dialog.
+        use_index (bool): Look the handles up in the persistent index instead of reading the file.
+        log (DialogLog): Log for totals and index problems.
+        cancel_event (threading.Event): Stops reading the file early when set, may be None.
+
+    Returns:
+        dict: contentuid -> text for the handles that were found.
+    """
+    localisation_data = {}
+    if not localisation_path or not os.path.exists(localisation_path) or not handles:
+        return localisation_data
+
+    if use_index:
+        try:
+            with LocalisationIndex(localisation_path) as index:
+                if index.rebuilt_entries is not None:
+                    log.summary("Indexed localisation data for %s entries.", index.rebuilt_entries)
+                localisation_data = index.lookup(handles)
+            log.summary("Loaded localisation data for %s of %s handles from index %s",
+                        len(localisation_data), len(handles), index.index_path)
+            return localisation_data
+        except INDEX_ERRORS as e:
+            log.summary("Localisation index unavailable (%s), reading the file instead.", e)
+
+    localisation_data = stream_localisation_data(localisation_path, handles, cancel_event)
+    log.summary("Loaded localisation data for %s of %s handles.", len(localisation_data), len(handles))
+    return localisation_data
+
+
+def stream_localisation_data(localisation_path, handles, cancel_event=None):
+    """
+    Stream a localisation file and keep only the texts of the given handles.
+
+    Reading stops as soon as every handle has been found, or when cancel_event is set. The texts
+    found until then are returned, the caller checks the event.
+
+    Args:
+        localisation_path (str): Path to the localisation XML.
+        handles (iterable): contentuids to keep.
+        cancel_event (threading.Event): Set by another thread to stop reading, may be None.
+
+    Returns:
+        dict: contentuid -> text for the handles that were found.
+    """
+    localisation_data = {}
+    remaining = set(handles)
+    root = None
+    with open(localisation_path, 'rb') as source:
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if root is None:
+                root = elem
+                continue
+            if event != 'end' or elem.tag != 'content':
+                continue
+            contentuid = elem.attrib.get('contentuid', '')
+            if contentuid in remaining:
+                localisation_data[contentuid] = elem.text or ''
+                remaining.discard(contentuid)
+            # Drop the processed entries so memory stays at the size of the matched texts
+            root.clear()
+            if not remaining or (cancel_event is not None and cancel_event.is_set()):
+                break
+    return localisation_data
@@ -0,0 +1,145 @@
+# Layout of Larian's LSF binary resource format (DialogsBinary/*.lsf), shared by the reader and the writer.
+# Names and numbers follow LSLib (LSFCommon.cs) so the two can be compared side by side.
+import struct
+import uuid
+
+LSF_MAGIC = b"LSOF"
+
+# File format versions
+VER_INITIAL = 1
+VER_CHUNKED_COMPRESS = 2  # Nodes, attributes and values are LZ4 frames instead of blocks
+VER_EXTENDED_NODES = 3  # Node and attribute entries with sibling links
+VER_BG3 = 4  # TranslatedStrings store a version instead of a value
+VER_BG3_EXTENDED_HEADER = 5  # 64 bit engine version
+VER_BG3_ADDITIONAL_BLOB = 6  # Extra size pair in the metadata
+VER_BG3_NODE_KEYS = 7  # Keys section with the key attribute of every node
+MAX_VERSION = VER_BG3_NODE_KEYS
+
+# Metadata formats, KeysAndAdjacency uses the extended node and attribute entries
+METADATA_FORMAT_NONE = 0
+METADATA_FORMAT_KEYS_AND_ADJACENCY = 1
+
+# Compression flags: the method in the low nibble, the level in the high nibble
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZ4 = 2
+COMPRESSION_ZSTD = 3
+COMPRESSION_METHOD_MASK = 0x0F
+COMPRESSION_LEVEL_FAST = 0x10
+COMPRESSION_LEVEL_DEFAULT = 0x20
+COMPRESSION_LEVEL_MAX = 0x40
+
+# Header: magic and version, then the engine version (32 bit before VER_BG3_EXTENDED_HEADER)
+MAGIC_FORMAT = struct.Struct("<4sI")
+ENGINE_VERSION_32_FORMAT = struct.Struct("<I")
+ENGINE_VERSION_64_FORMAT = struct.Struct("<q")
+
+# Metadata: (uncompressed size, size on disk) per section, compression flags, two unknowns, metadata format.
+# From VER_BG3_ADDITIONAL_BLOB on the keys section sizes come after the strings
+METADATA_V5_FORMAT = struct.Struct("<8IBBHI")
+METADATA_V6_FORMAT = struct.Struct("<10IBBHI")
+
+# Node entries: name, first attribute, parent (V2) or name, parent, next sibling, first attribute (V3)
+NODE_V2_FORMAT = struct.Struct("<Iii")
+NODE_V3_FORMAT = struct.Struct("<Iiii")
+# Attribute entries: name, type and length, owning node (V2) or name, type and length, next attribute, offset (V3)
+ATTRIBUTE_V2_FORMAT = struct.Struct("<IIi")
+ATTRIBUTE_V3_FORMAT = struct.Struct("<IIiI")
+# Key entries: node index, name of the key attribute
+KEY_FORMAT = struct.Struct("<II")
+
+# Attribute types as (type id, LSX type name, struct format of fixed size values or None)
+ATTRIBUTE_TYPES = (
+    (0, "None", None),
+    (1, "uint8", "<B"),
+    (2, "int16", "<h"),
+    (3, "uint16", "<H"),
+    (4, "int32", "<i"),
+    (5, "uint32", "<I"),
+    (6, "float", "<f"),
+    (7, "double", "<d"),
+    (8, "ivec2", "<2i"),
+    (9, "ivec3", "<3i"),
+    (10, "ivec4", "<4i"),
+    (11, "fvec2", "<2f"),
+    (12, "fvec3", "<3f"),
+    (13, "fvec4", "<4f"),
+    (14, "mat2x2", "<4f"),
+    (15, "mat3x3", "<9f"),
+    (16, "mat3x4", "<12f"),
+    (17, "mat4x3", "<12f"),
+    (18, "mat4x4", "<16f"),
+    (19, "bool", "<B"),
+    (20, "string", None),
+    (21, "path", None),
+    (22, "FixedString", None),
+    (23, "LSString", None),
+    (24, "uint64", "<Q"),
+    (25, "ScratchBuffer", None),
+    (26, "old_int64", "<q"),
+    (27, "int8", "<b"),
+    (28, "TranslatedString", None),
+    (29, "WString", None),
+    (30, "LSWString", None),
+    (31, "guid", None),
+    (32, "int64", "<q"),
+    (33, "TranslatedFSString", None),
+)
+TYPE_NAMES = {type_id: name for type_id, name, _ in ATTRIBUTE_TYPES}
+TYPE_IDS = {name: type_id for type_id, name, _ in ATTRIBUTE_TYPES}
+FIXED_FORMATS = {type_id: struct.Struct(fmt) for type_id, _, fmt in ATTRIBUTE_TYPES if fmt}
+
+TYPE_BOOL = TYPE_IDS["bool"]
+TYPE_GUID = TYPE_IDS["guid"]
+TYPE_SCRATCH_BUFFER = TYPE_IDS["ScratchBuffer"]
+TYPE_TRANSLATED_STRING = TYPE_IDS["TranslatedString"]
+TYPE_TRANSLATED_FS_STRING = TYPE_IDS["TranslatedFSString"]
+STRING_TYPES = frozenset(TYPE_IDS[name] for name in ("string", "path", "FixedString", "LSString", "WString", "LSWString"))
+FLOAT_TYPES = frozenset(TYPE_IDS[name] for name in (
+    "float", "double", "fvec2", "fvec3", "fvec4", "mat2x2", "mat3x3", "mat3x4", "mat4x3", "mat4x4"))
+
+# The attribute type id takes the low 6 bits of TypeAndLength, the value length the rest
+TYPE_ID_BITS = 6
+TYPE_ID_MASK = (1 << TYPE_ID_BITS) - 1
+
+# Buckets of the name hash table written by LSLib
+NAME_HASH_BUCKETS = 0x200
+
+
+def unpack_engine_version_64(packed):
+    """Split a 64 bit engine version into (major, minor, revision, build)."""
+    return (packed >> 55) & 0x7F, (packed >> 47) & 0xFF, (packed >> 31) & 0xFFFF, packed & 0x7FFFFFFF
+
+
+def unpack_engine_version_32(packed):
+    """Split a 32 bit engine version into (major, minor, revision, build)."""
+    return (packed >> 28) & 0x0F, (packed >> 24) & 0x0F, (packed >> 16) & 0xFF, packed & 0xFFFF
+
+
+def pack_engine_version_64(major, minor, revision, build):
+    """Pack (major, minor, revision, build) into a 64 bit engine version."""
+    return ((major & 0x7F) << 55) | ((minor & 0xFF) << 47) | ((revision & 0xFFFF) << 31) | (build & 0x7FFFFFFF)
+
+
+def pack_engine_version_32(major, minor, revision, build):
+    """Pack (major, minor, revision, build) into a 32 bit engine version."""
+    return ((major & 0x0F) << 28) | ((minor & 0x0F) << 24) | ((revision & 0xFF) << 16) | (build & 0xFFFF)
+
+
+def guid_from_bytes(data):
+    """
+    Format the 16 bytes of a guid value the way LSX files show it.
+
+    The bytes are a .NET Guid (little endian first three fields). BG3 LSX files are written with
+    byte swapped guids, which swaps every byte pair of the last eight bytes.
+    """
+    swapped = bytearray(data)
+    swapped[8::2], swapped[9::2] = swapped[9::2], swapped[8::2]
+    return str(uuid.UUID(bytes_le=bytes(swapped)))
+
+
+def guid_to_bytes(text):
+    """Inverse of guid_from_bytes."""
+    swapped = bytearray(uuid.UUID(text).bytes_le)
+    swapped[8::2], swapped[9::2] = swapped[9::2], swapped[8::2]
+    return bytes(swapped)
@@ -0,0 +1,341 @@
+import base64
+import struct
+import xml.etree.ElementTree as ET
+import zlib
+
+from .lsf_common import (
+    LSF_MAGIC, MAX_VERSION, VER_CHUNKED_COMPRESS, VER_EXTENDED_NODES, VER_BG3, VER_BG3_EXTENDED_HEADER,
+    VER_BG3_ADDITIONAL_BLOB, METADATA_FORMAT_KEYS_AND_ADJACENCY, COMPRESSION_NONE, COMPRESSION_ZLIB,
+    COMPRESSION_LZ4, COMPRESSION_ZSTD, COMPRESSION_METHOD_MASK, MAGIC_FORMAT, ENGINE_VERSION_32_FORMAT,
+    ENGINE_VERSION_64_FORMAT, METADATA_V5_FORMAT, METADATA_V6_FORMAT, NODE_V2_FORMAT, NODE_V3_FORMAT,
+    ATTRIBUTE_V2_FORMAT, ATTRIBUTE_V3_FORMAT, KEY_FORMAT, TYPE_NAMES, FIXED_FORMATS, TYPE_BOOL, TYPE_GUID,
+    TYPE_SCRATCH_BUFFER, TYPE_TRANSLATED_STRING, TYPE_TRANSLATED_FS_STRING, STRING_TYPES, FLOAT_TYPES,
+    TYPE_ID_BITS, TYPE_ID_MASK, unpack_engine_version_32, unpack_engine_version_64, guid_from_bytes,
+)
+from .lz4_codec import LZ4Error, decompress_block, decompress_frame
+
+SINGLE_FORMAT = struct.Struct("<f")
+UINT16_FORMAT = struct.Struct("<H")
+INT32_FORMAT = struct.Struct("<i")
+
+
+class LSFError(ValueError):
+    pass
+
+
+def is_lsf_file(filepath):
+    """
+    Check whether a file starts with the LSF magic.
+
+    Args:
+        filepath (str): Path to the file.
+
+    Returns:
+        bool: True for LSF files.
+    """
+    with open(filepath, "rb") as source:
+        return source.read(len(LSF_MAGIC)) == LSF_MAGIC
+
+
+def read_lsf(filepath):
+    """
+    Read an LSF file into the element tree of the equivalent LSX document.
+
+    Args:
+        filepath (str): Path to the .lsf file.
+
+    Returns:
+        xml.etree.ElementTree.Element: The <save> root element.
+
+    Raises:
+        LSFError: If the file is not a supported LSF file.
+    """
+    with open(filepath, "rb") as source:
+        return LSFReader(source.read()).read()
+
+
+def format_float(value, single):
+    """Shortest text that reads back as the same float (or float32 when single), like .NET's ToString."""
+    for digits in range(1, 10 if single else 18):
+        text = f"{value:.{digits}g}"
+        parsed = float(text)
+        if single:
+            parsed = SINGLE_FORMAT.unpack(SINGLE_FORMAT.pack(parsed))[0]
+        if parsed == value:
+            break
+    else:
+        text = repr(value)
+    return text.replace("e", "E")
+
+
+class LSFReader:
+    """
+    Pure Python reader for LSF resources, versions 1 to 7.
+
+    The sections are parsed from memoryview slices of the file and the decompressed blobs, only
+    names and values are turned into Python strings. The result is the element tree lslib writes
+    for the same resource as LSX, so it goes through the same parser as an LSX import.
+    """
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.position = 0
+        self.version = 0
+        self.engine_version = (0, 0, 0, 0)
+        self.compression_flags = COMPRESSION_NONE
+        self.metadata_format = 0
+        self.names = []
+        self.values = memoryview(b"")
+
+    def read(self):
+        """
+        Parse the whole resource.
+
+        Returns:
+            xml.etree.ElementTree.Element: The <save> root element.
+
+        Raises:
+            LSFError: If the data is not a supported LSF resource.
+        """
+        try:
+            sections = self.read_header()
+            self.names = self.read_names(self.read_section(*sections["strings"], allow_chunked=False))
+            nodes = self.read_nodes(self.read_section(*sections["nodes"]))
+            attributes = self.read_attributes(self.read_section(*sections["attributes"]))
+            self.values = self.read_section(*sections["values"])
+            keys = self.read_keys(self.read_section(*sections["keys"]))
+            return self.build_tree(nodes, attributes, keys)
+        except (LZ4Error, zlib.error, struct.error, IndexError) as e:
+            raise LSFError(f"Corrupt LSF file: {e}") from e
+
+    # ###### HEADER AND SECTIONS ######
+    def read_header(self):
+        magic, self.version = MAGIC_FORMAT.unpack_from(self.data, 0)
+        if magic != LSF_MAGIC:
+            raise LSFError("Not an LSF file")
+        if not 1 <= self.version <= MAX_VERSION:
+            raise LSFError(f"Unsupported LSF version {self.version}")
+        self.position = MAGIC_FORMAT.size
+
+        if self.version >= VER_BG3_EXTENDED_HEADER:
+            packed = ENGINE_VERSION_64_FORMAT.unpack_from(self.data, self.position)[0]
+            self.position += ENGINE_VERSION_64_FORMAT.size
+            self.engine_version = unpack_engine_version_64(packed)
+            if self.engine_version[0] == 0:
+                # Merged LSF files can miss the engine version, lslib assumes 4.0.9.0
+                self.engine_version = (4, 0, 9, 0)
+        else:
+            packed = ENGINE_VERSION_32_FORMAT.unpack_from(self.data, self.position)[0]
+            self.position += ENGINE_VERSION_32_FORMAT.size
+            self.engine_version = unpack_engine_version_32(packed)
+
+        if self.version >= VER_BG3_ADDITIONAL_BLOB:
+            fields = METADATA_V6_FORMAT.unpack_from(self.data, self.position)
+            self.position += METADATA_V6_FORMAT.size
+            keys, sizes = fields[2:4], fields[:2] + fields[4:10]
+            self.compression_flags, _, _, self.metadata_format = fields[10:]
+        else:
+            fields = METADATA_V5_FORMAT.unpack_from(self.data, self.position)
+            self.position += METADATA_V5_FORMAT.size
+            keys, sizes = (0, 0), fields[:8]
+            self.compression_flags, _, _, self.metadata_format = fields[8:]
+
+        # (uncompressed size, size on disk) in file order
+        return {
+            "strings": sizes[0:2],
+            "nodes": sizes[2:4],
+            "attributes": sizes[4:6],
+            "values": sizes[6:8],
+            "keys": keys,
+        }
+
+    # Read the next section from the file, decompressing it if needed
+    def read_section(self, uncompressed_size, size_on_disk, allow_chunked=True):
+        if size_on_disk == 0 and uncompressed_size == 0:
+            return memoryview(b"")
+
+        method = self.compression_flags & COMPRESSION_METHOD_MASK
+        if size_on_disk == 0 or method == COMPRESSION_NONE:
+            # Stored as is
+            size_on_disk = uncompressed_size
+            method = COMPRESSION_NONE
+        raw = self.data[self.position:self.position + size_on_disk]
+        if len(raw) != size_on_disk:
+            raise LSFError("Truncated LSF file")
+        self.position += size_on_disk
+
+        if method == COMPRESSION_NONE:
+            return raw
+        if method == COMPRESSION_ZLIB:
+            return memoryview(zlib.decompress(raw))
+        if method == COMPRESSION_LZ4:
+            if allow_chunked and self.version >= VER_CHUNKED_COMPRESS:
+                return memoryview(decompress_frame(raw))
+            return memoryview(decompress_block(raw, uncompressed_size))
+        if method == COMPRESSION_ZSTD:
+            raise LSFError("Zstandard compressed LSF files are not supported, convert the file with lslib first")
+        raise LSFError(f"Unknown LSF compression method {method}")
+
+    # Names are stored as a hash table: buckets of (length, UTF-8 bytes) strings
+    @staticmethod
+    def read_names(data):
+        names = []
+        bucket_count = struct.unpack_from("<I", data, 0)[0]
+        position = 4
+        for _ in range(bucket_count):
+            string_count = UINT16_FORMAT.unpack_from(data, position)[0]
+            position += 2
+            bucket = []
+            for _ in range(string_count):
+                length = UINT16_FORMAT.unpack_from(data, position)[0]
+                position += 2
+                bucket.append(str(data[position:position + length], "utf-8"))
+                position += length
+            names.append(bucket)
+        return names
+
+    def name(self, reference):
+        # High 16 bits pick the bucket, low 16 bits the string in the bucket
+        return self.names[reference >> 16][reference & 0xFFFF]
+
+    def uses_extended_entries(self):
+        return self.version >= VER_EXTENDED_NODES and self.metadata_format == METADATA_FORMAT_KEYS_AND_ADJACENCY
+
+    # Nodes as (name reference, parent index, first attribute index), parents always come before their children
+    def read_nodes(self, data):
+        if self.uses_extended_entries():
+            return [(name, parent, first_attribute)
+                    for name, parent, _, first_attribute in NODE_V3_FORMAT.iter_unpack(data)]
+        return [(name, parent, first_attribute)
+                for name, first_attribute, parent in NODE_V2_FORMAT.iter_unpack(data)]
+
+    # Attributes as (name reference, type id, length, value offset, next attribute index)
+    def read_attributes(self, data):
+        if self.uses_extended_entries():
+            return [(name, type_and_length & TYPE_ID_MASK, type_and_length >> TYPE_ID_BITS, offset, next_attribute)
+                    for name, type_and_length, next_attribute, offset in ATTRIBUTE_V3_FORMAT.iter_unpack(data)]
+
+        # V2 entries only name their node and the values follow each other, so the offsets and the
+        # per node chains have to be rebuilt
+        attributes = []
+        last_attribute = {}
+        offset = 0
+        for index, (name, type_and_length, node_index) in enumerate(ATTRIBUTE_V2_FORMAT.iter_unpack(data)):
+            length = type_and_length >> TYPE_ID_BITS
+            attributes.append([name, type_and_length & TYPE_ID_MASK, length, offset, -1])
+            previous = last_attribute.get(node_index)
+            if previous is not None:
+                attributes[previous][4] = index
+            last_attribute[node_index] = index
+            offset += length
+        return attributes
+
+    # Key attribute name per node index
+    def read_keys(self, data):
+        return {node_index: self.name(key_name) for node_index, key_name in KEY_FORMAT.iter_unpack(data)}
+
+    # ###### ELEMENT TREE ######
+    def build_tree(self, nodes, attributes, keys):
+        root = ET.Element("save")
+        major, minor, revision, build = self.engine_version
+        lslib_meta = "v1,bswap_guids"
+        if self.metadata_format == METADATA_FORMAT_KEYS_AND_ADJACENCY:
+            lslib_meta += ",lsf_keys_adjacency"
+        ET.SubElement(root, "version", {
+            "major": str(major), "minor": str(minor), "revision": str(revision), "build": str(build),
+            "lslib_meta": lslib_meta,
+        })
+
+        elements = []
+        children_elements = {}
+        for index, (name_reference, parent_index, first_attribute) in enumerate(nodes):
+            name = self.name(name_reference)
+            if parent_index == -1:
+                # Regions hold a root node with the same name
+                region = ET.SubElement(root, "region", {"id": name})
+                element = ET.SubElement(region, "node", {"id": name})
+            else:
+                children = children_elements.get(parent_index)
+                if children is None:
+                    children = children_elements[parent_index] = ET.SubElement(elements[parent_index], "children")
+                element = ET.SubElement(children, "node", {"id": name})
+                if index in keys:
+                    element.set("key", keys[index])
+            elements.append(element)
+
+            attribute_index = first_attribute
+            while attribute_index != -1:
+                name_reference, type_id, length, offset, attribute_index = attributes[attribute_index]
+                self.add_attribute(element, self.name(name_reference), type_id, offset, length)
+        return root
+
+    def add_attribute(self, element, name, type_id, offset, length):
+        attribute = ET.SubElement(element, "attribute", {"id": name, "type": TYPE_NAMES.get(type_id, str(type_id))})
+        if type_id == TYPE_TRANSLATED_STRING:
+            self.read_translated_string(attribute, offset)
+        elif type_id == TYPE_TRANSLATED_FS_STRING:
+            self.read_translated_fs_string(attribute, offset)
+        else:
+            attribute.set("value", self.read_value(type_id, offset, length))
+
+    def read_string(self, offset, length):
+        # Strings are null terminated, the length includes the terminator
+        return str(self.values[offset:offset + max(length - 1, 0)], "utf-8", "replace")
+
+    def read_value(self, type_id, offset, length):
+        if type_id in STRING_TYPES:
+            return self.read_string(offset, length)
+        if type_id == TYPE_BOOL:
+            return "True" if self.values[offset] else "False"
+        if type_id == TYPE_GUID:
+            return guid_from_bytes(self.values[offset:offset + 16])
+        if type_id == TYPE_SCRATCH_BUFFER:
+            return base64.b64encode(self.values[offset:offset + length]).decode("ascii")
+        value_format = FIXED_FORMATS.get(type_id)
+        if value_format is None:
+            return ""
+        values = value_format.unpack_from(self.values, offset)
+        if type_id in FLOAT_TYPES:
+            single = value_format.format[-1] == "f"
+            return " ".join(format_float(value, single) for value in values)
+        if len(values) == 1:
+            return str(values[0])
+        return " ".join(str(value) for value in values)
+
+    # BG3 stores the version and the handle, older versions a value and the handle. Returns the end offset
+    def read_translated_string(self, attribute, offset):
+        if self.version >= VER_BG3:
+            # Some BG3 files still store the value. Like LSLib, take a zero in the upper half of what would
+            # be the value length as that layout, the low half of a handle length is never zero
+            version = UINT16_FORMAT.unpack_from(self.values, offset)[0]
+            test = UINT16_FORMAT.unpack_from(self.values, offset + 2)[0]
+            if test != 0:
+                handle_length = INT32_FORMAT.unpack_from(self.values, offset + 2)[0]
+                attribute.set("handle", self.read_string(offset + 6, handle_length))
+                attribute.set("version", str(version))
+                return offset + 6 + handle_length
+
+        value_length = INT32_FORMAT.unpack_from(self.values, offset)[0]
+        attribute.set("value", self.read_string(offset + 4, value_length))
+        offset += 4 + value_length
+        handle_length = INT32_FORMAT.unpack_from(self.values, offset)[0]
+        attribute.set("handle", self.read_string(offset + 4, handle_length))
+        return offset + 4 + handle_length
+
+    # A TranslatedString followed by (key, TranslatedFSString, value) arguments. Returns the end offset
+    def read_translated_fs_string(self, attribute, offset):
+        offset = self.read_translated_string(attribute, offset)
+        argument_count = INT32_FORMAT.unpack_from(self.values, offset)[0]
+        offset += 4
+        attribute.set("arguments", str(argument_count))
+        if argument_count:
+            arguments = ET.SubElement(attribute, "arguments")
+            for _ in range(argument_count):
+                key_length = INT32_FORMAT.unpack_from(self.values, offset)[0]
+                argument = ET.SubElement(arguments, "argument", {"key": self.read_string(offset + 4, key_length)})
+                offset += 4 + key_length
+                offset = self.read_translated_fs_string(ET.SubElement(argument, "string"), offset)
+                value_length = INT32_FORMAT.unpack_from(self.values, offset)[0]
+                argument.set("value", self.read_string(offset + 4, value_length))
+                offset += 4 + value_length
+        return offset
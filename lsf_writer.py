@@ -0,0 +1,264 @@
+import base64
+import struct
+import xml.etree.ElementTree as ET
+import zlib
+
+from .lsf_common import (
+    LSF_MAGIC, VER_BG3, VER_BG3_EXTENDED_HEADER, VER_BG3_ADDITIONAL_BLOB, VER_BG3_NODE_KEYS, VER_CHUNKED_COMPRESS,
+    METADATA_FORMAT_NONE, METADATA_FORMAT_KEYS_AND_ADJACENCY, COMPRESSION_NONE, COMPRESSION_LZ4,
+    COMPRESSION_LEVEL_DEFAULT, MAGIC_FORMAT, ENGINE_VERSION_32_FORMAT, ENGINE_VERSION_64_FORMAT, METADATA_V5_FORMAT,
+    METADATA_V6_FORMAT, NODE_V2_FORMAT, NODE_V3_FORMAT, ATTRIBUTE_V2_FORMAT, ATTRIBUTE_V3_FORMAT, KEY_FORMAT,
+    TYPE_IDS, FIXED_FORMATS, TYPE_BOOL, TYPE_GUID, TYPE_SCRATCH_BUFFER, TYPE_TRANSLATED_STRING,
+    TYPE_TRANSLATED_FS_STRING, STRING_TYPES, FLOAT_TYPES, TYPE_ID_BITS, NAME_HASH_BUCKETS,
+    pack_engine_version_32, pack_engine_version_64, guid_to_bytes,
+)
+from .lsf_reader import LSFError
+from .lz4_codec import compress_block, compress_frame
+
+# Engine version written when the document has no <version> element (BG3 release)
+DEFAULT_ENGINE_VERSION = (4, 0, 9, 331)
+# The layout LSLib writes for BG3: long node and attribute entries with sibling links, and the keys section
+DEFAULT_VERSION = VER_BG3_NODE_KEYS
+
+UINT16_FORMAT = struct.Struct("<H")
+INT32_FORMAT = struct.Struct("<i")
+NIL_GUID = bytes(16)
+
+
+def write_lsf(root, filepath, version=DEFAULT_VERSION, compress=True):
+    """
+    Write the element tree of an LSX document as an LSF file.
+
+    Args:
+        root (xml.etree.ElementTree.Element): The <save> root element.
+        filepath (str): Path of the .lsf file to write.
+        version (int): LSF version to write, 4 to 7. Version 7 adds the keys section.
+        compress (bool): LZ4 compress the sections.
+
+    Raises:
+        LSFError: If an attribute has an unknown type or a value that does not fit its type.
+    """
+    data = LSFWriter(version, compress).write(root)
+    with open(filepath, "wb") as target:
+        target.write(data)
+
+
+def name_bucket(name):
+    # Any bucket works for readers, fold a CRC of the name like LSLib folds the .NET string hash
+    value = zlib.crc32(name.encode("utf-8"))
+    return (value ^ (value >> 9) ^ (value >> 18) ^ (value >> 27)) & (NAME_HASH_BUCKETS - 1)
+
+
+def child_elements(element):
+    # Like LSLib's LSX reader, a <node> nested straight in a <node> is a child as well as one in <children>
+    for child in element:
+        if child.tag == "children":
+            yield from child.iterfind("node")
+        elif child.tag == "node":
+            yield child
+
+
+class LSFWriter:
+    """
+    Pure Python writer for LSF resources, the inverse of LSFReader.
+
+    Names are interned into the name hash table once, nodes are written in document order with
+    their attributes and values, and the sections are optionally LZ4 compressed (the names as a
+    block, the other sections as frames, like LSLib).
+    """
+
+    def __init__(self, version=DEFAULT_VERSION, compress=True):
+        if not VER_BG3 <= version <= VER_BG3_NODE_KEYS:
+            raise LSFError(f"Cannot write LSF version {version}")
+        self.version = version
+        self.compress = compress
+        self.extended = version >= VER_BG3_NODE_KEYS
+        self.buckets = [[] for _ in range(NAME_HASH_BUCKETS)]
+        self.name_references = {}
+        self.nodes = []
+        self.attributes = []
+        self.keys = []
+        self.values = bytearray()
+
+    def write(self, root):
+        """
+        Serialise a document.
+
+        Args:
+            root (xml.etree.ElementTree.Element): The <save> root element.
+
+        Returns:
+            bytes: The LSF file contents.
+        """
+        for region in root.iterfind("region"):
+            node = region.find("node")
+            if node is not None:
+                self.add_node(node, region.get("id", node.get("id", "")), -1)
+
+        if self.extended:
+            nodes = b"".join(NODE_V3_FORMAT.pack(*node) for node in self.nodes)
+            attributes = b"".join(ATTRIBUTE_V3_FORMAT.pack(name, type_and_length, next_attribute, offset)
+                                  for name, type_and_length, next_attribute, offset, _ in self.attributes)
+            keys = b"".join(KEY_FORMAT.pack(*key) for key in self.keys)
+        else:
+            nodes = b"".join(NODE_V2_FORMAT.pack(name, first_attribute, parent)
+                             for name, parent, _, first_attribute in self.nodes)
+            attributes = b"".join(ATTRIBUTE_V2_FORMAT.pack(name, type_and_length, node_index)
+                                  for name, type_and_length, _, _, node_index in self.attributes)
+            keys = b""
+
+        sections = [
+            (self.names_section(), False),
+            (nodes, True),
+            (attributes, True),
+            (bytes(self.values), True),
+        ]
+        if self.version >= VER_BG3_ADDITIONAL_BLOB:
+            sections.append((keys, True))
+        packed = [self.pack_section(data, chunked) for data, chunked in sections]
+        return self.header(root, [(len(data), len(packed_data) if self.compress and data else 0)
+                                  for (data, _), packed_data in zip(sections, packed)]) + b"".join(packed)
+
+    # ###### NAMES AND NODES ######
+    def intern(self, name):
+        reference = self.name_references.get(name)
+        if reference is None:
+            bucket = name_bucket(name)
+            reference = (bucket << 16) | len(self.buckets[bucket])
+            self.buckets[bucket].append(name)
+            self.name_references[name] = reference
+        return reference
+
+    def names_section(self):
+        data = bytearray(struct.pack("<I", len(self.buckets)))
+        for bucket in self.buckets:
+            data += UINT16_FORMAT.pack(len(bucket))
+            for name in bucket:
+                encoded = name.encode("utf-8")
+                data += UINT16_FORMAT.pack(len(encoded))
+                data += encoded
+        return bytes(data)
+
+    def add_node(self, element, name, parent_index):
+        index = len(self.nodes)
+        # [name, parent, next sibling, first attribute]
+        self.nodes.append([self.intern(name), parent_index, -1, -1])
+        if parent_index != -1 and element.get("key"):
+            self.keys.append((index, self.intern(element.get("key"))))
+
+        previous_attribute = None
+        for attribute in element.iterfind("attribute"):
+            attribute_index = self.add_attribute(attribute, index)
+            if previous_attribute is None:
+                self.nodes[index][3] = attribute_index
+            else:
+                self.attributes[previous_attribute][2] = attribute_index
+            previous_attribute = attribute_index
+
+        previous_child = None
+        for child in child_elements(element):
+            child_index = self.add_node(child, child.get("id", ""), index)
+            if previous_child is not None:
+                self.nodes[previous_child][2] = child_index
+            previous_child = child_index
+        return index
+
+    def add_attribute(self, attribute, node_index):
+        name = attribute.get("id", "")
+        type_name = attribute.get("type", "")
+        type_id = TYPE_IDS.get(type_name)
+        if type_id is None:
+            raise LSFError(f"Attribute {name} has unknown type {type_name}")
+        try:
+            data = self.encode_value(attribute, type_id)
+        except (ValueError, struct.error) as e:
+            raise LSFError(f"Attribute {name} has an invalid {type_name} value {attribute.get('value')!r}: {e}") from e
+
+        index = len(self.attributes)
+        # [name, type and length, next attribute, value offset, node index]
+        self.attributes.append([self.intern(name), type_id | (len(data) << TYPE_ID_BITS), -1, len(self.values),
+                                node_index])
+        self.values += data
+        return index
+
+    # ###### VALUES ######
+    @staticmethod
+    def encode_string(text):
+        # Null terminated, the stored length includes the terminator
+        return (text or "").encode("utf-8") + b"\0"
+
+    def encode_length_prefixed(self, text):
+        encoded = self.encode_string(text)
+        return INT32_FORMAT.pack(len(encoded)) + encoded
+
+    def encode_value(self, attribute, type_id):
+        value = attribute.get("value", "")
+        if type_id in STRING_TYPES:
+            return self.encode_string(value)
+        if type_id == TYPE_BOOL:
+            return b"\1" if value in ("True", "true", "1") else b"\0"
+        if type_id == TYPE_GUID:
+            return guid_to_bytes(value) if value else NIL_GUID
+        if type_id == TYPE_SCRATCH_BUFFER:
+            return base64.b64decode(value)
+        if type_id == TYPE_TRANSLATED_STRING:
+            return self.encode_translated_string(attribute)
+        if type_id == TYPE_TRANSLATED_FS_STRING:
+            return self.encode_translated_fs_string(attribute)
+        value_format = FIXED_FORMATS.get(type_id)
+        if value_format is None:
+            return b""
+        convert = float if type_id in FLOAT_TYPES else int
+        return value_format.pack(*(convert(part) for part in value.split()))
+
+    # BG3 TranslatedStrings store the version and the handle
+    def encode_translated_string(self, attribute):
+        return (UINT16_FORMAT.pack(int(attribute.get("version") or 0))
+                + self.encode_length_prefixed(attribute.get("handle", "")))
+
+    # A TranslatedString followed by (key, TranslatedFSString, value) arguments
+    def encode_translated_fs_string(self, attribute):
+        arguments = attribute.findall("./arguments/argument")
+        data = self.encode_translated_string(attribute) + INT32_FORMAT.pack(len(arguments))
+        for argument in arguments:
+            data += self.encode_length_prefixed(argument.get("key", ""))
+            string = argument.find("string")
+            data += self.encode_translated_fs_string(string if string is not None else ET.Element("string"))
+            data += self.encode_length_prefixed(argument.get("value", ""))
+        return data
+
+    # ###### SECTIONS AND HEADER ######
+    def pack_section(self, data, chunked):
+        if not self.compress or not data:
+            return data
+        if chunked and self.version >= VER_CHUNKED_COMPRESS:
+            return bytes(compress_frame(data))
+        return bytes(compress_block(data))
+
+    # sizes holds (uncompressed size, size on disk) per section in file order, size on disk is 0 when stored
+    def header(self, root, sizes):
+        engine_version = DEFAULT_ENGINE_VERSION
+        version_element = root.find("version")
+        if version_element is not None:
+            try:
+                engine_version = tuple(int(version_element.get(part, 0))
+                                       for part in ("major", "minor", "revision", "build"))
+            except ValueError:
+                pass
+
+        data = MAGIC_FORMAT.pack(LSF_MAGIC, self.version)
+        if self.version >= VER_BG3_EXTENDED_HEADER:
+            data += ENGINE_VERSION_64_FORMAT.pack(pack_engine_version_64(*engine_version))
+        else:
+            data += ENGINE_VERSION_32_FORMAT.pack(pack_engine_version_32(*engine_version))
+
+        flags = COMPRESSION_LZ4 | COMPRESSION_LEVEL_DEFAULT if self.compress else COMPRESSION_NONE
+        metadata_format = METADATA_FORMAT_KEYS_AND_ADJACENCY if self.extended else METADATA_FORMAT_NONE
+        strings, nodes, attributes, values = sizes[:4]
+        if self.version >= VER_BG3_ADDITIONAL_BLOB:
+            data += METADATA_V6_FORMAT.pack(*strings, *sizes[4], *nodes, *attributes, *values,
+                                            flags, 0, 0, metadata_format)
+        else:
+            data += METADATA_V5_FORMAT.pack(*strings, *nodes, *attributes, *values, flags, 0, 0, metadata_format)
+        return data
+
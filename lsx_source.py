@@ -0,0 +1,121 @@
+import hashlib
+import mmap
+import os
+from xml.parsers import expat
+
+# IDProperty ints are 32 bit, spans past this offset are not recorded
+MAX_SPAN_OFFSET = 0x7FFFFFFF
+
+
+def span_fingerprint(data):
+    """Content fingerprint of the bytes of a node."""
+    return hashlib.sha1(data).hexdigest()
+
+
+def index_node_spans(filepath):
+    """
+    Find the byte range of every dialog node (<node id="node"> in the nodes section) of an LSX file.
+
+    Args:
+        filepath (str): Path to the LSX file.
+
+    Returns:
+        dict: Node UUID -> (start, end, fingerprint). end is exclusive and fingerprint is the
+        span_fingerprint of the bytes in between.
+
+    Raises:
+        xml.parsers.expat.ExpatError: If the file is not well formed XML.
+    """
+    spans = {}
+    with open(filepath, "rb") as source:
+        if os.fstat(source.fileno()).st_size == 0:
+            return spans
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            parser = expat.ParserCreate()
+            # (tag, id) of the open elements
+            open_elements = []
+            # Depth, start offset and UUID of the dialog node being read
+            current = None
+
+            def start_element(tag, attributes):
+                nonlocal current
+                element_id = attributes.get("id")
+                if current is None:
+                    if (tag == "node" and element_id == "node" and len(open_elements) >= 2
+                            and open_elements[-1][0] == "children" and open_elements[-2] == ("node", "nodes")):
+                        current = [len(open_elements), parser.CurrentByteIndex, None]
+                elif tag == "attribute" and element_id == "UUID" and len(open_elements) == current[0] + 1:
+                    current[2] = attributes.get("value")
+                open_elements.append((tag, element_id))
+
+            def end_element(tag):
+                nonlocal current
+                open_elements.pop()
+                if current is not None and len(open_elements) == current[0]:
+                    depth, start, node_uuid = current
+                    # The event sits on the end tag, or on the start tag of an empty element
+                    end = data.find(b">", parser.CurrentByteIndex) + 1
+                    if node_uuid and 0 < end <= MAX_SPAN_OFFSET:
+                        spans[node_uuid] = (start, end, span_fingerprint(data[start:end]))
+                    current = None
+
+            parser.StartElementHandler = start_element
+            parser.EndElementHandler = end_element
+            parser.Parse(data, True)
+    return spans
+
+
+class SourceNodes:
+    """
+    Read access to the XML of dialog nodes in a memory mapped source file, used as a context manager.
+
+    Only spans whose bytes still match their fingerprint are returned, so a source file that was edited
+    or replaced since it was indexed can never leak stale XML into an export.
+    """
+
+    def __init__(self, filepath, spans):
+        """
+        Args:
+            filepath (str): Path to the source LSX file, may be None or missing.
+            spans (dict): Node UUID -> (start, end, fingerprint) of the nodes that may be copied.
+        """
+        self.filepath = filepath
+        self.spans = spans
+        self.file = None
+        self.data = None
+
+    def __enter__(self):
+        if self.spans and self.filepath and os.path.isfile(self.filepath) and os.path.getsize(self.filepath):
+            self.file = open(self.filepath, "rb")
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def text(self, node_uuid):
+        """
+        Get the source XML of a node.
+
+        Args:
+            node_uuid (str): UUID of the node.
+
+        Returns:
+            str: The XML of the node with \\n line ends, or None if it has no valid span.
+        """
+        span = self.spans.get(node_uuid)
+        if span is None or self.data is None:
+            return None
+        start, end, fingerprint = span
+        source = self.data[start:end]
+        if span_fingerprint(source) != fingerprint:
+            return None
+        try:
+            return source.decode("utf-8").replace("\r\n", "\n")
+        except UnicodeDecodeError:
+            return None
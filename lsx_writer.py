@@ -0,0 +1,169 @@
+import xml.etree.ElementTree as ET
+
+INDENT = "    "
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+
+
+def escape_attribute(value):
+    # Same escaping as ElementTree so the output does not change between the writers
+    if "&" in value:
+        value = value.replace("&", "&amp;")
+    if "<" in value:
+        value = value.replace("<", "&lt;")
+    if ">" in value:
+        value = value.replace(">", "&gt;")
+    if "\"" in value:
+        value = value.replace("\"", "&quot;")
+    if "\r" in value:
+        value = value.replace("\r", "&#13;")
+    if "\n" in value:
+        value = value.replace("\n", "&#10;")
+    if "\t" in value:
+        value = value.replace("\t", "&#09;")
+    return value
+
+
+class LSXWriter:
+    """
+    Streaming writer for indented LSX documents.
+
+    Elements are written as soon as they are started, so a document can be written piece by piece
+    without holding it in memory. The output is the same as indenting the whole tree with four spaces
+    per level and writing it with ElementTree: children on their own lines, closing tags aligned with
+    their start tags and empty elements written as <tag />. LSX elements carry no text, so none is written.
+    """
+
+    def __init__(self, write):
+        """
+        Args:
+            write (callable): Write method of a text stream.
+        """
+        self.write = write
+        self.open_tags = []
+        # The last start tag is still missing its ">" until a child arrives or it is closed empty
+        self.pending = False
+
+    def declaration(self):
+        """Write the XML declaration, before the root element."""
+        self.write(XML_DECLARATION)
+
+    def start(self, tag, attrib=None):
+        """
+        Open an element inside the current one.
+
+        Args:
+            tag (str): Element tag.
+            attrib (dict): Attributes, written in insertion order.
+        """
+        if self.pending:
+            self.write(">")
+        if self.open_tags:
+            self.write("\n" + INDENT * len(self.open_tags))
+        self.write("<" + tag)
+        if attrib:
+            self.write("".join(f" {name}=\"{escape_attribute(value)}\"" for name, value in attrib.items()))
+        self.open_tags.append(tag)
+        self.pending = True
+
+    def end(self):
+        """Close the current element."""
+        tag = self.open_tags.pop()
+        if self.pending:
+            self.write(" />")
+            self.pending = False
+        else:
+            self.write("\n" + INDENT * len(self.open_tags) + "</" + tag + ">")
+        if not self.open_tags:
+            self.write("\n")
+
+    def element(self, element):
+        """
+        Write a complete element and its subtree inside the current element, without recursion.
+
+        Args:
+            element (xml.etree.ElementTree.Element): The element to write.
+        """
+        self.start(element.tag, element.attrib)
+        iterators = [iter(element)]
+        while iterators:
+            child = next(iterators[-1], None)
+            if child is None:
+                iterators.pop()
+                self.end()
+            else:
+                self.start(child.tag, child.attrib)
+                iterators.append(iter(child))
+
+    def fragment(self, elements):
+        """
+        Serialise elements as they would be written inside the current element, for write_fragment.
+
+        Args:
+            elements (iterable of xml.etree.ElementTree.Element): Sibling elements.
+
+        Returns:
+            str: The serialised elements with their indentation.
+        """
+        parts = []
+        writer = LSXWriter(parts.append)
+        writer.open_tags = list(self.open_tags)
+        for element in elements:
+            writer.element(element)
+        return "".join(parts)
+
+    def write_fragment(self, fragment):
+        """
+        Write elements serialised by fragment at the same depth inside the current element.
+
+        Args:
+            fragment (str): Text returned by fragment.
+        """
+        if not fragment:
+            return
+        if self.pending:
+            self.write(">")
+            self.pending = False
+        self.write(fragment)
+
+    def write_verbatim(self, text):
+        """
+        Write an element given as XML text at the current depth. Its inner lines keep their own indentation.
+
+        Args:
+            text (str): XML of one element, with \n line ends.
+        """
+        self.write_fragment("\n" + INDENT * len(self.open_tags) + text)
+
+
+class TreeWriter:
+    """
+    Same interface as LSXWriter, but collects the document into an element tree.
+
+    Used by the exporters that need the whole document, like the LSF writer.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.open_elements = []
+
+    def declaration(self):
+        pass
+
+    def start(self, tag, attrib=None):
+        if self.open_elements:
+            element = ET.SubElement(self.open_elements[-1], tag, attrib or {})
+        else:
+            element = self.root = ET.Element(tag, attrib or {})
+        self.open_elements.append(element)
+
+    def end(self):
+        self.open_elements.pop()
+
+    def element(self, element):
+        if self.open_elements:
+            self.open_elements[-1].append(element)
+        else:
+            self.root = element
+
+    def write_verbatim(self, text):
+        self.element(ET.fromstring(text))
@@ -0,0 +1,296 @@
+import struct
+
+# LZ4 frame format, see https://github.com/lz4/lz4/blob/dev/doc/lz4_Frame_format.md
+FRAME_MAGIC = 0x184D2204
+MIN_MATCH = 4
+# Bit of a block size in a frame that marks the block as stored without compression
+UNCOMPRESSED_BLOCK_FLAG = 0x80000000
+
+
+class LZ4Error(ValueError):
+    pass
+
+
+def decompress_block(source, uncompressed_size=None, output=None):
+    """
+    Decode one LZ4 block.
+
+    Matches may reach back into data already in output, which is how the linked blocks of a frame
+    are decoded: every block is appended to the same output.
+
+    Args:
+        source (bytes | memoryview): The compressed block.
+        uncompressed_size (int): Expected size of the decoded block, checked when given.
+        output (bytearray): Buffer to append to, a new one is created when None.
+
+    Returns:
+        bytearray: The output buffer.
+
+    Raises:
+        LZ4Error: If the block is malformed.
+    """
+    if output is None:
+        output = bytearray()
+    start_size = len(output)
+    source = memoryview(source)
+    end = len(source)
+    position = 0
+    try:
+        while position < end:
+            token = source[position]
+            position += 1
+
+            literal_length = token >> 4
+            if literal_length == 15:
+                while True:
+                    extra = source[position]
+                    position += 1
+                    literal_length += extra
+                    if extra != 255:
+                        break
+            if literal_length:
+                if position + literal_length > end:
+                    raise LZ4Error("Literals run past the end of the block")
+                output += source[position:position + literal_length]
+                position += literal_length
+            if position >= end:
+                break  # The last sequence only has literals
+
+            offset = source[position] | (source[position + 1] << 8)
+            position += 2
+            match_length = token & 15
+            if match_length == 15:
+                while True:
+                    extra = source[position]
+                    position += 1
+                    match_length += extra
+                    if extra != 255:
+                        break
+            match_length += MIN_MATCH
+
+            match_start = len(output) - offset
+            if offset == 0 or match_start < 0:
+                raise LZ4Error(f"Invalid match offset {offset}")
+            if offset >= match_length:
+                output += output[match_start:match_start + match_length]
+            else:
+                # Overlapping match: the last offset bytes repeat
+                pattern = output[match_start:]
+                output += (pattern * (match_length // offset + 1))[:match_length]
+    except IndexError:
+        raise LZ4Error("Truncated LZ4 block") from None
+
+    if uncompressed_size is not None and len(output) - start_size != uncompressed_size:
+        raise LZ4Error(f"Block decoded to {len(output) - start_size} bytes, expected {uncompressed_size}")
+    return output
+
+
+def decompress_frame(source):
+    """
+    Decode an LZ4 frame. Block and content checksums are skipped, not verified.
+
+    Args:
+        source (bytes | memoryview): The frame, starting with the frame magic.
+
+    Returns:
+        bytearray: The decoded content.
+
+    Raises:
+        LZ4Error: If the frame is malformed or uses a preset dictionary.
+    """
+    source = memoryview(source)
+    if len(source) < 7 or struct.unpack_from("<I", source, 0)[0] != FRAME_MAGIC:
+        raise LZ4Error("Not an LZ4 frame")
+    flags = source[4]
+    if flags >> 6 != 1:
+        raise LZ4Error(f"Unsupported LZ4 frame version {flags >> 6}")
+    has_block_checksum = flags & 0x10
+    has_content_size = flags & 0x08
+    has_content_checksum = flags & 0x04
+    if flags & 0x01:
+        raise LZ4Error("LZ4 frames with a preset dictionary are not supported")
+
+    position = 6  # magic, FLG and BD
+    if has_content_size:
+        position += 8
+    position += 1  # header checksum
+
+    output = bytearray()
+    while True:
+        if position + 4 > len(source):
+            raise LZ4Error("Truncated LZ4 frame")
+        block_size = struct.unpack_from("<I", source, position)[0]
+        position += 4
+        if block_size == 0:
+            break  # End mark
+        stored = block_size & UNCOMPRESSED_BLOCK_FLAG
+        block_size &= ~UNCOMPRESSED_BLOCK_FLAG
+        block = source[position:position + block_size]
+        if len(block) != block_size:
+            raise LZ4Error("Truncated LZ4 frame")
+        if stored:
+            output += block
+        else:
+            decompress_block(block, output=output)
+        position += block_size
+        if has_block_checksum:
+            position += 4
+    if has_content_checksum:
+        position += 4
+    return output
+
+
+# ###### COMPRESSION ######
+# Sequences end at least LAST_LITERALS bytes before the end of a block and no match starts in the last MATCH_LIMIT
+LAST_LITERALS = 5
+MATCH_LIMIT = 12
+MAX_OFFSET = 0xFFFF
+# Every 2^SKIP_STRENGTH positions without a match the search step grows by one, like LZ4's acceleration
+SKIP_STRENGTH = 6
+# Frames are written with independent blocks of up to 4 MB and no checksums
+FRAME_BLOCK_SIZE = 4 << 20
+FRAME_FLAGS = 0x60  # Version 01, independent blocks
+FRAME_BLOCK_DESCRIPTOR = 0x70  # 4 MB maximum block size
+
+XXH_PRIME_1 = 2654435761
+XXH_PRIME_2 = 2246822519
+XXH_PRIME_3 = 3266489917
+XXH_PRIME_4 = 668265263
+XXH_PRIME_5 = 374761393
+MASK_32 = 0xFFFFFFFF
+
+
+def write_length(output, length):
+    # Lengths of 15 and above continue in bytes of 255 and a final byte below 255
+    length -= 15
+    while length >= 255:
+        output.append(255)
+        length -= 255
+    output.append(length)
+
+
+def compress_block(source):
+    """
+    Encode data as one LZ4 block with a greedy single-entry hash table.
+
+    Args:
+        source (bytes | bytearray | memoryview): Data to compress.
+
+    Returns:
+        bytearray: The compressed block, without a size prefix.
+    """
+    source = bytes(source)
+    end = len(source)
+    output = bytearray()
+    table = {}
+    anchor = 0
+    position = 0
+    misses = 0
+    match_limit = end - MATCH_LIMIT
+
+    while position < match_limit:
+        sequence = source[position:position + 4]
+        candidate = table.get(sequence)
+        table[sequence] = position
+        if candidate is None or position - candidate > MAX_OFFSET:
+            misses += 1
+            position += 1 + (misses >> SKIP_STRENGTH)
+            continue
+        misses = 0
+
+        # Extend the match, 8 bytes at a time while possible
+        match_length = 4
+        max_length = end - LAST_LITERALS - position
+        while (match_length + 8 <= max_length and source[position + match_length:position + match_length + 8]
+               == source[candidate + match_length:candidate + match_length + 8]):
+            match_length += 8
+        while match_length < max_length and source[position + match_length] == source[candidate + match_length]:
+            match_length += 1
+
+        literal_length = position - anchor
+        output.append((min(literal_length, 15) << 4) | min(match_length - 4, 15))
+        if literal_length >= 15:
+            write_length(output, literal_length)
+        output += source[anchor:position]
+        offset = position - candidate
+        output.append(offset & 0xFF)
+        output.append(offset >> 8)
+        if match_length - 4 >= 15:
+            write_length(output, match_length - 4)
+
+        position += match_length
+        anchor = position
+
+    # The last sequence only has literals
+    literal_length = end - anchor
+    output.append(min(literal_length, 15) << 4)
+    if literal_length >= 15:
+        write_length(output, literal_length)
+    output += source[anchor:]
+    return output
+
+
+def rotate_left_32(value, count):
+    return ((value << count) | (value >> (32 - count))) & MASK_32
+
+
+def xxh32(data, seed=0):
+    """XXH32 hash of data, used for the LZ4 frame header checksum."""
+    data = bytes(data)
+    length = len(data)
+    position = 0
+    if length >= 16:
+        lanes = [(seed + XXH_PRIME_1 + XXH_PRIME_2) & MASK_32, (seed + XXH_PRIME_2) & MASK_32,
+                 seed & MASK_32, (seed - XXH_PRIME_1) & MASK_32]
+        while position + 16 <= length:
+            for lane, word in enumerate(struct.unpack_from("<4I", data, position)):
+                lanes[lane] = rotate_left_32((lanes[lane] + word * XXH_PRIME_2) & MASK_32, 13) * XXH_PRIME_1 & MASK_32
+            position += 16
+        value = (rotate_left_32(lanes[0], 1) + rotate_left_32(lanes[1], 7)
+                 + rotate_left_32(lanes[2], 12) + rotate_left_32(lanes[3], 18)) & MASK_32
+    else:
+        value = (seed + XXH_PRIME_5) & MASK_32
+    value = (value + length) & MASK_32
+
+    while position + 4 <= length:
+        word = struct.unpack_from("<I", data, position)[0]
+        value = rotate_left_32((value + word * XXH_PRIME_3) & MASK_32, 17) * XXH_PRIME_4 & MASK_32
+        position += 4
+    while position < length:
+        value = rotate_left_32((value + data[position] * XXH_PRIME_5) & MASK_32, 11) * XXH_PRIME_1 & MASK_32
+        position += 1
+
+    value ^= value >> 15
+    value = value * XXH_PRIME_2 & MASK_32
+    value ^= value >> 13
+    value = value * XXH_PRIME_3 & MASK_32
+    value ^= value >> 16
+    return value
+
+
+def compress_frame(source):
+    """
+    Encode data as an LZ4 frame of independent blocks. Blocks that do not shrink are stored as is.
+
+    Args:
+        source (bytes | bytearray | memoryview): Data to compress.
+
+    Returns:
+        bytearray: The frame.
+    """
+    source = memoryview(bytes(source))
+    descriptor = bytes((FRAME_FLAGS, FRAME_BLOCK_DESCRIPTOR))
+    output = bytearray(struct.pack("<I", FRAME_MAGIC))
+    output += descriptor
+    output.append((xxh32(descriptor) >> 8) & 0xFF)
+    for start in range(0, len(source), FRAME_BLOCK_SIZE):
+        block = source[start:start + FRAME_BLOCK_SIZE]
+        compressed = compress_block(block)
+        if len(compressed) < len(block):
+            output += struct.pack("<I", len(compressed))
+            output += compressed
+        else:
+            output += struct.pack("<I", len(block) | UNCOMPRESSED_BLOCK_FLAG)
+            output += block
+    output += struct.pack("<I", 0)  # End mark
+    return output
@@ -2,7 +2,9 @@ import bpy
 import uuid
 from nodeitems_utils import NodeCategory, NodeItem, register_node_categories, unregister_node_categories
 from bpy.types import Context, Panel, Node, NodeTree, NodeSocket
-from .options import skill_options
+from .options import skill_options, difficulty_class_options
+from .uuid_index import (uuid_index, tree_changed, node_changed, node_uuid_changed, node_property_changed,
+                         item_property_changed)
 
 
 # ####TO-DO - condense drawing setflags and checkflags into a helper function
@@ -92,6 +94,7 @@ class SpeakerItem(bpy.types.PropertyGroup):
 
 class ValidatedFlagsEntry(bpy.types.PropertyGroup):
     uuid: bpy.props.StringProperty(name="UUID", description="UUID of the node with ValidatedFlags")
+    has_value: bpy.props.BoolProperty(name="Has Value", description="ValidatedHasValue of the node", default=False)
 
     
 # ###### NODETREE AND PROPERTIES ######
@@ -140,26 +143,30 @@ class DialogueNodeTree(bpy.types.NodeTree):
     )
 
     validated_flags: bpy.props.CollectionProperty(type=ValidatedFlagsEntry)
+
+    # Nodes or links were added or removed, the UUID index has to be rebuilt
+    def update(self):
+        tree_changed(self)
     
 # All the attributes under the TaggedText node
 class TaggedTextItem(bpy.types.PropertyGroup):
-    handle: bpy.props.StringProperty(name="Handle", description="Handle ID for the dialogue line")
-    version: bpy.props.IntProperty(name="Version", description="Handle version", default=1)
-    text: bpy.props.StringProperty(name="Text", description="Text for the dialogue line")
-    has_tag_rule: bpy.props.BoolProperty(name="Has Tag Rule", default=True)
-    stub: bpy.props.BoolProperty(name="Stub", default=True)
-    lineid: bpy.props.StringProperty(name="Line ID", description="Line ID")
+    handle: bpy.props.StringProperty(name="Handle", description="Handle ID for the dialogue line", update=item_property_changed)
+    version: bpy.props.IntProperty(name="Version", description="Handle version", default=1, update=item_property_changed)
+    text: bpy.props.StringProperty(name="Text", description="Text for the dialogue line", update=item_property_changed)
+    has_tag_rule: bpy.props.BoolProperty(name="Has Tag Rule", default=True, update=item_property_changed)
+    stub: bpy.props.BoolProperty(name="Stub", default=True, update=item_property_changed)
+    lineid: bpy.props.StringProperty(name="Line ID", description="Line ID", update=item_property_changed)
 
 
 #For Nested Dialog Nodes (Speaker Linking Entries)
 class SpeakerLinkingEntry(bpy.types.PropertyGroup):
-    key: bpy.props.IntProperty(name="Key", description="Speaker Linking Entry Key")
-    value: bpy.props.IntProperty(name="Value", description="Speaker Linking Entry Value")
+    key: bpy.props.IntProperty(name="Key", description="Speaker Linking Entry Key", update=item_property_changed)
+    value: bpy.props.IntProperty(name="Value", description="Speaker Linking Entry Value", update=item_property_changed)
 
 # Checking and setting flags
 class CheckFlagPropertyGroup(bpy.types.PropertyGroup):
-    name: bpy.props.StringProperty(name="Flag Name", default="")
-    is_true: bpy.props.BoolProperty(name="True", default=False)
+    name: bpy.props.StringProperty(name="Flag Name", default="", update=item_property_changed)
+    is_true: bpy.props.BoolProperty(name="True", default=False, update=item_property_changed)
     flag_type: bpy.props.EnumProperty(
         name="Flag Type",
         items=[
@@ -172,17 +179,18 @@ class CheckFlagPropertyGroup(bpy.types.PropertyGroup):
             ('Script', 'Script', 'Script Flag'),
             ('Quest', 'Quest', 'Quest Flag'),
         ],
-        default='Global'
+        default='Global',
+        update=item_property_changed
     )
-    has_paramval: bpy.props.BoolProperty(name="Has ParamVal", description="Has ParamVal", default=False)
-    paramval: bpy.props.IntProperty(name="ParamVal", description="Optional paramval for the flag", default=0)
+    has_paramval: bpy.props.BoolProperty(name="Has ParamVal", description="Has ParamVal", default=False, update=item_property_changed)
+    paramval: bpy.props.IntProperty(name="ParamVal", description="Optional paramval for the flag", default=0, update=item_property_changed)
 
     def toggle_paramval(self):
         self.has_paramval = not self.has_paramval
 
 class SetFlagPropertyGroup(bpy.types.PropertyGroup):
-    name: bpy.props.StringProperty(name="Flag Name", default="")
-    is_true: bpy.props.BoolProperty(name="True", default=False)
+    name: bpy.props.StringProperty(name="Flag Name", default="", update=item_property_changed)
+    is_true: bpy.props.BoolProperty(name="True", default=False, update=item_property_changed)
     flag_type: bpy.props.EnumProperty(
         name="Flag Type",
         items=[
@@ -195,10 +203,11 @@ class SetFlagPropertyGroup(bpy.types.PropertyGroup):
             ('Script', 'Script', 'Script Flag'),
             ('Quest', 'Quest', 'Quest Flag'),
         ],
-        default='Global'
+        default='Global',
+        update=item_property_changed
     )
-    has_paramval: bpy.props.BoolProperty(name="Has ParamVal", description="Has ParamVal", default=False)
-    paramval: bpy.props.IntProperty(name="ParamVal", description="Optional paramval for the flag", default=0)
+    has_paramval: bpy.props.BoolProperty(name="Has ParamVal", description="Has ParamVal", default=False, update=item_property_changed)
+    paramval: bpy.props.IntProperty(name="ParamVal", description="Optional paramval for the flag", default=0, update=item_property_changed)
 
     def toggle_paramval(self):
         self.has_paramval = not self.has_paramval
@@ -216,7 +225,8 @@ class DialogueLineNode(bpy.types.Node):
     cinematic_node_context: bpy.props.StringProperty(
         name="Cinematic Node Context",
         default="",
-        description="Notes for cinematic shots"
+        description="Notes for cinematic shots",
+        update=node_property_changed
     )
 
     constructor_options = [
@@ -226,17 +236,17 @@ class DialogueLineNode(bpy.types.Node):
         ('TagCinematic', "TagCinematic", "Cinematic shot"),
     ]
 
-    constructor: bpy.props.EnumProperty(name="Constructor", items=constructor_options, default='TagGreeting')
-    uuid: bpy.props.StringProperty(name="UUID")
-    ShowOnce: bpy.props.BoolProperty(name="Show Once", default=False)
-    groupid: bpy.props.StringProperty(name="Group ID", default="")
-    groupindex: bpy.props.IntProperty(name="Group Index", default=0)
-    root: bpy.props.BoolProperty(name="Root", default=False)
-    endnode: bpy.props.BoolProperty(name="End Node", default=False)
-    speaker: bpy.props.IntProperty(name="Speaker", default=0)
-    approvalratingid: bpy.props.StringProperty(name="Approval Rating ID", default="")
-    setflags: bpy.props.StringProperty(name="Set Flags", default="")
-    checkflags: bpy.props.StringProperty(name="Check Flags", default="")
+    constructor: bpy.props.EnumProperty(name="Constructor", items=constructor_options, default='TagGreeting', update=node_property_changed)
+    uuid: bpy.props.StringProperty(name="UUID", update=node_uuid_changed)
+    ShowOnce: bpy.props.BoolProperty(name="Show Once", default=False, update=node_property_changed)
+    groupid: bpy.props.StringProperty(name="Group ID", default="", update=node_property_changed)
+    groupindex: bpy.props.IntProperty(name="Group Index", default=0, update=node_property_changed)
+    root: bpy.props.BoolProperty(name="Root", default=False, update=node_property_changed)
+    endnode: bpy.props.BoolProperty(name="End Node", default=False, update=node_property_changed)
+    speaker: bpy.props.IntProperty(name="Speaker", default=0, update=node_property_changed)
+    approvalratingid: bpy.props.StringProperty(name="Approval Rating ID", default="", update=node_property_changed)
+    setflags: bpy.props.StringProperty(name="Set Flags", default="", update=node_property_changed)
+    checkflags: bpy.props.StringProperty(name="Check Flags", default="", update=node_property_changed)
     
     handles_texts: bpy.props.CollectionProperty(
         type=TaggedTextItem,
@@ -254,6 +264,11 @@ class DialogueLineNode(bpy.types.Node):
         output_socket.link_limit = 0  # Unlimited links
         if not self.get("uuid"):
             self["uuid"] = str(uuid.uuid4())
+        node_changed(self)
+
+    # Duplicated and pasted nodes get a version of their own, like new ones
+    def copy(self, node):
+        node_changed(self)
             
     def draw_buttons(self, context, layout):
         layout.prop(self, "constructor")
@@ -346,14 +361,18 @@ class DialogueLineNode(bpy.types.Node):
         return f"Dialogue: {self.constructor}"
         
 
+# Pointers of the node trees the importer is linking in bulk. Node update callbacks skip these trees,
+# the importer tags the tree for a single update once all links exist
+BULK_LINKING_TREES = set()
+
 # JUMP NODE
 class DialogueJumpNode(bpy.types.Node):
     bl_idname = "DialogueJumpNode"
     bl_label = "Dialogue Jump Node"
 
-    uuid: bpy.props.StringProperty(name="UUID")
-    jumptarget: bpy.props.StringProperty(name="Jump Target")
-    jumptargetpoint: bpy.props.IntProperty(name="Jump Target Point", default=1)
+    uuid: bpy.props.StringProperty(name="UUID", update=node_uuid_changed)
+    jumptarget: bpy.props.StringProperty(name="Jump Target", update=node_property_changed)
+    jumptargetpoint: bpy.props.IntProperty(name="Jump Target Point", default=1, update=node_property_changed)
 
     def init(self, context):
         # Use the custom socket class for inputs and outputs
@@ -364,9 +383,15 @@ class DialogueJumpNode(bpy.types.Node):
         output_socket.link_limit = 0  # Unlimited links
         if not self.get("uuid"):
             self["uuid"] = str(uuid.uuid4())
+        node_changed(self)
+
+    def copy(self, node):
+        node_changed(self)
 
     # Automatically update jumptarget based on node children AND skip reroutes
     def update(self):
+        if self.id_data.as_pointer() in BULK_LINKING_TREES:
+            return
         if self.outputs and self.outputs[0].is_linked:
             connected_node = self.outputs[0].links[0].to_node
 
@@ -384,6 +409,8 @@ class DialogueJumpNode(bpy.types.Node):
     def draw_buttons(self, context, layout):
         layout.prop(self, "uuid", text="UUID")
         layout.prop(self, "jumptarget")
+        if self.jumptarget and self.jumptarget not in uuid_index(self.id_data):
+            layout.label(text="Jump target not found", icon='ERROR')
         layout.prop(self, "jumptargetpoint")
 
     def draw_label(self):
@@ -412,13 +439,15 @@ class DialogueRollNode(bpy.types.Node):
         name="Skill",
         description="Select the skill associated with the Ability",
         items=skill_options,
-        default='None'
+        default='None',
+        update=node_property_changed
     )
 
     Ability: bpy.props.EnumProperty(
         name="Ability",
         items=ability_options,
         default='Wisdom',
+        update=node_property_changed
     )
 
     constructor_options = [
@@ -432,50 +461,22 @@ class DialogueRollNode(bpy.types.Node):
         ('RawAbility', "RawAbility", "A raw ability check"),
     ]
 
-    DifficultyClassID_options = [
-        # Act1
-        ('4dfcb0ff-e02a-4efd-b132-77dfd956055e', 'Act1 Zero', 'DC 0'),
-        ('2728289e-841d-4273-a29a-f24ae9f8c4fb', 'Act1 Negligible', 'DC 2'),
-        ('8d398021-34e0-40b9-b7b2-0445f38a4c0b', 'Act1 Very Easy', 'DC 5'),
-        ('31e92da6-bac9-46f7-af99-5f33d98fd4f0', 'Act1 Easy', 'DC 7'),
-        ('fa621d38-6f83-4e42-a55c-6aa651a75d46', 'Act1 Medium', 'DC 10'),
-        ('5e7ff0e9-6c80-459c-a636-3a3e8417a61a', 'Act1 Challenging', 'DC 12'),
-        ('831e1fbe-428d-4f4d-bd17-4206d6efea35', 'Act1 Hard', 'DC 15'),
-        ('8986db4d-09af-46ee-9781-ac88ec10fa0e', 'Act1 Very Hard', 'DC 18'),
-        ('ea049218-36a8-4440-a3fc-f3019a57c86b', 'Act1 Nearly Impossible', 'DC 20'),
-        # Act2
-        ('9d1f2171-fef1-4c03-9e83-523485174c46', 'Act2 Very Easy', 'DC 6'),
-        ('0d9484eb-f680-4a33-853d-46fda64883f2', 'Act2 Easy', 'DC 10'),
-        ('89f0acd4-346f-479d-8b7a-1a3eb5382f6d', 'Act2 Medium', 'DC 14'),
-        ('c44bfd7d-84de-4568-9c57-a059b8df5435', 'Act2 Challenging', 'DC 16'),
-        ('91fb3598-dd68-4fa8-a306-2c7284709b08', 'Act2 Hard', 'DC 18'),
-        ('f3aa825b-785e-4f4a-90af-565c7e943609', 'Act2 Very Hard', 'DC 21'),
-        ('753ed8df-b5dc-4584-b9fa-de18c4c956b2', 'Act2 Extra Hard', 'DC 24'),
-        ('52918812-bc1c-43b5-881a-58443902f5fa', 'Act2 Nearly Impossible', 'DC 30'),
-        # Act3
-        ('b9cea18d-f40a-444d-a692-76582a69130c', 'Act3 Very Easy', 'DC 7'),
-        ('5028066b-6ea0-4a6a-9e3e-53bee62559a7', 'Act3 Easy', 'DC 10'),
-        ('77cee1c4-384a-4217-b670-67db3c7add57', 'Act3 Medium', 'DC 15'),
-        ('96bc76f2-0b2e-4a79-854f-e4971a772c36', 'Act3 Challenging', 'DC 18'),
-        ('6298329e-255c-4826-9209-e911873b64e7', 'Act3 Hard', 'DC 20'),
-        ('60916b01-ba4c-418e-9f30-19a669704b4d', 'Act3 Very Hard', 'DC 25'),
-        ('7bf230a0-b68a-4c79-a785-79b498d6c36b', 'Act3 Nearly Impossible', 'DC 30'),
-    ]
-
-    constructor: bpy.props.EnumProperty(name="Constructor", items=constructor_options, default='ActiveRoll')
-    uuid: bpy.props.StringProperty(name="UUID")
-    ShowOnce: bpy.props.BoolProperty(name="Show Once", default=False)
-    transitionmode: bpy.props.IntProperty(name="Transition Mode", default=0)
-    speaker: bpy.props.IntProperty(name="Speaker", default=0)
-    approvalratingid: bpy.props.StringProperty(name="Approval Rating ID", default="")
-    RollType: bpy.props.EnumProperty(name="Roll Type", items=rolltype_options, default='SkillCheck')
-    RollTargetSpeaker: bpy.props.IntProperty(name="Roll Target Speaker", default=0)
-    Advantage: bpy.props.IntProperty(name="Advantage", default=0)
-    ExcludeCompanionsOptionalBonuses: bpy.props.BoolProperty(name="Exclude Companions Optional Bonuses", default=False)
-    ExcludeSpeakerOptionalBonuses: bpy.props.BoolProperty(name="Exclude Speaker Optional Bonuses", default=False)
-    DifficultyClassID: bpy.props.EnumProperty(name="Difficulty Class", items=DifficultyClassID_options, default='31e92da6-bac9-46f7-af99-5f33d98fd4f0')
-    setflags: bpy.props.StringProperty(name="Set Flags", default="")
-    checkflags: bpy.props.StringProperty(name="Check Flags", default="")
+    DifficultyClassID_options = difficulty_class_options
+
+    constructor: bpy.props.EnumProperty(name="Constructor", items=constructor_options, default='ActiveRoll', update=node_property_changed)
+    uuid: bpy.props.StringProperty(name="UUID", update=node_uuid_changed)
+    ShowOnce: bpy.props.BoolProperty(name="Show Once", default=False, update=node_property_changed)
+    transitionmode: bpy.props.IntProperty(name="Transition Mode", default=0, update=node_property_changed)
+    speaker: bpy.props.IntProperty(name="Speaker", default=0, update=node_property_changed)
+    approvalratingid: bpy.props.StringProperty(name="Approval Rating ID", default="", update=node_property_changed)
+    RollType: bpy.props.EnumProperty(name="Roll Type", items=rolltype_options, default='SkillCheck', update=node_property_changed)
+    RollTargetSpeaker: bpy.props.IntProperty(name="Roll Target Speaker", default=0, update=node_property_changed)
+    Advantage: bpy.props.IntProperty(name="Advantage", default=0, update=node_property_changed)
+    ExcludeCompanionsOptionalBonuses: bpy.props.BoolProperty(name="Exclude Companions Optional Bonuses", default=False, update=node_property_changed)
+    ExcludeSpeakerOptionalBonuses: bpy.props.BoolProperty(name="Exclude Speaker Optional Bonuses", default=False, update=node_property_changed)
+    DifficultyClassID: bpy.props.EnumProperty(name="Difficulty Class", items=DifficultyClassID_options, default='31e92da6-bac9-46f7-af99-5f33d98fd4f0', update=node_property_changed)
+    setflags: bpy.props.StringProperty(name="Set Flags", default="", update=node_property_changed)
+    checkflags: bpy.props.StringProperty(name="Check Flags", default="", update=node_property_changed)
 
     handles_texts: bpy.props.CollectionProperty(
         type=TaggedTextItem,
@@ -493,6 +494,10 @@ class DialogueRollNode(bpy.types.Node):
         output_socket.link_limit = 0  # Unlimited links
         if not self.get("uuid"):
             self["uuid"] = str(uuid.uuid4())
+        node_changed(self)
+
+    def copy(self, node):
+        node_changed(self)
 
     def draw_buttons(self, context, layout):
         layout.prop(self, "constructor")
@@ -590,13 +595,13 @@ class DialogueRollResultNode(bpy.types.Node):
     bl_idname = "DialogueRollResultNode"
     bl_label = "Dialogue Roll Result Node"
     
-    constructor: bpy.props.StringProperty(name="Constructor", default="RollResult")
-    uuid: bpy.props.StringProperty(name="UUID")
+    constructor: bpy.props.StringProperty(name="Constructor", default="RollResult", update=node_property_changed)
+    uuid: bpy.props.StringProperty(name="UUID", update=node_uuid_changed)
     # Properties for flags
     SetFlags: bpy.props.CollectionProperty(type=SetFlagPropertyGroup)
     CheckFlags: bpy.props.CollectionProperty(type=CheckFlagPropertyGroup)
 
-    Success: bpy.props.BoolProperty(name="Success", default=False)
+    Success: bpy.props.BoolProperty(name="Success", default=False, update=node_property_changed)
 
     def init(self, context):
         self.width = 400
@@ -608,6 +613,10 @@ class DialogueRollResultNode(bpy.types.Node):
         output_socket.link_limit = 0  # Unlimited links
         if not self.get("uuid"):
             self["uuid"] = str(uuid.uuid4())
+        node_changed(self)
+
+    def copy(self, node):
+        node_changed(self)
 
     def draw_buttons(self, context, layout):
         layout.prop(self, "uuid", text="UUID")
@@ -664,15 +673,15 @@ class DialogueAliasNode(bpy.types.Node):
     SetFlags: bpy.props.CollectionProperty(type=SetFlagPropertyGroup)
     CheckFlags: bpy.props.CollectionProperty(type=CheckFlagPropertyGroup)
 
-    constructor: bpy.props.StringProperty(name="Constructor", default="Alias")
-    uuid: bpy.props.StringProperty(name="UUID")
-    Greeting: bpy.props.BoolProperty(name="Greeting", default=False)
-    root: bpy.props.BoolProperty(name="Root", default=False)
-    endnode: bpy.props.BoolProperty(name="End Node", default=False)
-    speaker: bpy.props.IntProperty(name="Speaker", default=0)
-    sourcenode: bpy.props.StringProperty(name="Source Node", default="")
-    setflags: bpy.props.StringProperty(name="Set Flags", default="")
-    checkflags: bpy.props.StringProperty(name="Check Flags", default="")
+    constructor: bpy.props.StringProperty(name="Constructor", default="Alias", update=node_property_changed)
+    uuid: bpy.props.StringProperty(name="UUID", update=node_uuid_changed)
+    Greeting: bpy.props.BoolProperty(name="Greeting", default=False, update=node_property_changed)
+    root: bpy.props.BoolProperty(name="Root", default=False, update=node_property_changed)
+    endnode: bpy.props.BoolProperty(name="End Node", default=False, update=node_property_changed)
+    speaker: bpy.props.IntProperty(name="Speaker", default=0, update=node_property_changed)
+    sourcenode: bpy.props.StringProperty(name="Source Node", default="", update=node_property_changed)
+    setflags: bpy.props.StringProperty(name="Set Flags", default="", update=node_property_changed)
+    checkflags: bpy.props.StringProperty(name="Check Flags", default="", update=node_property_changed)
 
     def init(self, context):
         self.width = 400
@@ -684,6 +693,10 @@ class DialogueAliasNode(bpy.types.Node):
         output_socket.link_limit = 0  # Unlimited links
         if not self.get("uuid"):
             self["uuid"] = str(uuid.uuid4())
+        node_changed(self)
+
+    def copy(self, node):
+        node_changed(self)
 
     def draw_buttons(self, context, layout):
         layout.prop(self, "constructor")
@@ -748,15 +761,16 @@ class DialogueVisualStateNode(bpy.types.Node):
     cinematic_node_context: bpy.props.StringProperty(
         name="Cinematic Node Context",
         default="",
-        description="Notes for cinematic shots"
+        description="Notes for cinematic shots",
+        update=node_property_changed
     )
 
-    constructor: bpy.props.StringProperty(name="Constructor", default="Visual State")
-    uuid: bpy.props.StringProperty(name="UUID")
-    groupid: bpy.props.StringProperty(name="Group ID", default="")
-    groupindex: bpy.props.IntProperty(name="Group Index", default=0)
-    setflags: bpy.props.StringProperty(name="Set Flags", default="")
-    checkflags: bpy.props.StringProperty(name="Check Flags", default="")
+    constructor: bpy.props.StringProperty(name="Constructor", default="Visual State", update=node_property_changed)
+    uuid: bpy.props.StringProperty(name="UUID", update=node_uuid_changed)
+    groupid: bpy.props.StringProperty(name="Group ID", default="", update=node_property_changed)
+    groupindex: bpy.props.IntProperty(name="Group Index", default=0, update=node_property_changed)
+    setflags: bpy.props.StringProperty(name="Set Flags", default="", update=node_property_changed)
+    checkflags: bpy.props.StringProperty(name="Check Flags", default="", update=node_property_changed)
 
     def init(self, context):
         self.width = 400
@@ -768,6 +782,10 @@ class DialogueVisualStateNode(bpy.types.Node):
         output_socket.link_limit = 0  # Unlimited links
         if not self.get("uuid"):
             self["uuid"] = str(uuid.uuid4())
+        node_changed(self)
+
+    def copy(self, node):
+        node_changed(self)
 
     def draw_buttons(self, context, layout):
         layout.prop(self, "constructor")
@@ -836,14 +854,15 @@ class NestedDialogNode(bpy.types.Node):
     cinematic_node_context: bpy.props.StringProperty(
         name="Cinematic Node Context",
         default="",
-        description="Notes for cinematic shots"
+        description="Notes for cinematic shots",
+        update=node_property_changed
     )
 
-    constructor: bpy.props.StringProperty(name="Constructor", default="Nested Dialog")
-    uuid: bpy.props.StringProperty(name="UUID")
-    root: bpy.props.BoolProperty(name="Root", default=False)
-    endnode: bpy.props.BoolProperty(name="End Node", default=False)
-    NestedDialogNodeUUID: bpy.props.StringProperty(name="Nested Dialog Node UUID", default="")
+    constructor: bpy.props.StringProperty(name="Constructor", default="Nested Dialog", update=node_property_changed)
+    uuid: bpy.props.StringProperty(name="UUID", update=node_uuid_changed)
+    root: bpy.props.BoolProperty(name="Root", default=False, update=node_property_changed)
+    endnode: bpy.props.BoolProperty(name="End Node", default=False, update=node_property_changed)
+    NestedDialogNodeUUID: bpy.props.StringProperty(name="Nested Dialog Node UUID", default="", update=node_property_changed)
 
     def init(self, context):
         self.width = 400
@@ -855,6 +874,10 @@ class NestedDialogNode(bpy.types.Node):
         output_socket.link_limit = 0  # Unlimited links
         if not self.get("uuid"):
             self["uuid"] = str(uuid.uuid4())
+        node_changed(self)
+
+    def copy(self, node):
+        node_changed(self)
 
     def draw_buttons(self, context, layout):
         layout.prop(self, "uuid", text="UUID")
@@ -928,10 +951,10 @@ class TradeNode(bpy.types.Node):
     SetFlags: bpy.props.CollectionProperty(type=SetFlagPropertyGroup)
     CheckFlags: bpy.props.CollectionProperty(type=CheckFlagPropertyGroup)
 
-    constructor: bpy.props.StringProperty(name="Constructor", default="Trade")
-    uuid: bpy.props.StringProperty(name="UUID")
-    speaker: bpy.props.IntProperty(name="Speaker", default=0)
-    trademode: bpy.props.IntProperty(name="Trade Mode", default=1)
+    constructor: bpy.props.StringProperty(name="Constructor", default="Trade", update=node_property_changed)
+    uuid: bpy.props.StringProperty(name="UUID", update=node_uuid_changed)
+    speaker: bpy.props.IntProperty(name="Speaker", default=0, update=node_property_changed)
+    trademode: bpy.props.IntProperty(name="Trade Mode", default=1, update=node_property_changed)
 
     def init(self, context):
         self.width = 400
@@ -943,6 +966,10 @@ class TradeNode(bpy.types.Node):
         output_socket.link_limit = 0  # Unlimited links
         if not self.get("uuid"):
             self["uuid"] = str(uuid.uuid4())
+        node_changed(self)
+
+    def copy(self, node):
+        node_changed(self)
 
     def draw_buttons(self, context, layout):
         layout.prop(self, "uuid", text="UUID")
@@ -19,3 +19,33 @@ skill_options = [
     ('Performance', 'Performance', 'Performance'),
     ('Persuasion', 'Persuasion', 'Persuasion'),
 ]
+
+difficulty_class_options = [
+    # Act1
+    ('4dfcb0ff-e02a-4efd-b132-77dfd956055e', 'Act1 Zero', 'DC 0'),
+    ('2728289e-841d-4273-a29a-f24ae9f8c4fb', 'Act1 Negligible', 'DC 2'),
+    ('8d398021-34e0-40b9-b7b2-0445f38a4c0b', 'Act1 Very Easy', 'DC 5'),
+    ('31e92da6-bac9-46f7-af99-5f33d98fd4f0', 'Act1 Easy', 'DC 7'),
+    ('fa621d38-6f83-4e42-a55c-6aa651a75d46', 'Act1 Medium', 'DC 10'),
+    ('5e7ff0e9-6c80-459c-a636-3a3e8417a61a', 'Act1 Challenging', 'DC 12'),
+    ('831e1fbe-428d-4f4d-bd17-4206d6efea35', 'Act1 Hard', 'DC 15'),
+    ('8986db4d-09af-46ee-9781-ac88ec10fa0e', 'Act1 Very Hard', 'DC 18'),
+    ('ea049218-36a8-4440-a3fc-f3019a57c86b', 'Act1 Nearly Impossible', 'DC 20'),
+    # Act2
+    ('9d1f2171-fef1-4c03-9e83-523485174c46', 'Act2 Very Easy', 'DC 6'),
+    ('0d9484eb-f680-4a33-853d-46fda64883f2', 'Act2 Easy', 'DC 10'),
+    ('89f0acd4-346f-479d-8b7a-1a3eb5382f6d', 'Act2 Medium', 'DC 14'),
+    ('c44bfd7d-84de-4568-9c57-a059b8df5435', 'Act2 Challenging', 'DC 16'),
+    ('91fb3598-dd68-4fa8-a306-2c7284709b08', 'Act2 Hard', 'DC 18'),
+    ('f3aa825b-785e-4f4a-90af-565c7e943609', 'Act2 Very Hard', 'DC 21'),
+    ('753ed8df-b5dc-4584-b9fa-de18c4c956b2', 'Act2 Extra Hard', 'DC 24'),
+    ('52918812-bc1c-43b5-881a-58443902f5fa', 'Act2 Nearly Impossible', 'DC 30'),
+    # Act3
+    ('b9cea18d-f40a-444d-a692-76582a69130c', 'Act3 Very Easy', 'DC 7'),
+    ('5028066b-6ea0-4a6a-9e3e-53bee62559a7', 'Act3 Easy', 'DC 10'),
+    ('77cee1c4-384a-4217-b670-67db3c7add57', 'Act3 Medium', 'DC 15'),
+    ('96bc76f2-0b2e-4a79-854f-e4971a772c36', 'Act3 Challenging', 'DC 18'),
+    ('6298329e-255c-4826-9209-e911873b64e7', 'Act3 Hard', 'DC 20'),
+    ('60916b01-ba4c-418e-9f30-19a669704b4d', 'Act3 Very Hard', 'DC 25'),
+    ('7bf230a0-b68a-4c79-a785-79b498d6c36b', 'Act3 Nearly Impossible', 'DC 30'),
+]
\ No newline at end of file
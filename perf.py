@@ -0,0 +1,182 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Latest metrics of every operation, by operation name, shown in the Performance panel
+RECENT_METRICS = {}
+
+
+class OperationMetrics:
+    """
+    Phase timings of one import or export.
+
+    Every phase records its wall time and, when memory tracking is on, the tracemalloc peak reached
+    while it ran. Phases entered more than once (like the time slices of a modal import) accumulate.
+    Counts hold the sizes the operation worked on, like nodes and links.
+    """
+
+    def __init__(self, operation, filepath="", track_memory=False, metrics_path=""):
+        """
+        Args:
+            operation (str): Name of the operation, like "Import".
+            filepath (str): File the operation reads or writes.
+            track_memory (bool): Record the memory peak of every phase with tracemalloc.
+            metrics_path (str): JSON lines file the metrics are appended to when finished, may be empty.
+        """
+        self.operation = operation
+        self.filepath = filepath
+        self.metrics_path = metrics_path
+        self.started = time.time()
+        self.start_time = time.perf_counter()
+        # Phase name -> [seconds, calls, peak bytes], in the order the phases first ran
+        self.phases = {}
+        self.counts = {}
+        # Set by finish, later calls return it unchanged
+        self.result = None
+        # Only stop tracing on finish if these metrics started it
+        self.owns_tracing = track_memory and not tracemalloc.is_tracing()
+        if self.owns_tracing:
+            tracemalloc.start()
+        self.track_memory = track_memory
+
+    def add(self, name, seconds, peak=None):
+        """
+        Charge time to a phase.
+
+        Args:
+            name (str): Phase name.
+            seconds (float): Wall time spent in the phase.
+            peak (int): Traced memory peak in bytes while the phase ran, or None.
+        """
+        phase = self.phases.setdefault(name, [0.0, 0, None])
+        phase[0] += seconds
+        phase[1] += 1
+        if peak is not None and (phase[2] is None or peak > phase[2]):
+            phase[2] = peak
+
+    def begin_phase(self):
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        return time.perf_counter()
+
+    def end_phase(self, name, start):
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if self.track_memory and tracemalloc.is_tracing() else None
+        self.add(name, seconds, peak)
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a with statement as a phase, also when it raises."""
+        start = self.begin_phase()
+        try:
+            yield
+        finally:
+            self.end_phase(name, start)
+
+    def timed_steps(self, steps):
+        """
+        Time a generator of (stage, ...) steps, charging the work before every step to its stage.
+
+        The time the consumer spends between steps is not charged, so steps run in time slices are
+        measured without the idle time between the slices.
+
+        Args:
+            steps (generator): Yields tuples starting with the stage name.
+
+        Yields:
+            The steps unchanged.
+        """
+        stage = None
+        start = self.begin_phase()
+        try:
+            for step in steps:
+                stage = step[0]
+                self.end_phase(stage, start)
+                yield step
+                start = self.begin_phase()
+            # Work after the last step belongs to the last stage
+            if stage is not None:
+                self.end_phase(stage, start)
+        finally:
+            steps.close()
+
+    def count(self, name, value):
+        """Set a count, like the number of nodes or links."""
+        self.counts[name] = value
+
+    def as_dict(self, completed=True):
+        """
+        The metrics as plain data, the format of the metrics file.
+
+        Args:
+            completed (bool): False if the operation failed or was cancelled.
+
+        Returns:
+            dict: Operation, file, start time, total and per phase seconds, memory peaks and counts.
+        """
+        return {
+            "operation": self.operation,
+            "file": self.filepath,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "completed": completed,
+            "total_seconds": round(time.perf_counter() - self.start_time, 6),
+            "phases": [
+                {"name": name, "seconds": round(seconds, 6), "calls": calls, "peak_bytes": peak}
+                for name, (seconds, calls, peak) in self.phases.items()
+            ],
+            "counts": dict(self.counts),
+        }
+
+    def finish(self, log=None, completed=True):
+        """
+        Stop memory tracking, show the metrics in the Performance panel and append them to the metrics file.
+
+        Args:
+            log (DialogLog): Log of the operation for the phase summary and metrics file errors, may be None.
+            completed (bool): False if the operation failed or was cancelled.
+
+        Returns:
+            dict: The metrics, see as_dict.
+        """
+        if self.result is not None:
+            return self.result
+        metrics = self.result = self.as_dict(completed)
+        if self.owns_tracing:
+            tracemalloc.stop()
+            self.owns_tracing = False
+        RECENT_METRICS[self.operation] = metrics
+
+        if log is not None:
+            for phase in metrics["phases"]:
+                log.summary("%s: %.3f s", phase["name"], phase["seconds"])
+        if self.metrics_path:
+            try:
+                append_metrics(self.metrics_path, metrics)
+            except OSError as e:
+                if log is not None:
+                    log.summary("Could not write metrics to %s: %s", self.metrics_path, e)
+        return metrics
+
+
+def append_metrics(path, metrics):
+    """
+    Append metrics to a JSON lines file, one object per line.
+
+    Args:
+        path (str): Path of the metrics file, created with its directory if missing.
+        metrics (dict): Metrics from OperationMetrics.as_dict.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as metrics_file:
+        metrics_file.write(json.dumps(metrics) + "\n")
+
+
+# Function: Create the metrics of an operation with the memory tracking and metrics file set in the addon preferences
+def create_metrics(context, operation, filepath=""):
+    prefs = context.preferences.addons["BG3-DialogsBinary-Node-Editor-main"].preferences
+    return OperationMetrics(operation, filepath, getattr(prefs, "track_memory", False),
+                            getattr(prefs, "metrics_path", ""))
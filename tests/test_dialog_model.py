@@ -0,0 +1,66 @@
+"""
+Tests for the record cache the exporter uses to skip reading unchanged nodes:
+
+    python -m unittest discover -s tests
+"""
+import unittest
+
+from addon_modules import load_module
+
+dialog_model = load_module("dialog_model")
+
+
+class FakeJumpNode:
+    """Stands in for a DialogueJumpNode and counts the reads of its properties."""
+
+    def __init__(self, **values):
+        self.values = {"uuid": "", "jumptarget": "", "jumptargetpoint": 1, "SetFlags": [], "CheckFlags": [],
+                       **values}
+        self.reads = 0
+
+    def __getattr__(self, name):
+        if name in ("values", "reads"):
+            raise AttributeError(name)
+        self.reads += 1
+        return self.values[name]
+
+
+class RecordCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = dialog_model.RecordCache()
+        self.node = FakeJumpNode(uuid="a", jumptarget="b")
+
+    def export(self, version):
+        record = self.cache.record(1, version, dialog_model.JumpRecord, self.node)
+        self.cache.finish()
+        return record
+
+    def test_unchanged_node_is_not_read_again(self):
+        first = self.export(1)
+        reads = self.node.reads
+        self.assertGreater(reads, 0)
+        self.assertIs(self.export(1), first)
+        self.assertEqual(self.node.reads, reads)
+
+    def test_changed_node_is_read_again(self):
+        first = self.export(1)
+        self.node.values["jumptarget"] = "c"
+        second = self.export(2)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.jumptarget, "c")
+
+    def test_other_record_type_is_read_again(self):
+        self.export(1)
+        record = self.cache.record(1, 1, dialog_model.RollResultRecord,
+                                   FakeJumpNode(constructor="RollResult", Success=True))
+        self.assertIsInstance(record, dialog_model.RollResultRecord)
+
+    def test_deleted_nodes_are_dropped(self):
+        self.export(1)
+        self.cache.record(2, 1, dialog_model.JumpRecord, FakeJumpNode(uuid="c"))
+        self.cache.finish()
+        self.assertEqual(list(self.cache.records), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
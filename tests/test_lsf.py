@@ -0,0 +1,171 @@
+"""
+Regression tests for the pure Python LZ4 codec and the LSF reader and writer.
+
+The modules tested here do not use Blender, so these run with plain Python:
+
+    python -m unittest discover -s tests
+"""
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+from addon_modules import load_module
+
+lz4_codec = load_module("lz4_codec")
+lsf_reader = load_module("lsf_reader")
+lsf_writer = load_module("lsf_writer")
+dialog_parser = load_module("dialog_parser")
+dialog_generator = load_module("dialog_generator")
+dialog_log = load_module("dialog_log")
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def sample_bytes():
+    # Repeated text with some noise, so the blocks have matches of every length and literal runs
+    rng = random.Random(1)
+    words = [b"TagAnswer", b"TagQuestion", b"<attribute id=\"UUID\" ", b"value=\"", b"FixedString", b"\n    "]
+    return b"".join(rng.choice(words) + bytes(rng.randrange(256) for _ in range(rng.randrange(3)))
+                    for _ in range(20000))
+
+
+class LZ4BlockTest(unittest.TestCase):
+    def test_round_trip(self):
+        for data in (b"", b"a", b"short text", bytes(range(256)) * 64, sample_bytes()):
+            compressed = lz4_codec.compress_block(data)
+            self.assertEqual(bytes(lz4_codec.decompress_block(compressed, len(data))), data)
+
+    def test_repeated_byte_round_trip(self):
+        # A match with offset 1 overlaps its own output
+        data = b"x" * 5000
+        compressed = lz4_codec.compress_block(data)
+        self.assertLess(len(compressed), 100)
+        self.assertEqual(bytes(lz4_codec.decompress_block(compressed)), data)
+
+    def test_overlapping_match(self):
+        # Literals "ab", a match of 10 bytes at offset 2, then the literal "c"
+        block = bytes((0x26,)) + b"ab" + struct.pack("<H", 2) + bytes((0x10,)) + b"c"
+        self.assertEqual(bytes(lz4_codec.decompress_block(block, 13)), b"ababababababc")
+
+    def test_long_lengths(self):
+        # A 300 byte literal run and a 1000 byte match both need extra length bytes
+        rng = random.Random(2)
+        literals = bytes(rng.randrange(256) for _ in range(300))
+        data = literals + literals[-8:] * 125
+        self.assertEqual(bytes(lz4_codec.decompress_block(lz4_codec.compress_block(data))), data)
+
+    def test_invalid_offset(self):
+        block = bytes((0x10,)) + b"a" + struct.pack("<H", 5) + bytes((0x00,))
+        with self.assertRaises(lz4_codec.LZ4Error):
+            lz4_codec.decompress_block(block)
+
+    def test_wrong_size(self):
+        with self.assertRaises(lz4_codec.LZ4Error):
+            lz4_codec.decompress_block(lz4_codec.compress_block(b"abcdef"), 5)
+
+
+class LZ4FrameTest(unittest.TestCase):
+    def test_header(self):
+        # Magic, FLG 0x60, BD 0x70 and the second byte of the XXH32 of FLG and BD
+        self.assertEqual(bytes(lz4_codec.compress_frame(b"abc")[:7]).hex(), "04224d18607073")
+
+    def test_xxh32(self):
+        # Reference values of the XXH32 specification
+        self.assertEqual(lz4_codec.xxh32(b""), 0x02CC5D05)
+        self.assertEqual(lz4_codec.xxh32(b"abc"), 0x32D153FF)
+        self.assertEqual(lz4_codec.xxh32(b"Nobody inspects the spammish repetition"), 0xE2293B2F)
+
+    def test_round_trip(self):
+        for data in (b"", b"abc", sample_bytes()):
+            self.assertEqual(bytes(lz4_codec.decompress_frame(lz4_codec.compress_frame(data))), data)
+
+    def test_uncompressed_block(self):
+        rng = random.Random(3)
+        data = bytes(rng.randrange(256) for _ in range(4096))
+        frame = lz4_codec.compress_frame(data)
+        block_size = struct.unpack_from("<I", frame, 7)[0]
+        self.assertTrue(block_size & lz4_codec.UNCOMPRESSED_BLOCK_FLAG)
+        self.assertEqual(block_size & ~lz4_codec.UNCOMPRESSED_BLOCK_FLAG, len(data))
+        self.assertEqual(bytes(lz4_codec.decompress_frame(frame)), data)
+
+    def test_multiple_blocks(self):
+        data = sample_bytes() * (lz4_codec.FRAME_BLOCK_SIZE // len(sample_bytes()) + 1)
+        self.assertEqual(bytes(lz4_codec.decompress_frame(lz4_codec.compress_frame(data))), data)
+
+    def test_not_a_frame(self):
+        with self.assertRaises(lz4_codec.LZ4Error):
+            lz4_codec.decompress_frame(b"LSOF\x00\x00\x00\x00")
+
+
+class LSFRoundTripTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.lsx_path = os.path.join(cls.directory.name, "dialog.lsx")
+        dialog_generator.generate_dialog(cls.lsx_path, os.path.join(cls.directory.name, "english.xml"), 300,
+                                         seed=4, root_count=2)
+        cls.lsx_model = cls.parse(cls.lsx_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    @staticmethod
+    def parse(filepath):
+        root = dialog_parser.load_dialog_document(filepath)
+        return dialog_parser.parse_dialog_model(root, {}, dialog_log.DialogLog(dialog_log.OFF))
+
+    def assert_same_model(self, model):
+        self.assertEqual(len(model.nodes), len(self.lsx_model.nodes))
+        for record, expected in zip(model.nodes, self.lsx_model.nodes):
+            self.assertEqual(record.bl_idname, expected.bl_idname)
+            self.assertEqual(record.values(), expected.values(), expected.uuid)
+            self.assertEqual(record.children, expected.children, expected.uuid)
+        for name in ("category", "UUID", "TimelineId", "RootNodes", "validated_flags"):
+            self.assertEqual(getattr(model, name), getattr(self.lsx_model, name), name)
+        self.assertEqual([speaker.values() for speaker in model.Speakers],
+                         [speaker.values() for speaker in self.lsx_model.Speakers])
+        self.assertEqual([speaker.values() for speaker in model.DefaultAddressedSpeakers],
+                         [speaker.values() for speaker in self.lsx_model.DefaultAddressedSpeakers])
+
+    def test_write_then_read(self):
+        root = dialog_parser.load_dialog_document(self.lsx_path)
+        for version in (4, 5, 6, 7):
+            for compress in (True, False):
+                with self.subTest(version=version, compress=compress):
+                    lsf_path = os.path.join(self.directory.name, f"dialog_{version}_{compress}.lsf")
+                    lsf_writer.write_lsf(root, lsf_path, version, compress)
+                    self.assertTrue(lsf_reader.is_lsf_file(lsf_path))
+                    self.assert_same_model(self.parse(lsf_path))
+
+    def test_not_lsf(self):
+        self.assertFalse(lsf_reader.is_lsf_file(self.lsx_path))
+        with self.assertRaises(lsf_reader.LSFError):
+            lsf_reader.read_lsf(self.lsx_path)
+
+
+
+class LSFTranslatedStringTest(unittest.TestCase):
+    """
+    translated_strings.lsf is a v7 file whose first TagText stores a version and the others the value
+    layout some BG3 files still use, with an empty value in the last one.
+    """
+
+    def test_value_and_version_layouts(self):
+        root = lsf_reader.read_lsf(os.path.join(DATA_DIR, "translated_strings.lsf"))
+        node = root.find("./region/node/children/node[@id='TaggedText']")
+        self.assertEqual([dict(attribute.attrib) for attribute in node.findall("attribute")], [
+            {"id": "TagText", "type": "TranslatedString", "handle": "h1a2b3c4dg5e6fg4a7bg8c9dg0e1f2a3b4c5d",
+             "version": "3"},
+            {"id": "TagText", "type": "TranslatedString", "handle": "h0f9e8d7cg6b5ag4f3eg2d1cgb0a9f8e7d6c5",
+             "value": "Old style line"},
+            {"id": "TagText", "type": "TranslatedString", "handle": "h11112222g3333g4444g5555g666677778888",
+             "value": ""},
+            {"id": "LineId", "type": "FixedString", "value": "after"},
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
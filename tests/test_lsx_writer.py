@@ -0,0 +1,93 @@
+"""
+Regression tests for the streaming LSX writer.
+
+The expected documents are the output of the indent_tree plus ElementTree.write export that
+LSXWriter replaced, so the exported files stay byte-identical:
+
+    python -m unittest discover -s tests
+"""
+import io
+import unittest
+import xml.etree.ElementTree as ET
+
+from addon_modules import load_module
+
+lsx_writer = load_module("lsx_writer")
+
+EXPECTED_DOCUMENT = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    "<save>\n"
+    "    <version major=\"4\" />\n"
+    "    <region id=\"dialog\">\n"
+    "        <node id=\"dialog\">\n"
+    "            <attribute id=\"UUID\" type=\"FixedString\" value=\"a&amp;b &quot;c&quot;\" />\n"
+    "            <children>\n"
+    "                <node id=\"nodes\">\n"
+    "                    <node id=\"RootNodes\" />\n"
+    "                </node>\n"
+    "            </children>\n"
+    "        </node>\n"
+    "    </region>\n"
+    "</save>\n"
+)
+
+
+def sample_document():
+    save = ET.Element("save")
+    ET.SubElement(save, "version", {"major": "4"})
+    region = ET.SubElement(save, "region", {"id": "dialog"})
+    dialog = ET.SubElement(region, "node", {"id": "dialog"})
+    ET.SubElement(dialog, "attribute", {"id": "UUID", "type": "FixedString", "value": "a&b \"c\""})
+    children = ET.SubElement(dialog, "children")
+    nodes = ET.SubElement(children, "node", {"id": "nodes"})
+    ET.SubElement(nodes, "node", {"id": "RootNodes"})
+    return save
+
+
+class LSXWriterTest(unittest.TestCase):
+    def write(self, build):
+        output = io.StringIO()
+        writer = lsx_writer.LSXWriter(output.write)
+        writer.declaration()
+        build(writer)
+        return output.getvalue()
+
+    def test_element(self):
+        self.assertEqual(self.write(lambda writer: writer.element(sample_document())), EXPECTED_DOCUMENT)
+
+    def test_start_and_end(self):
+        # The export streams the document: the outer elements are started and ended around the nodes
+        def build(writer):
+            writer.start("save")
+            writer.element(sample_document()[0])
+            writer.start("region", {"id": "dialog"})
+            writer.start("node", {"id": "dialog"})
+            writer.element(sample_document()[1][0][0])
+            writer.element(sample_document()[1][0][1])
+            writer.end()
+            writer.end()
+            writer.end()
+        self.assertEqual(self.write(build), EXPECTED_DOCUMENT)
+
+    def test_fragment(self):
+        # A cached fragment is written at the depth it was serialised for, closing tags included
+        def build(writer):
+            writer.start("save")
+            writer.element(sample_document()[0])
+            writer.start("region", {"id": "dialog"})
+            writer.start("node", {"id": "dialog"})
+            writer.write_fragment(writer.fragment(sample_document()[1][0]))
+            writer.end()
+            writer.end()
+            writer.end()
+        self.assertEqual(self.write(build), EXPECTED_DOCUMENT)
+
+    def test_tree_writer(self):
+        writer = lsx_writer.TreeWriter()
+        writer.declaration()
+        writer.element(sample_document())
+        self.assertEqual(ET.tostring(writer.root), ET.tostring(sample_document()))
+
+
+if __name__ == "__main__":
+    unittest.main()
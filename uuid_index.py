@@ -0,0 +1,157 @@
+import itertools
+import re
+
+import bpy
+
+# Node tree session_uid -> UUIDIndex. Kept outside RNA so looking a node up never walks the tree or touches
+# ID properties. session_uid is used rather than the pointer because a pointer can be reused by another tree
+UUID_INDEXES = {}
+# Node tree session_uid -> number of changes, bumped by the tree update and by edits of a node UUID
+TREE_VERSIONS = {}
+# Node pointer -> version of the node, a new number from NODE_VERSION_COUNTER every time one of its properties
+# changes. New nodes get one in init and copy, so a node reusing the pointer of a deleted one never matches it
+NODE_VERSIONS = {}
+NODE_VERSION_COUNTER = itertools.count(1)
+# Start of the data path of a property group inside a node, the name has quotes and backslashes escaped
+NODE_PATH = re.compile(r'nodes\["(?:[^"\\]|\\.)*"\]')
+
+
+class UUIDIndex:
+    """
+    UUID -> node map of a node tree, with the UUIDs used by more than one node.
+
+    Built from one pass over the nodes and valid as long as the node count and the change counter of the
+    tree stay the same; uuid_index rebuilds it on the first lookup after a change.
+    """
+
+    def __init__(self, nodes, key):
+        """
+        Args:
+            nodes (iterable): (UUID, node) pairs in tree order.
+            key (tuple): (node count, tree version) the index was built at.
+        """
+        self.key = key
+        self.nodes = {}
+        self.duplicates = {}
+        for node_uuid, node in nodes:
+            if not node_uuid:
+                continue
+            first = self.nodes.setdefault(node_uuid, node)
+            if first is not node:
+                self.duplicates.setdefault(node_uuid, [first]).append(node)
+
+    def get(self, node_uuid, default=None):
+        """The first node with the UUID, or default."""
+        return self.nodes.get(node_uuid, default)
+
+    def __contains__(self, node_uuid):
+        return node_uuid in self.nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+def index_key(node_tree):
+    return len(node_tree.nodes), TREE_VERSIONS.get(node_tree.session_uid, 0)
+
+
+def uuid_index(node_tree):
+    """
+    Get the UUID index of a node tree, rebuilding it if the tree changed since it was built.
+
+    Args:
+        node_tree (bpy.types.NodeTree): The tree.
+
+    Returns:
+        UUIDIndex: The index of the tree.
+    """
+    key = index_key(node_tree)
+    index = UUID_INDEXES.get(node_tree.session_uid)
+    if index is None or index.key != key:
+        index = UUIDIndex(((getattr(node, "uuid", None), node) for node in node_tree.nodes), key)
+        UUID_INDEXES[node_tree.session_uid] = index
+    return index
+
+
+def store_uuid_index(node_tree, node_map):
+    """
+    Use a UUID -> node map the caller built along with the nodes (like the importer) as the index of the tree.
+
+    The map is ignored unless it holds every node of the tree, a dict cannot show duplicate UUIDs.
+
+    Args:
+        node_tree (bpy.types.NodeTree): The tree.
+        node_map (dict): UUID -> node.
+    """
+    key = index_key(node_tree)
+    if len(node_map) == key[0]:
+        UUID_INDEXES[node_tree.session_uid] = UUIDIndex(node_map.items(), key)
+
+
+def tree_changed(node_tree):
+    """Invalidate the index of a tree, called on tree updates and UUID edits."""
+    TREE_VERSIONS[node_tree.session_uid] = TREE_VERSIONS.get(node_tree.session_uid, 0) + 1
+
+
+def node_changed(node):
+    """Give a node a new version, called when it is created and when one of its properties changes."""
+    NODE_VERSIONS[node.as_pointer()] = next(NODE_VERSION_COUNTER)
+
+
+def node_version(node):
+    """
+    Get the version of a node, the same number as long as none of its properties changed.
+
+    Args:
+        node (bpy.types.Node): The node.
+
+    Returns:
+        int: The version, a new one for nodes not seen since the versions were last cleared.
+    """
+    pointer = node.as_pointer()
+    version = NODE_VERSIONS.get(pointer)
+    if version is None:
+        version = NODE_VERSIONS[pointer] = next(NODE_VERSION_COUNTER)
+    return version
+
+
+# Function: update callback of the uuid property of the dialogue nodes
+def node_uuid_changed(node, context):
+    node_changed(node)
+    tree_changed(node.id_data)
+
+
+# Function: update callback of the other properties of the dialogue nodes
+def node_property_changed(node, context):
+    node_changed(node)
+
+
+# Function: update callback of the properties of the flag, text and speaker linking items of a node
+def item_property_changed(item, context):
+    match = NODE_PATH.match(item.path_from_id())
+    if match is not None:
+        node_changed(item.id_data.path_resolve(match.group()))
+
+
+# Function: forget every index and version, the nodes they hold are invalid after undo, redo and loading a file
+@bpy.app.handlers.persistent
+def clear_uuid_indexes(*args):
+    UUID_INDEXES.clear()
+    TREE_VERSIONS.clear()
+    NODE_VERSIONS.clear()
+
+
+CLEAR_HANDLERS = (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post)
+
+
+def register():
+    for handlers in CLEAR_HANDLERS:
+        if clear_uuid_indexes not in handlers:
+            handlers.append(clear_uuid_indexes)
+
+
+def unregister():
+    for handlers in CLEAR_HANDLERS:
+        if clear_uuid_indexes in handlers:
+            handlers.remove(clear_uuid_indexes)
+    clear_uuid_indexes()
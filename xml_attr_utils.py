@@ -1,54 +1,94 @@
-import xml.etree.ElementTree as ET
+from collections import namedtuple
 
-# Helper functions for types of attributes
-def get_boolean_attribute(xml_node, attribute_id, default=False):
+# Parsed <attribute> element. handle and version are only set on TranslatedString attributes
+AttributeValue = namedtuple('AttributeValue', ['type', 'value', 'handle', 'version'])
+
+def get_attribute_map(xml_node):
     """
-    Get a boolean attribute from an XML node.
+    Index the direct <attribute> children of an XML node by their id.
+
+    Build this once per <node> and pass it to the get_*_attribute helpers, so every lookup is a
+    dictionary access instead of a scan over the node's children.
 
     Args:
         xml_node (xml.etree.ElementTree.Element): The XML node.
+
+    Returns:
+        dict: Attribute ID -> AttributeValue(type, value, handle, version). If an ID is repeated the
+        first attribute wins, like Element.find.
+    """
+    attributes = {}
+    for attr_elem in xml_node:
+        if attr_elem.tag != 'attribute':
+            continue
+        attrib = attr_elem.attrib
+        attr_id = attrib.get('id')
+        if attr_id not in attributes:
+            attributes[attr_id] = AttributeValue(
+                attrib.get('type'), attrib.get('value'), attrib.get('handle'), attrib.get('version'))
+    return attributes
+
+# Helper functions for types of attributes
+def get_boolean_attribute(attributes, attribute_id, default=False):
+    """
+    Get a boolean attribute from an attribute map.
+
+    Args:
+        attributes (dict): The attribute map of the XML node, see get_attribute_map.
         attribute_id (str): The attribute ID to search for.
         default (bool): The default value if the attribute is not found.
 
     Returns:
         bool: The boolean value of the attribute.
     """
-    attr_elem = xml_node.find(f"./attribute[@id='{attribute_id}']")
-    if attr_elem is not None:
-        value = attr_elem.attrib.get('value', '').strip().lower()
+    attr = attributes.get(attribute_id)
+    if attr is not None:
+        value = (attr.value or '').strip().lower()
         return value == 'true'
     return default
 
-def get_int_attribute(xml_node, attribute_id, default=0):
+def get_int_attribute(attributes, attribute_id, default=0):
     """
-    Get an integer attribute from an XML node.
+    Get an integer attribute from an attribute map.
 
     Args:
-        xml_node (xml.etree.ElementTree.Element): The XML node.
+        attributes (dict): The attribute map of the XML node, see get_attribute_map.
         attribute_id (str): The attribute ID to search for.
         default (int): The default value if the attribute is not found.
 
     Returns:
         int: The integer value of the attribute.
     """
-    attr_elem = xml_node.find(f"./attribute[@id='{attribute_id}']")
-    return int(attr_elem.attrib.get('value', str(default))) if attr_elem is not None else default
+    attr = attributes.get(attribute_id)
+    return int(attr.value) if attr is not None and attr.value is not None else default
 
-def get_string_attribute(xml_node, attribute_id, default=''):
+def get_string_attribute(attributes, attribute_id, default=''):
     """
-    Get a string attribute from an XML node.
+    Get a string attribute from an attribute map.
 
     Args:
-        xml_node (xml.etree.ElementTree.Element): The XML node.
+        attributes (dict): The attribute map of the XML node, see get_attribute_map.
         attribute_id (str): The attribute ID to search for.
         default (str): The default value if the attribute is not found.
 
     Returns:
         str: The string value of the attribute.
     """
-    attr_elem = xml_node.find(f"./attribute[@id='{attribute_id}']")
-    return attr_elem.attrib.get('value', default) if attr_elem is not None else default
+    attr = attributes.get(attribute_id)
+    return attr.value if attr is not None and attr.value is not None else default
+
+def get_attribute(attributes, attr_id, default=None, cast=str):
+    """
+    Get an attribute value from an attribute map and convert it with cast.
 
-def get_attribute(xml_node, attr_id, default=None, cast=str):
-    attr_elem = xml_node.find(f"./attribute[@id='{attr_id}']")
-    return cast(attr_elem.attrib.get('value', default)) if attr_elem else default
\ No newline at end of file
+    Args:
+        attributes (dict): The attribute map of the XML node, see get_attribute_map.
+        attr_id (str): The attribute ID to search for.
+        default: The default value if the attribute or its value is not found.
+        cast (callable): Conversion applied to the raw string value.
+
+    Returns:
+        The converted value of the attribute, or default.
+    """
+    attr = attributes.get(attr_id)
+    return cast(attr.value) if attr is not None and attr.value is not None else default
\ No newline at end of file